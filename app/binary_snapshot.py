@@ -0,0 +1,343 @@
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from .indexes import matches_terms
+from .models import Event, recurrence_code
+from .storage import JournalStorage, Record
+
+MAGIC = b'EVSNAP01'
+
+# The sections of a snapshot file, in file order
+SECTIONS = ('starts', 'ends', 'records', 'by_id', 'recurring', 'text_offsets', 'text_rows', 'text', 'heap', 'names')
+
+# Magic, row count, longest event duration in microseconds, then (offset, size) of every section
+_HEADER = struct.Struct('<8sQq' + 'QQ' * len(SECTIONS))
+
+# Per row: created_at, heap offset, byte lengths of id/title/description,
+# UTC offsets in seconds of start/end/created (_NAIVE when naive), recurrence code
+_RECORD = struct.Struct('<qQIIIiiiH2x')
+_HEAP_REF = struct.Struct('<QI')
+_RECURRENCE = struct.Struct('<H')
+_RECURRENCE_AT = 8 + 8 + 3 * 4 + 3 * 4
+
+_NAIVE = -2 ** 31
+_SECOND = timedelta(seconds=1)
+_TIMEZONES: Dict[int, Any] = {_NAIVE: None}
+
+# (start_us, id, end_us, created_us, zones, recurrence, title, description)
+Entry = Tuple[int, str, int, int, Optional[tuple], Optional[str], str, str]
+
+
+def _zone_offset(event: Event, index: int) -> int:
+    zones = event._zones
+    if zones is None or zones[index] is None:
+        return _NAIVE
+    moment = (event.start_time, event.end_time, event.created_at)[index]
+    return moment.utcoffset() // _SECOND
+
+
+def _timezone(offset: int):
+    tzinfo = _TIMEZONES.get(offset)
+    if tzinfo is None and offset != _NAIVE:
+        tzinfo = _TIMEZONES[offset] = timezone(timedelta(seconds=offset))
+    return tzinfo
+
+
+def _write_section(out, source: Union[bytes, array, Any]) -> Tuple[int, int]:
+    """Append a section (bytes, an array or a file object) at an 8-byte boundary"""
+    padding = -out.tell() % 8
+    out.write(b'\0' * padding)
+    offset = out.tell()
+    if hasattr(source, 'read'):
+        source.seek(0)
+        shutil.copyfileobj(source, out, 1024 * 1024)
+    else:
+        out.write(source)
+    return offset, out.tell() - offset
+
+
+def write_snapshot(path: str, events: Iterable[Union[Event, Record]]) -> int:
+    """
+    Write events (Event objects or stored dicts) to a binary snapshot file, atomically
+
+    Rows are ordered by (start_time, id). Strings are streamed to temporary
+    section files as they are read, so memory holds only the fixed-width
+    columns and ids, never every event at once. Returns the number of rows.
+
+    Raises ValueError if an event id appears twice.
+    """
+    names: Dict[Optional[str], int] = {None: 0}
+    keys: List[Tuple[int, str, int]] = []
+    starts = array('q')
+    ends = array('q')
+    codes = array('H')
+    text_offsets = array('Q', [0])
+    max_duration = 0
+    heap_size = 0
+
+    with tempfile.TemporaryFile() as records, tempfile.TemporaryFile() as heap, \
+            tempfile.TemporaryFile() as text:
+        for position, event in enumerate(events):
+            if not isinstance(event, Event):
+                event = Event.from_stored(event)
+            id_bytes = event.id.encode('utf-8')
+            title = event.title.encode('utf-8')
+            description = event.description.encode('utf-8')
+            heap.write(id_bytes)
+            heap.write(title)
+            heap.write(description)
+
+            code = names.setdefault(event.recurrence, len(names))
+            records.write(_RECORD.pack(
+                event._created_us, heap_size, len(id_bytes), len(title), len(description),
+                _zone_offset(event, 0), _zone_offset(event, 1), _zone_offset(event, 2), code
+            ))
+            heap_size += len(id_bytes) + len(title) + len(description)
+
+            # Lowercased search text; NUL keeps a match from spanning two events
+            chunk = f"{event.title}\n{event.description}".lower().encode('utf-8') + b'\0'
+            text.write(chunk)
+            text_offsets.append(text_offsets[-1] + len(chunk))
+
+            keys.append((event._start_us, event.id, position))
+            starts.append(event._start_us)
+            ends.append(event._end_us)
+            codes.append(code)
+            max_duration = max(max_duration, event._end_us - event._start_us)
+
+        keys.sort()
+        count = len(keys)
+        order = [position for _, _, position in keys]
+        by_id = array('I', sorted(range(count), key=lambda row: keys[row][1]))
+        for previous, row in zip(by_id, by_id[1:]):
+            if keys[previous][1] == keys[row][1]:
+                raise ValueError(f"Duplicate event id: {keys[row][1]}")
+
+        # Text stays in input order; text_rows maps each chunk to its row
+        text_rows = array('I', bytes(4 * count))
+        for row, position in enumerate(order):
+            text_rows[position] = row
+
+        records.seek(0)
+        raw = records.read()
+        size = _RECORD.size
+        sections = {
+            'starts': array('q', (starts[position] for position in order)),
+            'ends': array('q', (ends[position] for position in order)),
+            'records': b''.join(raw[position * size:(position + 1) * size] for position in order),
+            'by_id': by_id,
+            'recurring': array('I', (row for row, position in enumerate(order) if codes[position])),
+            'text_offsets': text_offsets,
+            'text_rows': text_rows,
+            'text': text,
+            'heap': heap,
+            'names': json.dumps(sorted(names, key=names.get)).encode('utf-8')
+        }
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as out:
+            out.write(bytes(_HEADER.size))
+            layout = []
+            for name in SECTIONS:
+                layout.extend(_write_section(out, sections[name]))
+            out.seek(0)
+            out.write(_HEADER.pack(MAGIC, count, max_duration, *layout))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, path)
+    return count
+
+
+class SnapshotReader:
+    """Read-only, memory-mapped view of a binary snapshot file.
+
+    Nothing is parsed up front: the start and end columns are read through
+    typed memoryviews, rows and strings are unpacked from the mapping on
+    access, and events are only built for the rows a query returns. Since
+    the mapping is read-only and backed by the file, every process that maps
+    the same snapshot shares its pages in the OS page cache.
+
+    Rows are ordered by (start_time, id), so date windows are bisections of
+    `starts`; `by_id` lists the rows in id order for O(log n) id lookups.
+    Text search scans the lowercased text section for each term.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.stat = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, self.max_duration, *layout = _HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            raise ValueError(f"Not an event snapshot: {path}")
+        self._count = count
+        self._sections = {name: (layout[2 * i], layout[2 * i + 1]) for i, name in enumerate(SECTIONS)}
+        self._view = memoryview(self._mm)
+        self.starts = self._array('starts', 'q')
+        self.ends = self._array('ends', 'q')
+        self.by_id = self._array('by_id', 'I')
+        self.recurring = self._array('recurring', 'I')
+        self._text_offsets = self._array('text_offsets', 'Q')
+        self._text_rows = self._array('text_rows', 'I')
+        self._records = self._sections['records'][0]
+        self._text = self._sections['text'][0]
+        self._heap = self._sections['heap'][0]
+        offset, size = self._sections['names']
+        self.names: List[Optional[str]] = json.loads(bytes(self._mm[offset:offset + size]))
+        # File recurrence codes -> this process's interned codes
+        self._codes = [recurrence_code(name) for name in self.names]
+
+    def _array(self, name: str, typecode: str) -> memoryview:
+        offset, size = self._sections[name]
+        return self._view[offset:offset + size].cast(typecode)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        """Unmap the file (any Event built from it stays valid)"""
+        for view in (self.starts, self.ends, self.by_id, self.recurring, self._text_offsets,
+                     self._text_rows, self._view):
+            view.release()
+        try:
+            self._mm.close()
+        except BufferError:
+            # Another view is still alive; the mapping goes away with it
+            pass
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._heap + offset
+        return str(self._mm[start:start + length], 'utf-8')
+
+    def id_at(self, row: int) -> str:
+        """Id of the event in `row`"""
+        offset, length = _HEAP_REF.unpack_from(self._mm, self._records + row * _RECORD.size + 8)
+        return self._string(offset, length)
+
+    def recurrence_at(self, row: int) -> Optional[str]:
+        """Recurrence of the event in `row`"""
+        code, = _RECURRENCE.unpack_from(self._mm, self._records + row * _RECORD.size + _RECURRENCE_AT)
+        return self.names[code]
+
+    def row_for_id(self, event_id: str) -> Optional[int]:
+        """Row holding `event_id`, or None"""
+        index = bisect_left(self.by_id, event_id, key=self.id_at)
+        if index < self._count and self.id_at(self.by_id[index]) == event_id:
+            return self.by_id[index]
+        return None
+
+    def _unpack(self, row: int):
+        created, offset, id_len, title_len, description_len, *zones, code = _RECORD.unpack_from(
+            self._mm, self._records + row * _RECORD.size
+        )
+        event_id = self._string(offset, id_len)
+        title = self._string(offset + id_len, title_len)
+        description = self._string(offset + id_len + title_len, description_len)
+        if zones[0] == zones[1] == zones[2] == _NAIVE:
+            zones = None
+        else:
+            zones = tuple(_timezone(zone) for zone in zones)
+        return event_id, title, description, created, zones, code
+
+    def event(self, row: int) -> Event:
+        """Build the event stored in `row`"""
+        event_id, title, description, created, zones, code = self._unpack(row)
+        return Event._restore(event_id, title, description, self.starts[row], self.ends[row],
+                              created, zones, self._codes[code])
+
+    def entry(self, row: int) -> Entry:
+        """The row's fields as a comparable tuple, without building an Event"""
+        event_id, title, description, created, zones, code = self._unpack(row)
+        return (self.starts[row], event_id, self.ends[row], created, zones, self.names[code],
+                title, description)
+
+    def lower_bound(self, micros: int) -> int:
+        """First row starting at or after `micros`"""
+        return bisect_left(self.starts, micros)
+
+    def upper_bound(self, micros: int) -> int:
+        """First row starting after `micros`"""
+        return bisect_right(self.starts, micros)
+
+    def position_after(self, micros: int, event_id: str) -> int:
+        """First row whose (start, id) sorts after (micros, event_id)"""
+        lo = self.lower_bound(micros)
+        same_start = range(lo, self.upper_bound(micros))
+        return lo + bisect_right(same_start, event_id, key=self.id_at)
+
+    def text_rows(self, term: str) -> Set[int]:
+        """Rows whose title or description has a word starting with `term` (see indexes.matches_terms)"""
+        term = term.lower()
+        pattern = re.compile(re.escape(term.encode('utf-8')))
+        text_start = self._text
+        end = text_start + self._sections['text'][1]
+        rows = set()
+        position = text_start
+        while True:
+            match = pattern.search(self._mm, position, end)
+            if match is None:
+                return rows
+            chunk = bisect_right(self._text_offsets, match.start() - text_start) - 1
+            # The substring scan finds candidates; word starts are checked on the decoded text
+            text = self._mm[text_start + self._text_offsets[chunk]:text_start + self._text_offsets[chunk + 1] - 1]
+            if matches_terms((term,), text.decode('utf-8'), ''):
+                rows.add(self._text_rows[chunk])
+            # Skip the rest of this event's text
+            position = text_start + self._text_offsets[chunk + 1]
+
+
+class MappedJournalStorage(JournalStorage):
+    """Journal storage whose snapshot is a binary snapshot file instead of JSON.
+
+    `open_snapshot()` maps the snapshot and folds the journal into the final
+    state of the events it touches, which the caller keeps as an overlay on
+    top of the mapped base. Compaction writes a new binary snapshot (from
+    events or records, in any order) and counts it in `snapshots`, so the
+    caller knows to map the new file.
+    """
+
+    def __init__(self, data_file: str, compact_threshold: int = 10000, fsync: bool = True):
+        super().__init__(data_file, compact_threshold, fsync)
+        self.snapshots = 0
+
+    def open_snapshot(self) -> Tuple[SnapshotReader, Dict[str, Optional[Record]]]:
+        """Map the snapshot and read the journal, returning (base, journaled changes)"""
+        reader = SnapshotReader(self.data_file)
+        self._snapshot_stat = reader.stat
+        return reader, self._read_journal()
+
+    def _iter_snapshot(self) -> Iterator[Record]:
+        if not os.path.exists(self.data_file):
+            return
+        reader = SnapshotReader(self.data_file)
+        try:
+            for row in range(len(reader)):
+                yield reader.event(row).to_dict()
+        finally:
+            reader.close()
+
+    def _write_snapshot(self, records: Iterable[Union[Event, Record]]):
+        write_snapshot(self.data_file, records)
+        self.snapshots += 1
+
+
+def convert_json(json_file: str, snapshot_file: str) -> int:
+    """Write a binary snapshot of an `events.json` file (and its journal, if any)"""
+    return write_snapshot(snapshot_file, JournalStorage(json_file).iter_records())
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python -m app.binary_snapshot events.json events.snap")
+    converted = convert_json(sys.argv[1], sys.argv[2])
+    print(f"Wrote {converted} events to {sys.argv[2]}")
@@ -0,0 +1,230 @@
+import json
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional
+from .models import Event
+
+# SSE event names
+CHANGE = 'change'
+REMINDER = 'reminder'
+RESYNC = 'resync'
+MESSAGE_TYPES = (CHANGE, REMINDER, RESYNC)
+
+
+class Message(NamedTuple):
+    seq: int
+    type: str
+    key: Optional[str]  # messages with the same key supersede each other when a queue overflows
+    frame: str  # the complete SSE frame, encoded once for every subscriber
+
+
+def format_frame(event_type: str, data, event_id: Optional[str] = None) -> str:
+    """Encode one Server-Sent Events frame"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscription:
+    """One client's bounded queue of pending messages.
+
+    When the queue is full a new message replaces a queued one with the
+    same key (an older state of the same event, which the client no longer
+    needs); failing that the oldest message is dropped and the subscriber
+    is told to resync before its next message. A slow client never holds up
+    the publisher and never silently misses a change.
+    """
+
+    def __init__(self, broker: 'Broker', max_queued: int, types: Iterable[str]):
+        self.broker = broker
+        self.max_queued = max_queued
+        self.types = frozenset(types)
+        self.dropped = 0
+        self.coalesced = 0
+        self._queue: 'OrderedDict[int, Message]' = OrderedDict()
+        self._keys: Dict[str, int] = {}
+        self._lost = False
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def _put(self, message: Message):
+        if message.type not in self.types and message.type != RESYNC:
+            return
+        with self._lock:
+            if len(self._queue) >= self.max_queued:
+                previous = self._keys.pop(message.key, None) if message.key is not None else None
+                if previous is not None:
+                    del self._queue[previous]
+                    self.coalesced += 1
+                else:
+                    _, oldest = self._queue.popitem(last=False)
+                    if oldest.key is not None and self._keys.get(oldest.key) == oldest.seq:
+                        del self._keys[oldest.key]
+                    self.dropped += 1
+                    self._lost = True
+            self._queue[message.seq] = message
+            if message.key is not None:
+                self._keys[message.key] = message.seq
+        self._ready.set()
+
+    def _mark_lost(self):
+        with self._lock:
+            self._lost = True
+        self._ready.set()
+
+    def get(self, timeout: Optional[float] = None) -> List[str]:
+        """
+        Wait up to `timeout` seconds for messages and return their frames
+
+        Returns every queued frame at once (an empty list on timeout),
+        preceded by a resync frame if messages were lost since the last call.
+        """
+        if not self._ready.wait(timeout):
+            return []
+        with self._lock:
+            frames = []
+            if self._lost:
+                frames.append(self.broker.resync_frame())
+                self._lost = False
+            frames.extend(message.frame for message in self._queue.values())
+            self._queue.clear()
+            self._keys.clear()
+            self._ready.clear()
+        return frames
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """In-process fan-out of event changes and fired reminders to stream subscribers.
+
+    Publishing encodes each message once and appends it to every matching
+    subscriber's bounded queue; it never waits for a subscriber, and no
+    thread is started per subscriber. The last `replay_size` messages are
+    kept so a reconnecting client can resume after its `Last-Event-ID`.
+
+    Message ids are `<epoch>-<seq>`: the service's version epoch changes
+    with every process, so an id from another worker or from before a
+    restart is recognized and answered with a resync instead of a wrong
+    resume. Writes the service did not notify us about (other processes'
+    writes it could no longer replay) are detected from its version and
+    broadcast as a resync as well.
+    """
+
+    def __init__(self, event_service, max_queued: int = 1000, replay_size: int = 1000,
+                 max_subscribers: int = 500):
+        self.event_service = event_service
+        self.epoch = event_service.version_epoch
+        self.max_queued = max_queued
+        self.max_subscribers = max_subscribers
+        self._replay: Deque[Message] = deque(maxlen=replay_size)
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._seq = 0
+        # Service version expected once the last published change has been counted
+        self._expected_version = event_service.version
+        self.published = 0
+        event_service.add_listener(self._on_event_change)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def last_event_id(self) -> str:
+        return f"{self.epoch}-{self._seq}"
+
+    def resync_frame(self) -> str:
+        return format_frame(RESYNC, {'latest': self.last_event_id})
+
+    def publish(self, event_type: str, data, key: Optional[str] = None) -> Message:
+        """Send a message to every subscriber that accepts `event_type`"""
+        with self._lock:
+            self._seq += 1
+            message = Message(self._seq, event_type, key, format_frame(event_type, data, f"{self.epoch}-{self._seq}"))
+            self._replay.append(message)
+            for subscription in self._subscribers:
+                subscription._put(message)
+            self.published += 1
+        return message
+
+    def _on_event_change(self, op: str, event: Event):
+        self.publish(CHANGE, {
+            'op': op,
+            'id': event.id,
+            'event': event.to_dict() if op != 'delete' else None,
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        }, key=event.id)
+        # The service bumps its version right after its listeners ran
+        self._expected_version = self.event_service.version + 1
+
+    def publish_reminder(self, reminder: dict) -> Message:
+        """Publish a fired reminder (see ReminderScheduler.add_listener)"""
+        return self.publish(REMINDER, reminder)
+
+    def check_gaps(self):
+        """Tell every subscriber to resync if the service changed without notifying us"""
+        with self._lock:
+            version = self.event_service.version
+            if version <= self._expected_version:
+                return
+            self._expected_version = version
+            # Older messages cannot bring a client up to date any more
+            self._replay.clear()
+        self.publish(RESYNC, {'reason': 'external changes'})
+
+    def _parse_id(self, last_event_id: str) -> Optional[int]:
+        epoch, _, seq = last_event_id.rpartition('-')
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def subscribe(self, last_event_id: Optional[str] = None,
+                  types: Iterable[str] = MESSAGE_TYPES) -> Subscription:
+        """
+        Register a subscriber, replaying what it missed after `last_event_id`
+
+        Raises OverflowError once `max_subscribers` are connected. If the
+        messages after `last_event_id` are no longer retained, the first
+        thing the subscriber receives is a resync.
+        """
+        subscription = Subscription(self, self.max_queued, types)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise OverflowError(f"Too many stream subscribers (limit {self.max_subscribers})")
+            if last_event_id:
+                seq = self._parse_id(last_event_id)
+                oldest = self._replay[0].seq if self._replay else self._seq + 1
+                if seq is None or seq < oldest - 1 or seq > self._seq:
+                    subscription._mark_lost()
+                else:
+                    for message in self._replay:
+                        if message.seq > seq:
+                            subscription._put(message)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            'subscribers': len(subscribers),
+            'published': self.published,
+            'last_event_id': self.last_event_id,
+            'queued': sum(len(subscription) for subscription in subscribers),
+            'dropped': sum(subscription.dropped for subscription in subscribers),
+            'coalesced': sum(subscription.coalesced for subscription in subscribers)
+        }
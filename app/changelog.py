@@ -0,0 +1,102 @@
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, NamedTuple, Optional
+from .models import Event
+
+
+class Change(NamedTuple):
+    seq: int
+    op: str
+    event_id: str
+    event: Optional[Dict[str, Any]]  # None for a delete (tombstone)
+    timestamp: datetime
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'seq': self.seq,
+            'op': self.op,
+            'id': self.event_id,
+            'event': self.event,
+            'timestamp': self.timestamp.isoformat()
+        }
+
+
+class ResyncRequired(Exception):
+    """Raised when the requested changes are no longer retained; the client must reload everything"""
+    def __init__(self, latest: int):
+        super().__init__("Changes since the given sequence number are no longer available")
+        self.latest = latest
+
+
+class Changelog:
+    """Bounded log of event writes, numbered by a sequence, for delta sync.
+
+    Listens to the event service and keeps the last `max_entries` changes:
+    creates and updates carry the event as serialized, deletes are
+    tombstones without a payload. `since(seq)` returns the changes after
+    `seq`, or raises ResyncRequired once `seq` has fallen out of the window.
+
+    Changes that reach the service without a notification (other processes'
+    writes a SQLite service could no longer replay) show up only as a
+    version bump. The
+    log notices the gap on the next read and drops what it holds, so
+    clients resync rather than miss those changes.
+    """
+
+    def __init__(self, event_service, max_entries: int = 10000):
+        self.event_service = event_service
+        self.max_entries = max_entries
+        self.epoch = event_service.version_epoch
+        self._entries: Deque[Change] = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+        self._latest = 0
+        # Oldest sequence number a client may still resume from
+        self._floor = 0
+        # Service version expected once the last logged write has been counted
+        self._expected_version = event_service.version
+        event_service.add_listener(self._on_event_change)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def latest(self) -> int:
+        """Sequence number of the most recent change (0 before any)"""
+        self._check_gaps()
+        return self._latest
+
+    def _on_event_change(self, op: str, event: Event):
+        with self._lock:
+            self._latest += 1
+            self._entries.append(Change(
+                self._latest, op, event.id, event.to_dict() if op != 'delete' else None,
+                datetime.now(timezone.utc)
+            ))
+            # The service bumps its version right after its listeners ran
+            self._expected_version = self.event_service.version + 1
+
+    def _check_gaps(self):
+        """Forget the retained changes if the service changed without telling us"""
+        with self._lock:
+            version = self.event_service.version
+            if version > self._expected_version:
+                self._entries.clear()
+                self._floor = self._latest
+                self._expected_version = version
+
+    def since(self, seq: int, limit: Optional[int] = None) -> List[Change]:
+        """
+        Changes with a sequence number greater than `seq`, oldest first
+
+        Raises ResyncRequired if some of them were discarded (or `seq` was
+        never issued, e.g. it comes from before a restart).
+        """
+        self._check_gaps()
+        with self._lock:
+            oldest = self._entries[0].seq if self._entries else self._latest + 1
+            if seq < self._floor or seq < oldest - 1 or seq > self._latest:
+                raise ResyncRequired(self._latest)
+            start = seq - oldest + 1
+            stop = len(self._entries) if limit is None else min(len(self._entries), start + limit)
+            return [self._entries[index] for index in range(start, stop)]
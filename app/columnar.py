@@ -0,0 +1,185 @@
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from .models import Event, to_micros
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the stats endpoint is disabled without it
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+def to_datetime64(dt: datetime):
+    """Convert a datetime to numpy datetime64[us]"""
+    return np.datetime64(to_micros(dt), 'us')
+
+
+class ColumnarEventStore:
+    """Columnar mirror of event times for vectorized analytics.
+
+    Start and end times are held in `datetime64[us]` arrays and recurrence
+    as small integer codes, with an id -> row map. Appends grow the arrays
+    geometrically, updates overwrite the row in place and deletes leave a
+    tombstone that is compacted away once tombstones make up half the rows.
+    The store subscribes to the event service, so it stays in sync on writes.
+
+    Requires numpy.
+    """
+
+    def __init__(self, event_service=None, initial_capacity: int = 1024):
+        if np is None:
+            raise RuntimeError("ColumnarEventStore requires numpy")
+        self._lock = threading.Lock()
+        self._starts = np.empty(initial_capacity, dtype='datetime64[us]')
+        self._ends = np.empty(initial_capacity, dtype='datetime64[us]')
+        self._recurrence = np.zeros(initial_capacity, dtype=np.int16)
+        self._alive = np.zeros(initial_capacity, dtype=bool)
+        self._ids: List[Optional[str]] = []
+        self._row_of: Dict[str, int] = {}
+        self._size = 0
+        self._tombstones = 0
+        self.recurrence_codes: Dict[Optional[str], int] = {None: 0, 'daily': 1, 'weekly': 2, 'monthly': 3}
+
+        if event_service is not None:
+            self.extend(event_service.get_all_events(sort_by_time=False))
+            event_service.add_listener(self._on_event_change)
+
+    def __len__(self) -> int:
+        return self._size - self._tombstones
+
+    def _code_for(self, recurrence: Optional[str]) -> int:
+        code = self.recurrence_codes.get(recurrence)
+        if code is None:
+            code = self.recurrence_codes[recurrence] = len(self.recurrence_codes)
+        return code
+
+    def _reserve(self, capacity: int):
+        """Grow the columns (doubling) so they hold at least `capacity` rows"""
+        if capacity <= len(self._starts):
+            return
+        new_capacity = max(capacity, 2 * len(self._starts))
+        for name in ('_starts', '_ends', '_recurrence', '_alive'):
+            column = getattr(self, name)
+            grown = np.zeros(new_capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def _write_row(self, row: int, event: Event):
+        self._starts[row] = to_datetime64(event.start_time)
+        self._ends[row] = to_datetime64(event.end_time)
+        self._recurrence[row] = self._code_for(event.recurrence)
+        self._alive[row] = True
+
+    def extend(self, events: List[Event]):
+        """Bulk-append events with one vectorized write per column"""
+        events = [event for event in events if event.id not in self._row_of]
+        with self._lock:
+            start = self._size
+            self._reserve(start + len(events))
+            end = start + len(events)
+            self._starts[start:end] = np.fromiter(
+                (to_micros(event.start_time) for event in events), dtype=np.int64, count=len(events)
+            ).view('datetime64[us]')
+            self._ends[start:end] = np.fromiter(
+                (to_micros(event.end_time) for event in events), dtype=np.int64, count=len(events)
+            ).view('datetime64[us]')
+            self._recurrence[start:end] = np.fromiter(
+                (self._code_for(event.recurrence) for event in events), dtype=np.int16, count=len(events)
+            )
+            self._alive[start:end] = True
+            for offset, event in enumerate(events):
+                self._row_of[event.id] = start + offset
+                self._ids.append(event.id)
+            self._size = end
+
+    def upsert(self, event: Event):
+        """Add an event or overwrite its row in place"""
+        with self._lock:
+            row = self._row_of.get(event.id)
+            if row is None:
+                self._reserve(self._size + 1)
+                row = self._size
+                self._row_of[event.id] = row
+                self._ids.append(event.id)
+                self._size += 1
+            self._write_row(row, event)
+
+    def remove(self, event_id: str):
+        """Tombstone an event's row, compacting once half the rows are dead"""
+        with self._lock:
+            row = self._row_of.pop(event_id, None)
+            if row is None:
+                return
+            self._alive[row] = False
+            self._ids[row] = None
+            self._tombstones += 1
+            if self._tombstones * 2 >= self._size:
+                self._compact()
+
+    def _compact(self):
+        keep = np.flatnonzero(self._alive[:self._size])
+        for name in ('_starts', '_ends', '_recurrence', '_alive'):
+            column = getattr(self, name)
+            column[:len(keep)] = column[keep]
+        self._ids = [self._ids[row] for row in keep]
+        self._row_of = {event_id: row for row, event_id in enumerate(self._ids)}
+        self._size = len(keep)
+        self._tombstones = 0
+
+    def _on_event_change(self, op: str, event: Event):
+        if op == 'delete':
+            self.remove(event.id)
+        else:
+            self.upsert(event)
+
+    def stats(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              top: int = 5) -> Dict[str, Any]:
+        """
+        Aggregate events starting in [start, end) using vectorized operations
+
+        Returns per-day and per-hour-of-day counts, total scheduled minutes,
+        counts by recurrence and the `top` busiest hour-long windows.
+        """
+        with self._lock:
+            size = self._size
+            mask = self._alive[:size].copy()
+            starts = self._starts[:size]
+            ends = self._ends[:size]
+            recurrence = self._recurrence[:size]
+            if start is not None:
+                mask &= starts >= to_datetime64(start)
+            if end is not None:
+                mask &= starts < to_datetime64(end)
+            starts, ends, recurrence = starts[mask], ends[mask], recurrence[mask]
+            code_names = {code: name for name, code in self.recurrence_codes.items()}
+
+        days = starts.astype('datetime64[D]')
+        day_values, day_counts = np.unique(days, return_counts=True)
+        hours_of_day = ((starts - days) // np.timedelta64(1, 'h')).astype(np.int64)
+        hour_counts = np.bincount(hours_of_day, minlength=24)
+        scheduled = (ends - starts).sum()
+
+        hour_buckets, bucket_counts = np.unique(starts.astype('datetime64[h]'), return_counts=True)
+        busiest = np.argsort(-bucket_counts, kind='stable')[:top]
+
+        recurrence_counts = np.bincount(recurrence.astype(np.int64), minlength=len(code_names))
+
+        return {
+            'total_events': int(mask.sum()),
+            'total_scheduled_minutes': int(scheduled // np.timedelta64(1, 'm')),
+            'per_day': {str(day): int(count) for day, count in zip(day_values, day_counts)},
+            'per_hour': {hour: int(count) for hour, count in enumerate(hour_counts)},
+            'by_recurrence': {
+                code_names[code] or 'none': int(count)
+                for code, count in enumerate(recurrence_counts) if count
+            },
+            'busiest_windows': [
+                {
+                    'start': str(hour_buckets[index].astype('datetime64[s]')),
+                    'end': str((hour_buckets[index] + np.timedelta64(1, 'h')).astype('datetime64[s]')),
+                    'events': int(bucket_counts[index])
+                }
+                for index in busiest
+            ]
+        }
@@ -0,0 +1,375 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from .models import Event
+from .utils import Occurrence
+
+Reminder = Dict[str, Any]
+
+SINK_TYPES = ('stdout', 'webhook', 'file')
+
+
+def reminder_payload(event: Event, occurrence: Occurrence, message: str) -> Reminder:
+    """The JSON-ready reminder handed to sinks"""
+    return {
+        'event_id': event.id,
+        'title': event.title,
+        'description': event.description,
+        'occurrence_start': occurrence.start.isoformat(),
+        'occurrence_end': occurrence.end.isoformat(),
+        'message': message,
+        'fired_at': datetime.now(timezone.utc).isoformat()
+    }
+
+
+class PermanentDeliveryError(Exception):
+    """Raised by a sink when retrying cannot help (e.g. the webhook rejected the request)"""
+
+
+class ReminderSink:
+    """Base class for reminder destinations.
+
+    `deliver()` receives up to `batch_size` reminders at once and raises on
+    failure; the pipeline retries the whole batch. `max_workers` caps the
+    threads delivering to the sink concurrently (None: as many as the
+    pipeline runs per sink).
+    """
+
+    name = 'sink'
+    batch_size = 1
+    max_workers: Optional[int] = None
+
+    def deliver(self, reminders: List[Reminder]):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class StdoutSink(ReminderSink):
+    """Print reminders to the console, as the scheduler always has"""
+
+    name = 'stdout'
+    batch_size = 100
+    max_workers = 1
+
+    def deliver(self, reminders: List[Reminder]):
+        lines = []
+        for reminder in reminders:
+            start = datetime.fromisoformat(reminder['occurrence_start'])
+            end = datetime.fromisoformat(reminder['occurrence_end'])
+            lines.append(f"\n🔔 {reminder['message']}")
+            lines.append(f"   📅 {start.strftime('%Y-%m-%d %H:%M')}")
+            lines.append(f"   📝 {reminder['description']}")
+            lines.append(f"   ⏰ Duration: {(end - start).total_seconds() / 60:.0f} minutes")
+        print('\n'.join(lines), flush=True)
+
+
+class WebhookSink(ReminderSink):
+    """POST batches of reminders as `{"reminders": [...]}` to a URL.
+
+    Connection errors, timeouts, 429 and 5xx responses are retried; other
+    4xx responses are permanent failures.
+    """
+
+    name = 'webhook'
+
+    def __init__(self, url: str, timeout: float = 5.0, batch_size: int = 50,
+                 headers: Optional[Dict[str, str]] = None):
+        self.url = url
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.headers = {'Content-Type': 'application/json', **(headers or {})}
+
+    def deliver(self, reminders: List[Reminder]):
+        body = json.dumps({'reminders': reminders}, separators=(',', ':')).encode()
+        request = urllib.request.Request(self.url, data=body, headers=self.headers, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            if 400 <= e.code < 500 and e.code != 429:
+                raise PermanentDeliveryError(f"Webhook rejected reminders: HTTP {e.code}") from e
+            raise
+
+
+class FileSink(ReminderSink):
+    """Append reminders to a local NDJSON file, one line each, for another process to consume"""
+
+    name = 'file'
+    batch_size = 500
+    max_workers = 1
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+
+    def deliver(self, reminders: List[Reminder]):
+        lines = ''.join(json.dumps(reminder, separators=(',', ':')) + '\n' for reminder in reminders)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+
+class _Completion:
+    """Calls `callback(delivered)` once every sink is finished with a reminder.
+
+    `delivered` tells whether at least one sink delivered it.
+    """
+
+    def __init__(self, remaining: int, callback: Callable[[bool], None]):
+        self.remaining = remaining
+        self.callback = callback
+        self.delivered = False
+        self.lock = threading.Lock()
+
+    def done(self, delivered: bool):
+        with self.lock:
+            self.remaining -= 1
+            self.delivered = self.delivered or delivered
+            finished = self.remaining == 0
+        if finished:
+            try:
+                self.callback(self.delivered)
+            except Exception as e:
+                print(f"Error in reminder completion callback: {e}")
+
+
+# A queued reminder and what to tell once its sink is finished with it
+Job = Tuple[Reminder, Optional[_Completion]]
+
+
+class _SinkChannel:
+    """A sink's bounded queue, its worker threads and counters"""
+
+    def __init__(self, sink: ReminderSink, queue_size: int):
+        self.sink = sink
+        self.queue: 'queue.Queue[Job]' = queue.Queue(maxsize=queue_size)
+        self.threads: List[threading.Thread] = []
+        self.lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.delivered = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self.in_flight = 0
+        self.last_error: Optional[str] = None
+        self.last_latency: Optional[float] = None
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'queued': self.queue.qsize(),
+                'capacity': self.queue.maxsize,
+                'in_flight': self.in_flight,
+                'workers': len(self.threads),
+                'enqueued': self.enqueued,
+                'delivered': self.delivered,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'retries': self.retries,
+                'batches': self.batches,
+                'last_error': self.last_error,
+                'last_latency_seconds': self.last_latency
+            }
+
+
+class DeliveryPipeline:
+    """Delivers reminders to sinks on background workers, off the scheduler thread.
+
+    `submit()` only puts the reminder on each sink's bounded queue and
+    returns, so a slow or failing sink never delays scheduling. When a
+    sink's queue is full the reminder is dropped for that sink and counted,
+    rather than blocking the scheduler. Each sink has its own workers
+    (`workers`, capped by the sink's `max_workers`), which take up to
+    `batch_size` queued reminders at once, waiting at most `batch_wait`
+    seconds to fill a batch, and retry failed batches with exponential
+    backoff and jitter up to `max_retries` times.
+
+    `stop()` lets the workers deliver what is already queued, for at most
+    `timeout` seconds. A reminder submitted with `on_done` reports back
+    once every sink has delivered it or given up on it (failed after its
+    retries, or dropped), as `on_done(delivered)`: True if at least one
+    sink delivered it, False if none did. One still queued when the
+    process exits never reports back.
+    """
+
+    def __init__(self, sinks: Sequence[ReminderSink], queue_size: int = 1000, workers: int = 2,
+                 max_retries: int = 5, backoff: float = 0.5, max_backoff: float = 30.0,
+                 batch_wait: float = 0.05):
+        self.sinks = list(sinks)
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.batch_wait = batch_wait
+        self._channels = [_SinkChannel(sink, queue_size) for sink in self.sinks]
+        self._stopping = threading.Event()
+        self.running = False
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._stopping.clear()
+        for channel in self._channels:
+            count = self.workers if channel.sink.max_workers is None else min(self.workers, channel.sink.max_workers)
+            channel.threads = [
+                threading.Thread(target=self._work, args=(channel,), name=f"reminder-{channel.sink.name}-{index}", daemon=True)
+                for index in range(max(1, count))
+            ]
+            for thread in channel.threads:
+                thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Deliver what is queued (for at most `timeout` seconds), then stop the workers"""
+        if not self.running:
+            return
+        self._stopping.set()
+        deadline = time.monotonic() + timeout
+        for channel in self._channels:
+            for thread in channel.threads:
+                thread.join(max(0.0, deadline - time.monotonic()))
+            channel.sink.close()
+        self.running = False
+
+    def submit(self, reminder: Reminder, on_done: Optional[Callable[[bool], None]] = None) -> bool:
+        """Queue a reminder for every sink without blocking; False if any sink's queue was full"""
+        completion = None
+        if on_done is not None:
+            completion = _Completion(len(self._channels), on_done)
+            if not self._channels:
+                on_done(False)
+        accepted = True
+        for channel in self._channels:
+            try:
+                channel.queue.put_nowait((reminder, completion))
+            except queue.Full:
+                with channel.lock:
+                    channel.dropped += 1
+                accepted = False
+                if completion is not None:
+                    completion.done(False)
+            else:
+                with channel.lock:
+                    channel.enqueued += 1
+        return accepted
+
+    def _next_batch(self, channel: _SinkChannel) -> List[Job]:
+        """Block for one reminder, then gather more for up to `batch_wait` seconds"""
+        while True:
+            try:
+                batch = [channel.queue.get(timeout=0.1)]
+                break
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return []
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < channel.sink.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(channel.queue.get(timeout=remaining) if remaining > 0 else channel.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self, channel: _SinkChannel):
+        while True:
+            batch = self._next_batch(channel)
+            if not batch:
+                return
+            with channel.lock:
+                channel.in_flight += len(batch)
+            delivered = False
+            try:
+                delivered = self._deliver(channel, [reminder for reminder, _ in batch])
+            finally:
+                with channel.lock:
+                    channel.in_flight -= len(batch)
+                for _, completion in batch:
+                    if completion is not None:
+                        completion.done(delivered)
+
+    def _deliver(self, channel: _SinkChannel, batch: List[Reminder]) -> bool:
+        """Deliver a batch, retrying as configured; False once the sink gave up on it"""
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                channel.sink.deliver(batch)
+            except Exception as e:
+                retry = not isinstance(e, PermanentDeliveryError) and attempt < self.max_retries
+                with channel.lock:
+                    channel.last_error = f"{type(e).__name__}: {e}"
+                    if retry:
+                        channel.retries += 1
+                    else:
+                        channel.failed += len(batch)
+                if not retry:
+                    print(f"Error delivering {len(batch)} reminder(s) to {channel.sink.name}: {e}")
+                    return False
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                attempt += 1
+                # Jitter keeps workers from retrying in lockstep; stop() cuts the wait
+                # short and leaves one last attempt
+                if self._stopping.wait(random.uniform(delay / 2, delay)):
+                    attempt = max(attempt, self.max_retries)
+                continue
+            with channel.lock:
+                channel.delivered += len(batch)
+                channel.batches += 1
+                channel.last_latency = time.monotonic() - started
+            return True
+
+    def stats(self) -> dict:
+        """Backpressure and delivery counters per sink"""
+        return {
+            'running': self.running,
+            'sinks': {channel.sink.name: channel.stats() for channel in self._channels}
+        }
+
+
+def create_sinks(config: Dict[str, Any]) -> List[ReminderSink]:
+    """Build the sinks listed in `REMINDER_SINKS` from the config"""
+    sinks: List[ReminderSink] = []
+    for name in config.get('REMINDER_SINKS', ('stdout',)):
+        if name == 'stdout':
+            sinks.append(StdoutSink())
+        elif name == 'webhook':
+            url = config.get('REMINDER_WEBHOOK_URL')
+            if not url:
+                raise ValueError("The webhook reminder sink needs REMINDER_WEBHOOK_URL")
+            sinks.append(WebhookSink(
+                url,
+                timeout=config.get('REMINDER_WEBHOOK_TIMEOUT', 5.0),
+                batch_size=config.get('REMINDER_BATCH_SIZE', 50)
+            ))
+        elif name == 'file':
+            path = config.get('REMINDER_FILE')
+            if not path:
+                raise ValueError("The file reminder sink needs REMINDER_FILE")
+            sinks.append(FileSink(path))
+        else:
+            raise ValueError(f"Unknown reminder sink: {name}. Valid sinks: {', '.join(SINK_TYPES)}")
+    return sinks
+
+
+def create_delivery(config: Dict[str, Any]) -> DeliveryPipeline:
+    """Build the reminder delivery pipeline from the config"""
+    return DeliveryPipeline(
+        create_sinks(config),
+        queue_size=config.get('REMINDER_QUEUE_SIZE', 1000),
+        workers=config.get('REMINDER_WORKERS', 2),
+        max_retries=config.get('REMINDER_MAX_RETRIES', 5),
+        backoff=config.get('REMINDER_RETRY_BACKOFF', 0.5)
+    )
@@ -0,0 +1,396 @@
+import math
+import random
+import re
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from operator import attrgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r'\w+')
+
+# Title tokens count more than description tokens when ranking
+TITLE_WEIGHT = 2
+
+
+class StartTimeIndex:
+    """Event ids ordered by (start time, id), maintained incrementally with bisect.
+
+    Start times and ids live in two parallel lists so range lookups can bisect
+    directly on the datetimes. Ties on start time are ordered by id, which
+    makes (start time, id) a unique key that pages can resume from. Range
+    queries cost O(log n + k).
+    """
+
+    def __init__(self, entries: Iterable[Tuple[datetime, str]] = ()):
+        pairs = sorted(entries)
+        self._starts: List[datetime] = [start for start, _ in pairs]
+        self._ids: List[str] = [event_id for _, event_id in pairs]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ids)
+
+    def _position(self, start: datetime, event_id: str) -> int:
+        """Index of the first entry not less than (start, event_id)"""
+        lo = bisect_left(self._starts, start)
+        hi = bisect_right(self._starts, start, lo=lo)
+        return bisect_left(self._ids, event_id, lo, hi)
+
+    def add(self, start: datetime, event_id: str):
+        """Insert an id; ties on start time are ordered by id"""
+        position = self._position(start, event_id)
+        self._starts.insert(position, start)
+        self._ids.insert(position, event_id)
+
+    def remove(self, start: datetime, event_id: str):
+        """Remove an id previously added with the same start time"""
+        position = self._position(start, event_id)
+        if position == len(self._ids) or self._ids[position] != event_id:
+            raise ValueError(f"{event_id} is not indexed at {start}")
+        del self._starts[position]
+        del self._ids[position]
+
+    def range(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              include_end: bool = True) -> List[str]:
+        """Ids whose start time lies in [start, end] (or [start, end) without include_end)"""
+        lo = bisect_left(self._starts, start) if start is not None else 0
+        if end is None:
+            hi = len(self._starts)
+        elif include_end:
+            hi = bisect_right(self._starts, end, lo=lo)
+        else:
+            hi = bisect_left(self._starts, end, lo=lo)
+        return self._ids[lo:hi]
+
+    def scan(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             after: Optional[Tuple[datetime, str]] = None) -> Iterator[str]:
+        """Lazily yield ids with start time in [start, end], beginning strictly after the key `after`
+
+        Seeking to `after` is a bisect, so resuming a scan costs O(log n)
+        no matter how far into the index it is.
+        """
+        lo = bisect_left(self._starts, start) if start is not None else 0
+        if after is not None:
+            after_start, after_id = after
+            position = self._position(after_start, after_id)
+            if position < len(self._ids) and self._starts[position] == after_start \
+                    and self._ids[position] == after_id:
+                position += 1
+            lo = max(lo, position)
+        hi = bisect_right(self._starts, end) if end is not None else len(self._starts)
+        for position in range(lo, hi):
+            yield self._ids[position]
+
+    def count(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+        """Number of ids whose start time lies in [start, end], without copying them"""
+        lo = bisect_left(self._starts, start) if start is not None else 0
+        hi = bisect_right(self._starts, end, lo=lo) if end is not None else len(self._starts)
+        return hi - lo
+
+
+class _IntervalNode:
+    __slots__ = ('key', 'start', 'end', 'event_id', 'priority', 'max_end', 'left', 'right')
+
+    def __init__(self, start: datetime, end: datetime, event_id: str):
+        self.key = (start, event_id)
+        self.start = start
+        self.end = end
+        self.event_id = event_id
+        self.priority = random.random()
+        self.max_end = end
+        self.left: Optional['_IntervalNode'] = None
+        self.right: Optional['_IntervalNode'] = None
+
+    def update(self):
+        max_end = self.end
+        if self.left is not None and self.left.max_end > max_end:
+            max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > max_end:
+            max_end = self.right.max_end
+        self.max_end = max_end
+
+
+class IntervalTree:
+    """Dynamic interval index over (start, end) event times.
+
+    A treap ordered by (start, id) where every node also stores the latest end
+    time in its subtree. Inserts and removals are O(log n) expected, and an
+    overlap query prunes every subtree that ends before the window or starts
+    after it, so it costs O(log n + k).
+
+    Initial entries are bulk-loaded: sorted once and built into a perfectly
+    balanced tree in O(n), instead of n separate inserts.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[datetime, datetime, str]] = ()):
+        nodes = [_IntervalNode(start, end, event_id) for start, end, event_id in entries]
+        nodes.sort(key=attrgetter('key'))
+        self._size = len(nodes)
+        self._root = self._build(nodes, 0, len(nodes))
+        self._assign_priorities()
+
+    @classmethod
+    def _build(cls, nodes: List[_IntervalNode], lo: int, hi: int) -> Optional[_IntervalNode]:
+        """Balanced subtree over the sorted nodes[lo:hi]"""
+        if lo >= hi:
+            return None
+        middle = (lo + hi) // 2
+        node = nodes[middle]
+        node.left = cls._build(nodes, lo, middle)
+        node.right = cls._build(nodes, middle + 1, hi)
+        node.update()
+        return node
+
+    def _assign_priorities(self):
+        """Give a bulk-built tree random priorities that satisfy the heap order
+
+        Sorted random values are handed out in breadth-first order, so every
+        node outranks its children and later inserts rotate as in any treap.
+        """
+        priorities = sorted((random.random() for _ in range(self._size)), reverse=True)
+        level = [self._root] if self._root is not None else []
+        index = 0
+        while level:
+            next_level = []
+            for node in level:
+                node.priority = priorities[index]
+                index += 1
+                if node.left is not None:
+                    next_level.append(node.left)
+                if node.right is not None:
+                    next_level.append(node.right)
+            level = next_level
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _rotate_right(node: _IntervalNode) -> _IntervalNode:
+        child = node.left
+        node.left = child.right
+        child.right = node
+        node.update()
+        child.update()
+        return child
+
+    @staticmethod
+    def _rotate_left(node: _IntervalNode) -> _IntervalNode:
+        child = node.right
+        node.right = child.left
+        child.left = node
+        node.update()
+        child.update()
+        return child
+
+    def add(self, start: datetime, end: datetime, event_id: str):
+        """Insert the interval [start, end) for an event"""
+        self._root = self._insert(self._root, _IntervalNode(start, end, event_id))
+        self._size += 1
+
+    def _insert(self, node: Optional[_IntervalNode], new: _IntervalNode) -> _IntervalNode:
+        if node is None:
+            return new
+        if new.key < node.key:
+            node.left = self._insert(node.left, new)
+            if node.left.priority > node.priority:
+                return self._rotate_right(node)
+        else:
+            node.right = self._insert(node.right, new)
+            if node.right.priority > node.priority:
+                return self._rotate_left(node)
+        node.update()
+        return node
+
+    def remove(self, start: datetime, event_id: str):
+        """Remove the interval previously added for an event with this start time"""
+        self._root = self._delete(self._root, (start, event_id))
+        self._size -= 1
+
+    def _delete(self, node: Optional[_IntervalNode], key: Tuple[datetime, str]) -> Optional[_IntervalNode]:
+        if node is None:
+            raise KeyError(key[1])
+        if key < node.key:
+            node.left = self._delete(node.left, key)
+        elif key > node.key:
+            node.right = self._delete(node.right, key)
+        else:
+            if node.left is None:
+                return node.right
+            if node.right is None:
+                return node.left
+            # Rotate the higher-priority child up, then keep sinking the node
+            if node.left.priority > node.right.priority:
+                node = self._rotate_right(node)
+                node.right = self._delete(node.right, key)
+            else:
+                node = self._rotate_left(node)
+                node.left = self._delete(node.left, key)
+        node.update()
+        return node
+
+    def overlapping(self, start: datetime, end: datetime) -> List[str]:
+        """Ids of intervals overlapping [start, end), ordered by start time.
+
+        Intervals that merely touch the window (ending exactly at `start`)
+        do not count as overlapping.
+        """
+        result: List[str] = []
+        stack: List[_IntervalNode] = []
+        node = self._root
+        # In-order walk that skips subtrees which cannot overlap the window
+        while stack or node is not None:
+            while node is not None and node.max_end > start:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.start >= end:
+                break
+            if node.end > start:
+                result.append(node.event_id)
+            node = node.right
+        return result
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+# Text search semantics, shared by every event service backend: each query
+# term must be the prefix of a word in the title or description, and
+# relevance is TF-IDF over those prefix matches (see InvertedIndex)
+
+def text_weights(title: str, description: str) -> Dict[str, int]:
+    """Token -> weight of an event's text, title tokens counting TITLE_WEIGHT"""
+    weights: Dict[str, int] = {}
+    for token in tokenize(title):
+        weights[token] = weights.get(token, 0) + TITLE_WEIGHT
+    for token in tokenize(description):
+        weights[token] = weights.get(token, 0) + 1
+    return weights
+
+
+def prefix_weight(term: str, weights: Dict[str, int]) -> int:
+    """Total weight of the tokens starting with `term` (0: no match)"""
+    return sum(weight for token, weight in weights.items() if token.startswith(term))
+
+
+def matches_terms(terms: Iterable[str], title: str, description: str) -> bool:
+    """Whether every term is the prefix of a word in the title or description"""
+    tokens = tokenize(f"{title}\n{description}")
+    return all(any(token.startswith(term) for token in tokens) for term in terms)
+
+
+def inverse_document_frequency(total: int, matching: int) -> float:
+    """IDF of a term found in `matching` of `total` events"""
+    return math.log(1 + total / matching)
+
+
+def relevance(idfs: Dict[str, float], title: str, description: str) -> float:
+    """TF-IDF score of an event for the query terms in `idfs` (term -> IDF)"""
+    weights = text_weights(title, description)
+    return sum(prefix_weight(term, weights) * idf for term, idf in idfs.items())
+
+
+class InvertedIndex:
+    """Token -> event id postings over event titles and descriptions.
+
+    Every query term is treated as a prefix: the sorted vocabulary is bisected
+    to find the tokens it expands to, and only their postings are read.
+    Multiple terms are ANDed by intersecting posting sets, smallest first, so
+    a search costs time proportional to the matching postings rather than
+    the total amount of text.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._vocabulary: List[str] = []
+        # Event id -> its distinct tokens, for removal
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def add(self, event_id: str, title: str, description: str):
+        """Index an event's title and description"""
+        for token in self._add_terms(event_id, title, description):
+            insort(self._vocabulary, token)
+
+    def add_many(self, documents: Iterable[Tuple[str, str, str]]):
+        """Index many (event id, title, description) at once, sorting the vocabulary a single time"""
+        new_tokens = False
+        for event_id, title, description in documents:
+            if self._add_terms(event_id, title, description):
+                new_tokens = True
+        if new_tokens:
+            self._vocabulary = sorted(self._postings)
+
+    def _add_terms(self, event_id: str, title: str, description: str) -> List[str]:
+        """Record an event's postings, returning tokens that are new to the vocabulary"""
+        terms = text_weights(title, description)
+        self._doc_terms[event_id] = tuple(terms)
+        new_tokens = []
+        for token, weight in terms.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                new_tokens.append(token)
+            posting[event_id] = weight
+        return new_tokens
+
+    def remove(self, event_id: str):
+        """Drop an event from every posting list it appears in"""
+        for token in self._doc_terms.pop(event_id, ()):
+            posting = self._postings[token]
+            del posting[event_id]
+            if not posting:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def _expand(self, term: str) -> List[str]:
+        """Vocabulary tokens starting with `term`"""
+        lo = bisect_left(self._vocabulary, term)
+        hi = lo
+        while hi < len(self._vocabulary) and self._vocabulary[hi].startswith(term):
+            hi += 1
+        return self._vocabulary[lo:hi]
+
+    def _term_matches(self, term: str) -> Dict[str, int]:
+        """Event id -> weight for every token matching the prefix `term`"""
+        tokens = self._expand(term)
+        if len(tokens) == 1:
+            return self._postings[tokens[0]]
+        matches: Dict[str, int] = {}
+        for token in tokens:
+            for event_id, weight in self._postings[token].items():
+                matches[event_id] = matches.get(event_id, 0) + weight
+        return matches
+
+    def search(self, query: str) -> Set[str]:
+        """Ids of events matching every term of `query`"""
+        return set(self.score(query))
+
+    def score(self, query: str) -> Dict[str, float]:
+        """Ids of events matching every term of `query`, with a TF-IDF relevance score"""
+        terms = set(tokenize(query))
+        if not terms:
+            return {}
+
+        per_term = sorted((self._term_matches(term) for term in terms), key=len)
+        if not per_term[0]:
+            return {}
+
+        total = len(self._doc_terms)
+        scores: Dict[str, float] = {}
+        for event_id in per_term[0]:
+            if all(event_id in matches for matches in per_term[1:]):
+                scores[event_id] = 0.0
+        for matches in per_term:
+            idf = inverse_document_frequency(total, len(matches))
+            for event_id in scores:
+                scores[event_id] += matches[event_id] * idf
+        return scores
@@ -0,0 +1,181 @@
+import heapq
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from .storage import file_stat
+
+# (event id, occurrence start, minutes before the start the reminder fires)
+ReminderKey = Tuple[str, datetime, int]
+
+PENDING = 'pending'
+DONE = 'done'
+
+
+class ReminderLedger:
+    """Record of the reminders that have fired, so none fires twice.
+
+    A reminder is claimed (`claim()`, 'pending') before it is handed to
+    delivery and marked 'done' once a sink has delivered it; claims left
+    pending by a crash, or by a delivery every sink dropped or gave up on,
+    are offered again through `pending()`. Entries
+    are only needed until their occurrence starts, because no reminder
+    fires after that: a min-heap ordered by occurrence start lets `prune()`
+    drop exactly the expired entries, oldest first, whatever happened to
+    their events.
+
+    With a `path` every claim and completion is appended to the file as a
+    JSON line (fsync'ed if `fsync`), so the ledger survives restarts; the
+    file is rewritten with only the live entries once most of its lines are
+    stale. Only one process may write a shared file (claim, complete, prune,
+    compact): the reminder leader, holding its lock. Another process taking
+    over reminders (failover) calls `refresh()` to pick up what the previous
+    one appended. Without a path the ledger lives in memory only.
+    """
+
+    def __init__(self, path: Optional[str] = None, fsync: bool = True, compact_threshold: int = 1000):
+        self.path = path
+        self.fsync = fsync
+        self.compact_threshold = compact_threshold
+        self._entries: Dict[ReminderKey, str] = {}
+        self._expiry: List[Tuple[datetime, ReminderKey]] = []
+        self._lock = threading.RLock()
+        self._lines = 0
+        self._stat = None
+        if path is not None:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: ReminderKey) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    @staticmethod
+    def _encode(state: str, key: ReminderKey) -> str:
+        event_id, start, offset = key
+        return json.dumps([state, event_id, start.isoformat(), offset], separators=(',', ':')) + '\n'
+
+    def _apply(self, state: str, key: ReminderKey):
+        if key not in self._entries:
+            heapq.heappush(self._expiry, (key[1], key))
+        # A completion is final, whatever order the lines arrive in
+        if self._entries.get(key) != DONE:
+            self._entries[key] = state
+
+    def _read_from(self, offset: int):
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Torn write from a crash; the writer appends after it
+                    break
+                try:
+                    state, event_id, start, minutes = json.loads(line)
+                    key = (event_id, datetime.fromisoformat(start), minutes)
+                except (ValueError, TypeError):
+                    continue
+                self._apply(state, key)
+                self._lines += 1
+
+    def _load(self):
+        self._entries.clear()
+        self._expiry.clear()
+        self._lines = 0
+        if os.path.exists(self.path):
+            self._read_from(0)
+        self._stat = file_stat(self.path)
+
+    def refresh(self) -> bool:
+        """Pick up lines another process appended or a rewrite; True if anything changed"""
+        if self.path is None:
+            return False
+        with self._lock:
+            stat = file_stat(self.path)
+            if stat == self._stat:
+                return False
+            if stat is None or self._stat is None or stat[0] != self._stat[0] or stat[1] < self._stat[1]:
+                self._load()
+            else:
+                self._read_from(self._stat[1])
+                self._stat = stat
+            return True
+
+    def _append(self, state: str, key: ReminderKey):
+        if self.path is None:
+            return
+        line = self._encode(state, key).encode()
+        with open(self.path, 'a+b') as f:
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    # End a line torn by a crash, so readers skip it rather than this one
+                    line = b'\n' + line
+            f.write(line)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._lines += 1
+        self._stat = file_stat(self.path)
+
+    def claim(self, key: ReminderKey) -> bool:
+        """Record that the reminder is being fired; False if it already was"""
+        with self._lock:
+            self.refresh()
+            if key in self._entries:
+                return False
+            self._append(PENDING, key)
+            self._apply(PENDING, key)
+            return True
+
+    def complete(self, key: ReminderKey):
+        """Record that a claimed reminder was delivered, or has nothing left to deliver"""
+        with self._lock:
+            if self._entries.get(key) != PENDING:
+                return
+            self._append(DONE, key)
+            self._apply(DONE, key)
+
+    def pending(self) -> List[ReminderKey]:
+        """Claimed reminders not delivered yet, oldest first"""
+        with self._lock:
+            self.refresh()
+            return sorted((key for key, state in self._entries.items() if state == PENDING), key=lambda key: key[1])
+
+    def prune(self, now: datetime) -> int:
+        """Forget the entries whose occurrence started before `now`; returns how many"""
+        with self._lock:
+            pruned = 0
+            while self._expiry and self._expiry[0][0] < now:
+                _, key = heapq.heappop(self._expiry)
+                if self._entries.pop(key, None) is not None:
+                    pruned += 1
+            if self.path is not None and self._lines - len(self._entries) > max(self.compact_threshold, len(self._entries)):
+                self.compact()
+            return pruned
+
+    def compact(self):
+        """Rewrite the file with one line per live entry"""
+        if self.path is None:
+            return
+        with self._lock:
+            self.refresh()
+            # Unique per call, so two rewrites never share a temporary file
+            fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(self.path)}.",
+                                            suffix='.tmp', dir=os.path.dirname(os.path.abspath(self.path)))
+            try:
+                with open(fd, 'w', encoding='utf-8') as f:
+                    for key, state in self._entries.items():
+                        f.write(self._encode(state, key))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            self._lines = len(self._entries)
+            self._stat = file_stat(self.path)
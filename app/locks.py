@@ -0,0 +1,150 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; cross-process locking is disabled there
+    fcntl = None
+
+FILE_LOCKS_AVAILABLE = fcntl is not None
+
+
+class ReadWriteLock:
+    """Many concurrent readers or one writer, with writers given priority.
+
+    Once a writer is waiting, new readers queue behind it, so a steady
+    stream of reads cannot starve writes. Both sides are reentrant: a
+    thread may nest read locks, nest write locks, or read while it holds
+    the write lock. Upgrading a held read lock to a write lock is refused,
+    since two threads doing it at once would deadlock.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._write_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    def acquire_read(self):
+        local = self._local
+        depth = getattr(local, 'depth', 0)
+        if depth == 0:
+            if self._writer == threading.get_ident():
+                # Reading under our own write lock
+                local.counted = False
+            else:
+                with self._condition:
+                    while self._writer is not None or self._waiting_writers:
+                        self._condition.wait()
+                    self._readers += 1
+                local.counted = True
+        local.depth = depth + 1
+
+    def release_read(self):
+        local = self._local
+        local.depth -= 1
+        if local.depth == 0 and local.counted:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if getattr(self._local, 'depth', 0) and self._local.counted:
+                raise RuntimeError("Cannot upgrade a read lock to a write lock")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self):
+        with self._condition:
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer = None
+                self._condition.notify_all()
+
+    @contextmanager
+    def read_locked(self) -> Iterator[None]:
+        """Hold a shared read lock for the duration of a with-block"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self) -> Iterator[None]:
+        """Hold the exclusive write lock for the duration of a with-block"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class FileLock:
+    """Exclusive advisory lock on a file, shared between processes.
+
+    Built on flock(), so it coordinates processes on one host (not over
+    network filesystems). It is reentrant and usable from several threads:
+    threads of one process queue on an in-process lock, and the process
+    holds the flock while any of them is inside. Separate FileLock objects
+    on the same path exclude each other just like separate processes.
+
+    Requires fcntl (POSIX).
+    """
+
+    def __init__(self, path: str):
+        if fcntl is None:
+            raise RuntimeError("FileLock requires fcntl")
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        """Whether this process currently holds the lock"""
+        return self._depth > 0
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock; without `blocking`, return False instead of waiting"""
+        if not self._lock.acquire(blocking):
+            return False
+        if self._depth == 0:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._lock.release()
+                return False
+        self._depth += 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
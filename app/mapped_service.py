@@ -0,0 +1,393 @@
+import heapq
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from .binary_snapshot import Entry, MappedJournalStorage, SnapshotReader, write_snapshot
+from .models import Event, recurrence_code, to_micros
+from .services import UNSET, EventServiceBase, _read_locked, parse_filter_date
+from .indexes import inverse_document_frequency, matches_terms, relevance, tokenize
+from .locks import FileLock, ReadWriteLock
+from .storage import JournalStorage, Operation
+from .utils import RECURRENCE_RULES
+
+
+def _event_key(event: Event) -> Tuple[int, str]:
+    return (event._start_us, event.id)
+
+
+def _entry(event: Event) -> Entry:
+    return (event._start_us, event.id, event._end_us, event._created_us, event._zones, event.recurrence,
+            event.title, event.description)
+
+
+def _entry_event(entry: Entry) -> Event:
+    start_us, event_id, end_us, created_us, zones, recurrence, title, description = entry
+    return Event._restore(event_id, title, description, start_us, end_us, created_us, zones,
+                          recurrence_code(recurrence))
+
+
+class MappedView:
+    """A mapped snapshot plus an in-memory overlay of the changes made since it was written.
+
+    The overlay maps event ids to their current event, or to None for an
+    event deleted from the base. Base rows of every overlaid id are hidden,
+    so a query reads the visible base rows and the overlay and merges them
+    in (start_time, id) order.
+    """
+
+    def __init__(self, base: SnapshotReader, changes: Dict[str, Optional[Event]]):
+        self.base = base
+        self.overlay: Dict[str, Optional[Event]] = {}
+        self.hidden: Set[int] = set()
+        self._sorted: Optional[List[Event]] = None
+        for event_id, event in changes.items():
+            self.put(event_id, event)
+
+    def __len__(self) -> int:
+        return len(self.base) - len(self.hidden) + len(self.overlay_events())
+
+    def put(self, event_id: str, event: Optional[Event]):
+        """Overlay the new state of an event (None once deleted)"""
+        row = self.base.row_for_id(event_id)
+        if row is not None:
+            self.hidden.add(row)
+            self.overlay[event_id] = event
+        elif event is None:
+            self.overlay.pop(event_id, None)
+        else:
+            self.overlay[event_id] = event
+        self._sorted = None
+
+    def get(self, event_id: str) -> Optional[Event]:
+        if event_id in self.overlay:
+            return self.overlay[event_id]
+        row = self.base.row_for_id(event_id)
+        return None if row is None else self.base.event(row)
+
+    def overlay_events(self) -> List[Event]:
+        """Live overlay events ordered by (start_time, id)"""
+        if self._sorted is None:
+            self._sorted = sorted((event for event in self.overlay.values() if event is not None), key=_event_key)
+        return self._sorted
+
+    def merge(self, rows: Iterable[int], overlay: Iterable[Event]) -> Iterator[Event]:
+        """Events of the visible base `rows` (ascending) merged with `overlay` (sorted)"""
+        base, hidden = self.base, self.hidden
+        base_events = (base.event(row) for row in rows if row not in hidden)
+        return heapq.merge(base_events, overlay, key=_event_key)
+
+    def entries(self) -> Iterator[Entry]:
+        """Every visible event as an Entry tuple, ordered by (start_time, id)"""
+        base, hidden = self.base, self.hidden
+        base_entries = (base.entry(row) for row in range(len(base)) if row not in hidden)
+        return heapq.merge(base_entries, [_entry(event) for event in self.overlay_events()])
+
+
+def diff_views(old: MappedView, new: MappedView) -> List[Tuple[str, Event]]:
+    """(op, event) pairs turning the events of `old` into those of `new`"""
+    changes: List[Tuple[str, Event]] = []
+    removed: Dict[str, Entry] = {}
+    added: Dict[str, Entry] = {}
+    old_entries, new_entries = old.entries(), new.entries()
+    a, b = next(old_entries, None), next(new_entries, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a[:2] < b[:2]):
+            removed[a[1]] = a
+            a = next(old_entries, None)
+        elif a is None or b[:2] < a[:2]:
+            added[b[1]] = b
+            b = next(new_entries, None)
+        else:
+            if a != b:
+                changes.append(('update', _entry_event(b)))
+            a, b = next(old_entries, None), next(new_entries, None)
+    # An event whose start time changed shows up on both sides
+    for event_id, entry in added.items():
+        changes.append(('create' if removed.pop(event_id, None) is None else 'update', _entry_event(entry)))
+    changes.extend(('delete', _entry_event(entry)) for entry in removed.values())
+    return changes
+
+
+class MappedEventService(EventServiceBase):
+    """EventService over a memory-mapped binary snapshot shared by worker processes.
+
+    Exposes the same interface as `EventService`. Instead of parsing every
+    event into Python objects, each worker maps the snapshot read-only
+    (see `SnapshotReader`), so startup costs one mmap() and the pages are
+    shared through the OS page cache; events are built only for the rows a
+    query returns. Writes go to a journal next to the snapshot and into a
+    small in-memory overlay; once the journal holds `compact_threshold`
+    records, base and overlay are written into a new snapshot, which is
+    mapped in place of the old one. The write sequence, listeners and
+    caches come from `EventServiceBase`.
+
+    Text search matches every term as the prefix of a word of the title
+    or description, like the other backends. With `shared=True` writes hold
+    `<snapshot_file>.lock` and catch up with other workers first, and
+    `refresh()` picks up their writes (see EventService).
+    """
+
+    def __init__(self, snapshot_file: str, json_file: str = None, occurrence_horizon_days: int = 30,
+                 query_cache_size: int = 256, compact_threshold: int = 10000, fsync: bool = True,
+                 shared: bool = False, changelog_size: int = 10000):
+        super().__init__()
+        self.snapshot_file = snapshot_file
+        os.makedirs(os.path.dirname(os.path.abspath(snapshot_file)), exist_ok=True)
+        self.storage = MappedJournalStorage(snapshot_file, compact_threshold=compact_threshold, fsync=fsync)
+        self.storage.bind(self._snapshot_events)
+        self._lock = ReadWriteLock()
+        self._commit_lock = threading.RLock()
+        self._file_lock = FileLock(f"{snapshot_file}.lock") if shared else None
+        with self._file_lock or nullcontext():
+            if not os.path.exists(snapshot_file):
+                self.import_json(json_file)
+            self._view = self._open_view()
+            self._signature = self.storage.signature()
+
+        self._init_caches(occurrence_horizon_days, query_cache_size, changelog_size)
+
+    def import_json(self, json_file: Optional[str]) -> int:
+        """Write the snapshot from an `events.json` file (and its journal), or empty without one"""
+        records = JournalStorage(json_file).iter_records() if json_file else ()
+        return write_snapshot(self.snapshot_file, records)
+
+    def _open_view(self) -> MappedView:
+        base, changes = self.storage.open_snapshot()
+        self._snapshots = self.storage.snapshots
+        return MappedView(base, {
+            event_id: None if record is None else Event.from_stored(record)
+            for event_id, record in changes.items()
+        })
+
+    def _snapshot_events(self) -> Iterator[Event]:
+        """Every event in (start_time, id) order, for compaction"""
+        with self._lock.read_locked():
+            view = self._view
+        return view.merge(range(len(view.base)), view.overlay_events())
+
+    def _remap_if_compacted(self):
+        """Map the new snapshot after this process compacted the journal into it"""
+        if self.storage.snapshots != self._snapshots:
+            with self._lock.write_locked():
+                self._view = self._open_view()
+
+    @property
+    @_read_locked
+    def events(self) -> List[Event]:
+        """All events, ordered by (start_time, id)"""
+        view = self._view
+        return list(view.merge(range(len(view.base)), view.overlay_events()))
+
+    @contextmanager
+    def _writing(self):
+        """Hold the commit lock for a write (and in shared mode the file lock, see EventService)"""
+        with self._commit_lock, self._file_lock or nullcontext():
+            if self._file_lock is not None:
+                self._sync_locked()
+            try:
+                yield
+            finally:
+                self._remap_if_compacted()
+                if self._file_lock is not None:
+                    self._signature = self.storage.signature()
+
+    def refresh(self) -> bool:
+        """
+        Pick up writes other processes made to the shared snapshot or journal
+
+        A no-op unless the service is shared. New journal entries are
+        applied to the overlay; when another process compacted, the new
+        snapshot is mapped and compared with the old view to notify
+        listeners. Returns whether anything changed.
+        """
+        if self._file_lock is None or self.storage.signature() == self._signature:
+            return False
+        with self._commit_lock, self._file_lock:
+            return self._sync_locked()
+
+    def _sync_locked(self) -> bool:
+        """Apply external changes (caller holds the commit and file locks)"""
+        signature = self.storage.signature()
+        if signature == self._signature:
+            return False
+        operations = self.storage.read_changes()
+        if operations is None:
+            with self._lock.write_locked():
+                old, self._view = self._view, self._open_view()
+                changes = diff_views(old, self._view)
+        else:
+            changes = self._apply_operations(operations)
+        self._signature = signature
+        for op, event in changes:
+            self._notify(op, event)
+        return True
+
+    def _apply_operations(self, operations: List[Operation]) -> List[Tuple[str, Event]]:
+        """Apply journaled operations to the overlay, returning (op, event) pairs to notify"""
+        changes = []
+        with self._lock.write_locked():
+            for op, event_id, data in operations:
+                current = self._view.get(event_id)
+                if data is None:
+                    self._view.put(event_id, None)
+                    if current is not None:
+                        changes.append(('delete', current))
+                else:
+                    event = Event.from_stored(data)
+                    self._view.put(event_id, event)
+                    changes.append(('create' if current is None else 'update', event))
+        return changes
+
+    def close(self):
+        """Compact any journaled writes into the snapshot and close the journal"""
+        with self._writing():
+            self.storage.close()
+
+    def _mutating(self):
+        return self._lock.write_locked()
+
+    def _put(self, event: Event, previous: Optional[Event] = None):
+        self._view.put(event.id, event)
+
+    def _remove(self, event: Event):
+        self._view.put(event.id, None)
+
+    def get_all_events(self, sort_by_time: bool = True) -> List[Event]:
+        """Get all events (always in start-time order: rows are stored that way)"""
+        return self.events
+
+    @_read_locked
+    def get_event_by_id(self, event_id: str) -> Optional[Event]:
+        """Get event by ID"""
+        return self._view.get(event_id)
+
+    def _select(self, query: str = None, start_date: str = None, end_date: str = None,
+                recurrence: Optional[str] = UNSET,
+                after: Optional[Tuple[datetime, str]] = None) -> Tuple[Iterable[int], List[Event]]:
+        """Base rows (ascending, before hiding) and overlay events matching the search filters"""
+        view = self._view
+        base = view.base
+        terms = tokenize(query or '')
+        start_datetime = parse_filter_date(start_date)
+        end_datetime = parse_filter_date(end_date)
+        start_us = None if start_datetime is None else to_micros(start_datetime)
+        end_us = None if end_datetime is None else to_micros(end_datetime)
+        after_key = None if after is None else (to_micros(after[0]), after[1])
+
+        lo = 0 if start_us is None else base.lower_bound(start_us)
+        if after_key is not None:
+            lo = max(lo, base.position_after(*after_key))
+        # An event ending by end_date also starts before it
+        hi = len(base) if end_us is None else base.lower_bound(end_us)
+        if terms:
+            matching = set.intersection(*(base.text_rows(term) for term in terms))
+            rows: Iterable[int] = sorted(row for row in matching if lo <= row < hi)
+        else:
+            rows = range(lo, hi)
+        if end_us is not None:
+            ends = base.ends
+            rows = (row for row in rows if ends[row] <= end_us)
+        if recurrence is not UNSET:
+            rows = (row for row in rows if base.recurrence_at(row) == recurrence)
+
+        def matches(event: Event) -> bool:
+            if start_us is not None and event._start_us < start_us:
+                return False
+            if end_us is not None and event._end_us > end_us:
+                return False
+            if after_key is not None and _event_key(event) <= after_key:
+                return False
+            if recurrence is not UNSET and event.recurrence != recurrence:
+                return False
+            return matches_terms(terms, event.title, event.description)
+
+        return rows, [event for event in view.overlay_events() if matches(event)]
+
+    @_read_locked
+    def _search_events(self, query: str = None, start_date: str = None,
+                      end_date: str = None, recurrence: Optional[str] = UNSET,
+                      order_by: str = 'start_time') -> List[Event]:
+        rows, overlay = self._select(query, start_date, end_date, recurrence)
+        events = list(self._view.merge(rows, overlay))
+        terms = tokenize(query or '')
+        if order_by == 'relevance' and terms:
+            idfs = self._idfs(terms)
+            # Stable sort keeps start-time order among equal scores
+            events.sort(key=lambda e: relevance(idfs, e.title, e.description), reverse=True)
+        return events
+
+    def _idfs(self, terms: List[str]) -> Dict[str, float]:
+        """IDF of every query term over all visible events, for relevance ordering"""
+        view = self._view
+        total = len(view)
+        idfs = {}
+        for term in set(terms):
+            matching = len(view.base.text_rows(term) - view.hidden) + sum(
+                1 for event in view.overlay_events() if matches_terms((term,), event.title, event.description)
+            )
+            idfs[term] = inverse_document_frequency(total, max(matching, 1))
+        return idfs
+
+    @_read_locked
+    def get_events_page(self, limit: int, after: Optional[Tuple[datetime, str]] = None,
+                        query: str = None, start_date: str = None, end_date: str = None,
+                        recurrence: Optional[str] = UNSET) -> List[Event]:
+        """Get up to `limit` events ordered by (start_time, id), seeking past `after` by bisection"""
+        rows, overlay = self._select(query, start_date, end_date, recurrence, after)
+        return list(islice(self._view.merge(rows, overlay), limit))
+
+    @_read_locked
+    def count_events(self, query: str = None, start_date: str = None, end_date: str = None,
+                     recurrence: Optional[str] = UNSET) -> int:
+        """Count events matching the same filters as search_events, without building them"""
+        rows, overlay = self._select(query, start_date, end_date, recurrence)
+        hidden = self._view.hidden
+        if isinstance(rows, range):
+            return len(rows) - sum(1 for row in hidden if row in rows) + len(overlay)
+        return sum(1 for row in rows if row not in hidden) + len(overlay)
+
+    @_read_locked
+    def find_conflicts(self, start: datetime, end: datetime, exclude_id: str = None) -> List[Event]:
+        """Get events overlapping [start, end), ordered by start time"""
+        view = self._view
+        base = view.base
+        start_us, end_us = to_micros(start), to_micros(end)
+        # No event lasts longer than max_duration, so none starting earlier can overlap
+        rows = range(base.lower_bound(start_us - base.max_duration), base.lower_bound(end_us))
+        ends = base.ends
+        overlay = [
+            event for event in view.overlay_events()
+            if event._start_us < end_us and event._end_us > start_us
+        ]
+        return [
+            event for event in view.merge((row for row in rows if ends[row] > start_us), overlay)
+            if event.id != exclude_id
+        ]
+
+    @_read_locked
+    def get_recurring_events(self, before: datetime = None) -> List[Event]:
+        """Get events with a recurrence rule, optionally only those whose series starts before `before`"""
+        view = self._view
+        base = view.base
+        before_us = None if before is None else to_micros(before)
+        starts = base.starts
+        rows = (
+            row for row in base.recurring
+            if base.recurrence_at(row) in RECURRENCE_RULES and (before_us is None or starts[row] < before_us)
+        )
+        overlay = [
+            event for event in view.overlay_events()
+            if event.recurrence in RECURRENCE_RULES and (before_us is None or event._start_us < before_us)
+        ]
+        return list(view.merge(rows, overlay))
+
+    @_read_locked
+    def _get_events_by_date_range(self, start_date: datetime, end_date: datetime) -> List[Event]:
+        view = self._view
+        start_us, end_us = to_micros(start_date), to_micros(end_date)
+        rows = range(view.base.lower_bound(start_us), view.base.upper_bound(end_us))
+        overlay = [event for event in view.overlay_events() if start_us <= event._start_us <= end_us]
+        return list(view.merge(rows, overlay))
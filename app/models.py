@@ -1,13 +1,100 @@
-from datetime import datetime
-from typing import Dict, Any, Optional
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Union
 import uuid
 
+def normalize_datetime(dt: datetime) -> datetime:
+    """
+    Convert an aware datetime to naive local time
+    
+    Stored events, query windows and the scheduler's clock (datetime.now())
+    are all naive local time. A single aware value among them would make
+    comparisons, and with them index inserts, raise TypeError.
+    """
+    if dt.tzinfo is None:
+        return dt
+    return dt.astimezone().replace(tzinfo=None)
+
+def parse_datetime(dt_string: str) -> datetime:
+    """Parse datetime string in ISO format (times with an offset become naive local time)"""
+    if not isinstance(dt_string, str):
+        raise ValueError(f"Invalid datetime: {dt_string!r}. Use ISO format (YYYY-MM-DDTHH:MM:SS)")
+    try:
+        return normalize_datetime(datetime.fromisoformat(dt_string.replace('Z', '+00:00')))
+    except ValueError:
+        raise ValueError(f"Invalid datetime format: {dt_string}. Use ISO format (YYYY-MM-DDTHH:MM:SS)")
+
+def validate_text(field: str, value: Any) -> str:
+    """Return `value` if it is a string, else raise ValueError naming the field"""
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be a string")
+    return value
+
+# Fields of Event.to_dict, in serialization order
+EVENT_FIELDS = ('id', 'title', 'description', 'start_time', 'end_time', 'recurrence', 'created_at')
+
+# Recurrence rules events may use (None: a one-off event)
+RECURRENCE_RULES = ('daily', 'weekly', 'monthly')
+
+# Fixed table of the known recurrence names; events store their index in it
+_RECURRENCES: List[Optional[str]] = [None, *RECURRENCE_RULES]
+_RECURRENCE_CODES: Dict[Optional[str], int] = {name: code for code, name in enumerate(_RECURRENCES)}
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def validate_recurrence(recurrence: Optional[str]) -> Optional[str]:
+    """Return `recurrence` if it is None or a string, else raise ValueError"""
+    if recurrence is not None and not isinstance(recurrence, str):
+        raise ValueError(f"Invalid recurrence: {recurrence!r}")
+    return recurrence
+
+def recurrence_code(recurrence: Optional[str]) -> Union[int, str]:
+    """
+    What an event stores for its recurrence
+    
+    The code of a known rule in the fixed table, so every event shares one
+    name string; any other string is kept as it is (such events are never
+    expanded), without adding it to the table.
+    """
+    return _RECURRENCE_CODES.get(validate_recurrence(recurrence), recurrence)
+
+def to_micros(dt: datetime) -> int:
+    """
+    Microseconds since the epoch, the integer time key of every backend
+    
+    Like every other time, an aware value is first converted to naive local
+    time (see normalize_datetime), so it sorts with the naive keys.
+    """
+    return (normalize_datetime(dt) - _EPOCH) // _MICROSECOND
+
+def from_micros(micros: int, tzinfo=None) -> datetime:
+    """Naive datetime of a to_micros value, with `tzinfo` attached as is if given"""
+    dt = _EPOCH + timedelta(microseconds=micros)
+    return dt if tzinfo is None else dt.replace(tzinfo=tzinfo)
+
 class Event:
+    """
+    A calendar event, stored compactly
+    
+    Uses `__slots__` instead of a per-instance dict. The three timestamps are
+    integer microseconds since the epoch; `start_time`, `end_time` and
+    `created_at` build datetimes from them on access. Time zones of aware
+    datetimes are kept in one slot that stays None for naive events. The
+    recurrence is a small code into a table of interned names, so a million
+    weekly events share a single "weekly" string; names outside the table
+    are stored as plain strings. Only the JSON encoding is
+    cached, since list responses are built from it.
+    """
+    __slots__ = ('id', 'title', 'description', '_start_us', '_end_us', '_created_us',
+                 '_zones', '_recurrence', '_encoded')
+    
     def __init__(self, title: str, description: str, start_time: str, 
                  end_time: str, event_id: str = None, recurrence: str = None):
+        self._zones = None
         self.id = event_id or str(uuid.uuid4())
-        self.title = title
-        self.description = description
+        self.title = validate_text('title', title)
+        self.description = validate_text('description', description)
         self.start_time = self._parse_datetime(start_time)
         self.end_time = self._parse_datetime(end_time)
         self.recurrence = recurrence
@@ -18,13 +105,70 @@ class Event:
     
     def _parse_datetime(self, dt_string: str) -> datetime:
         """Parse datetime string in ISO format"""
-        try:
-            return datetime.fromisoformat(dt_string.replace('Z', '+00:00'))
-        except ValueError:
-            raise ValueError(f"Invalid datetime format: {dt_string}. Use ISO format (YYYY-MM-DDTHH:MM:SS)")
+        return parse_datetime(dt_string)
+    
+    def __setattr__(self, name: str, value: Any):
+        # Changing any serialized field invalidates the cached JSON
+        if name in EVENT_FIELDS:
+            object.__setattr__(self, '_encoded', None)
+        object.__setattr__(self, name, value)
+    
+    def _invalidate_serialization(self):
+        """Drop the cached JSON encoding (rebuilt on the next to_json)"""
+        object.__setattr__(self, '_encoded', None)
     
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert event to dictionary for JSON serialization"""
+    def _zone(self, index: int):
+        zones = self._zones
+        return None if zones is None else zones[index]
+    
+    def _set_zone(self, index: int, tzinfo):
+        zones = self._zones
+        if zones is None:
+            if tzinfo is None:
+                return
+            zones = (None, None, None)
+        zones = zones[:index] + (tzinfo,) + zones[index + 1:]
+        self._zones = None if zones == (None, None, None) else zones
+    
+    @property
+    def start_time(self) -> datetime:
+        return from_micros(self._start_us, self._zone(0))
+    
+    @start_time.setter
+    def start_time(self, value: datetime):
+        # Wall-clock time; a zone set directly is kept separately
+        self._start_us = to_micros(value.replace(tzinfo=None))
+        self._set_zone(0, value.tzinfo)
+    
+    @property
+    def end_time(self) -> datetime:
+        return from_micros(self._end_us, self._zone(1))
+    
+    @end_time.setter
+    def end_time(self, value: datetime):
+        self._end_us = to_micros(value.replace(tzinfo=None))
+        self._set_zone(1, value.tzinfo)
+    
+    @property
+    def created_at(self) -> datetime:
+        return from_micros(self._created_us, self._zone(2))
+    
+    @created_at.setter
+    def created_at(self, value: datetime):
+        self._created_us = to_micros(value.replace(tzinfo=None))
+        self._set_zone(2, value.tzinfo)
+    
+    @property
+    def recurrence(self) -> Optional[str]:
+        recurrence = self._recurrence
+        return _RECURRENCES[recurrence] if isinstance(recurrence, int) else recurrence
+    
+    @recurrence.setter
+    def recurrence(self, value: Optional[str]):
+        self._recurrence = recurrence_code(value)
+    
+    def _serialized_dict(self) -> Dict[str, Any]:
+        """The serialized dict, built fresh on every call"""
         return {
             'id': self.id,
             'title': self.title,
@@ -35,6 +179,20 @@ class Event:
             'created_at': self.created_at.isoformat()
         }
     
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Convert event to dictionary for JSON serialization, optionally only the given fields"""
+        data = self._serialized_dict()
+        if fields is not None:
+            return {field: data[field] for field in fields}
+        return data
+    
+    def to_json(self) -> bytes:
+        """The event's JSON encoding, cached until a field changes"""
+        encoded = self._encoded
+        if encoded is None:
+            encoded = self._encoded = json.dumps(self._serialized_dict(), separators=(',', ':')).encode('utf-8')
+        return encoded
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Event':
         """Create event from dictionary"""
@@ -50,6 +208,50 @@ class Event:
             event.created_at = datetime.fromisoformat(data['created_at'])
         return event
     
+    @classmethod
+    def from_stored(cls, data: Dict[str, Any]) -> 'Event':
+        """
+        Rebuild an event from a record the service persisted itself
+        
+        The fast path for loading: timestamps go straight through
+        datetime.fromisoformat and the slots are filled directly, skipping id
+        generation and cache invalidation. Records that do not look like
+        naive-time records the service wrote (missing fields, bad or aware
+        times) fall back to from_dict, which validates them and raises the
+        usual errors.
+        """
+        try:
+            start = datetime.fromisoformat(data['start_time'])
+            end = datetime.fromisoformat(data['end_time'])
+            created = data.get('created_at')
+            created = datetime.now() if created is None else datetime.fromisoformat(created)
+            if start.tzinfo is not None or end.tzinfo is not None or created.tzinfo is not None or start >= end:
+                return cls.from_dict(data)
+            return cls._restore(
+                data['id'], data['title'], data['description'],
+                (start - _EPOCH) // _MICROSECOND, (end - _EPOCH) // _MICROSECOND,
+                (created - _EPOCH) // _MICROSECOND, None, recurrence_code(data.get('recurrence'))
+            )
+        except (KeyError, TypeError, ValueError):
+            return cls.from_dict(data)
+    
+    @classmethod
+    def _restore(cls, event_id: str, title: str, description: str, start_us: int, end_us: int,
+                 created_us: int, zones: Optional[tuple], recurrence: Union[int, str]) -> 'Event':
+        """Fill the slots of a new event directly from already validated values"""
+        event = cls.__new__(cls)
+        set_slot = object.__setattr__
+        set_slot(event, 'id', event_id)
+        set_slot(event, 'title', title)
+        set_slot(event, 'description', description)
+        set_slot(event, '_start_us', start_us)
+        set_slot(event, '_end_us', end_us)
+        set_slot(event, '_created_us', created_us)
+        set_slot(event, '_zones', zones)
+        set_slot(event, '_recurrence', recurrence)
+        set_slot(event, '_encoded', None)
+        return event
+    
     def is_due_soon(self, minutes: int = 60) -> bool:
         """Check if event is due within specified minutes"""
         now = datetime.now()
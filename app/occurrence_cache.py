@@ -0,0 +1,200 @@
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from .models import Event
+from .utils import Occurrence, iter_occurrences
+
+OccurrenceListener = Callable[[List[Occurrence]], None]
+
+
+def week_start(moment: datetime) -> datetime:
+    """Midnight on the Monday of the week containing `moment`"""
+    today = datetime.combine(moment.date(), datetime.min.time())
+    return today - timedelta(days=today.weekday())
+
+
+class OccurrenceCache:
+    """Materialized occurrences (recurring series expanded) over a rolling horizon.
+
+    The cache covers occurrences *starting* between the Monday of the
+    current week and `horizon_days` after today, kept sorted by start time,
+    so today/week/reminder lookups are O(log n + k) slices. It subscribes to
+    the event service and re-expands only the changed event on every write.
+    When the date rolls over, `refresh()` drops the expired prefix and
+    materializes only the newly covered days.
+
+    Other components can subscribe with `add_listener` to hear about
+    occurrences as they are materialized (new events, edits, horizon moves).
+    """
+
+    def __init__(self, event_service, horizon_days: int = 30, clock: Callable[[], datetime] = datetime.now):
+        self.event_service = event_service
+        self.horizon_days = horizon_days
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._entries: List[Occurrence] = []
+        self._by_event: Dict[str, List[Occurrence]] = {}
+        self._listeners: List[OccurrenceListener] = []
+        self.window_start, self.window_end = self._window_for(self.clock())
+        self._materialize(self.window_start, self.window_end)
+        event_service.add_listener(self._on_event_change)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _window_for(self, now: datetime) -> Tuple[datetime, datetime]:
+        start = week_start(now)
+        today = datetime.combine(now.date(), datetime.min.time())
+        end = max(today + timedelta(days=self.horizon_days), start + timedelta(days=7))
+        return start, end
+
+    def add_listener(self, listener: OccurrenceListener):
+        """Register a callback receiving newly materialized occurrences"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: OccurrenceListener):
+        """Unregister a callback added with add_listener"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _publish(self, occurrences: List[Occurrence]):
+        if occurrences:
+            for listener in list(self._listeners):
+                listener(occurrences)
+
+    def _insert(self, occurrence: Occurrence):
+        insort(self._entries, occurrence)
+        insort(self._by_event.setdefault(occurrence.base_id, []), occurrence)
+
+    def _materialize(self, start: datetime, end: datetime) -> List[Occurrence]:
+        """Add every occurrence starting in [start, end) from the event service"""
+        added = [
+            occurrence for occurrence in self.event_service.get_occurrences(start, end)
+            if occurrence.start >= start
+        ]
+        with self._lock:
+            for occurrence in added:
+                self._insert(occurrence)
+        return added
+
+    def _drop_event(self, event_id: str):
+        for occurrence in self._by_event.pop(event_id, ()):
+            position = bisect_left(self._entries, occurrence)
+            del self._entries[position]
+
+    def _on_event_change(self, op: str, event: Event):
+        """Event service listener: re-expand the changed event inside the window"""
+        added = []
+        with self._lock:
+            self._drop_event(event.id)
+            if op != 'delete':
+                for occurrence in iter_occurrences(event, self.window_start, self.window_end):
+                    if occurrence.start >= self.window_start:
+                        self._insert(occurrence)
+                        added.append(occurrence)
+        self._publish(added)
+
+    def refresh(self):
+        """Slide the window forward if the date has changed since the last call"""
+        start, end = self._window_for(self.clock())
+        if start == self.window_start and end == self.window_end:
+            return
+
+        added = []
+        with self._lock:
+            if start > self.window_start:
+                expired = self._entries[:bisect_left(self._entries, (start,))]
+                del self._entries[:len(expired)]
+                for occurrence in expired:
+                    event_occurrences = self._by_event[occurrence.base_id]
+                    event_occurrences.remove(occurrence)
+                    if not event_occurrences:
+                        del self._by_event[occurrence.base_id]
+            if end > self.window_end:
+                added = self._materialize(self.window_end, end)
+            self.window_start, self.window_end = start, max(end, self.window_end)
+        self._publish(added)
+
+    def rebuild(self):
+        """Re-expand every event in the window, after changes the cache was not told about"""
+        with self._lock:
+            self._entries = []
+            self._by_event = {}
+            added = self._materialize(self.window_start, self.window_end)
+        self._publish(added)
+
+    def between(self, start: datetime, end: datetime) -> List[Occurrence]:
+        """Occurrences starting in [start, end), ordered by start time"""
+        self.refresh()
+        with self._lock:
+            if self.window_start <= start and end <= self.window_end:
+                lo = bisect_left(self._entries, (start,))
+                hi = bisect_left(self._entries, (end,), lo=lo)
+                return self._entries[lo:hi]
+        # Outside the materialized horizon: expand on the fly
+        return [
+            occurrence for occurrence in self.event_service.get_occurrences(start, end)
+            if occurrence.start >= start
+        ]
+
+    def contains(self, occurrence: Occurrence) -> bool:
+        """Whether `occurrence` is still current (its event was not moved or deleted)"""
+        with self._lock:
+            return occurrence in self._by_event.get(occurrence.base_id, ())
+
+    def next_occurrence(self, event_id: str, after: datetime) -> Optional[Occurrence]:
+        """First cached occurrence of an event starting at or after `after`"""
+        with self._lock:
+            for occurrence in self._by_event.get(event_id, ()):
+                if occurrence.start >= after:
+                    return occurrence
+        return None
+
+
+class OccurrenceQueries:
+    """Recurrence-aware today/week/reminder queries served from an OccurrenceCache.
+
+    Mixed into the event services, which must set `self.occurrence_cache`.
+    """
+
+    occurrence_cache: OccurrenceCache
+
+    def _distinct_events(self, occurrences: List[Occurrence]) -> List[Event]:
+        """Base events of `occurrences`, once each, in occurrence order"""
+        events = []
+        seen = set()
+        for occurrence in occurrences:
+            if occurrence.base_id not in seen:
+                seen.add(occurrence.base_id)
+                event = self.get_event_by_id(occurrence.base_id)
+                if event is not None:
+                    events.append(event)
+        return events
+
+    def get_today_occurrences(self) -> List[Occurrence]:
+        """Occurrences starting today"""
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+        return self.occurrence_cache.between(today, today + timedelta(days=1))
+
+    def get_week_occurrences(self) -> List[Occurrence]:
+        """Occurrences starting in the current week (Monday to Sunday)"""
+        start = week_start(datetime.now())
+        return self.occurrence_cache.between(start, start + timedelta(days=7))
+
+    def get_upcoming_occurrences(self, minutes: int = 60) -> List[Occurrence]:
+        """Occurrences starting within the next `minutes` minutes"""
+        now = datetime.now()
+        return self.occurrence_cache.between(now, now + timedelta(minutes=minutes, microseconds=1))
+
+    def get_upcoming_reminders(self, minutes: int = 60) -> List[Event]:
+        """Get events that are due within specified minutes"""
+        return self._distinct_events(self.get_upcoming_occurrences(minutes))
+
+    def get_today_events(self) -> List[Event]:
+        """Get all events scheduled for today"""
+        return self._distinct_events(self.get_today_occurrences())
+
+    def get_week_events(self) -> List[Event]:
+        """Get all events scheduled for the current week"""
+        return self._distinct_events(self.get_week_occurrences())
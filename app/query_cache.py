@@ -0,0 +1,124 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional
+from .models import Event
+from .indexes import tokenize
+
+EventPredicate = Callable[[Event], bool]
+
+
+class _CacheEntry(NamedTuple):
+    events: tuple
+    ids: frozenset
+    matches: EventPredicate
+
+
+def search_predicate(query: Optional[str], start: Optional[datetime], end: Optional[datetime],
+                     recurrence: Optional[str] = None, filter_recurrence: bool = False) -> EventPredicate:
+    """
+    Whether an event could appear in a search with these filters
+
+    `recurrence` is only checked with `filter_recurrence`, since None is
+    itself a valid filter value (non-recurring events).
+
+    Deliberately loose: text terms are checked as substrings, which covers
+    the word-prefix matching of every backend, so an affected entry is never
+    kept by mistake.
+    """
+    terms = tokenize(query or '')
+
+    def matches(event: Event) -> bool:
+        if start is not None and event.start_time < start:
+            return False
+        if end is not None and event.end_time > end:
+            return False
+        if filter_recurrence and event.recurrence != recurrence:
+            return False
+        if terms:
+            text = f"{event.title}\n{event.description}".lower()
+            return all(term in text for term in terms)
+        return True
+    return matches
+
+
+def range_predicate(start: datetime, end: datetime) -> EventPredicate:
+    """Whether an event starts inside [start, end]"""
+    return lambda event: start <= event.start_time <= end
+
+
+class QueryCache:
+    """LRU cache of query results for an event service.
+
+    Entries are keyed by normalized query parameters and hold references to
+    the resulting events (never copies), together with their ids and a
+    predicate telling which events the query could match. The cache listens
+    to the service: a write drops only the entries that contained the
+    changed event or whose predicate accepts its new state, so unrelated
+    queries stay cached across writes.
+    """
+
+    def __init__(self, event_service, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: 'OrderedDict[Hashable, _CacheEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every write, so a result computed across a write is not stored
+        self._generation = 0
+        event_service.add_listener(self._on_event_change)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(self, key: Hashable, matches: EventPredicate,
+                       compute: Callable[[], List[Event]]) -> List[Event]:
+        """Return the cached result for `key`, computing and caching it on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(entry.events)
+            self.misses += 1
+            generation = self._generation
+
+        events = compute()
+
+        with self._lock:
+            if self._generation == generation:
+                self._entries[key] = _CacheEntry(tuple(events), frozenset(event.id for event in events), matches)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return events
+
+    def _on_event_change(self, op: str, event: Event):
+        """Event service listener: drop entries the changed event could affect"""
+        with self._lock:
+            self._generation += 1
+            stale = [
+                key for key, entry in self._entries.items()
+                if event.id in entry.ids or (op != 'delete' and entry.matches(event))
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations
+            }
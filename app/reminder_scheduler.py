@@ -1,24 +1,83 @@
+import functools
+import heapq
 import threading
-import time
 from datetime import datetime, timedelta
-from typing import List
+from typing import Callable, List, Optional, Set, Tuple
+from .delivery import DeliveryPipeline, StdoutSink, reminder_payload
+from .ledger import ReminderKey, ReminderLedger
+from .locks import FileLock
+from .models import Event
 from .services import EventService
-from .utils import format_reminder_message
+from .utils import Occurrence, format_reminder_message
+
+# Called with (event, occurrence, message) for every reminder that fires
+ReminderListener = Callable[[Event, Occurrence, str], None]
 
 class ReminderScheduler:
-    def __init__(self, event_service: EventService, check_interval: int = 60):
+    def __init__(self, event_service: EventService, check_interval: int = 60,
+                 reminder_minutes: int = 60, leader_lock: Optional[FileLock] = None,
+                 refresh_interval: Optional[float] = None,
+                 delivery: Optional[DeliveryPipeline] = None,
+                 ledger: Optional[ReminderLedger] = None):
         """
         Initialize the reminder scheduler
         
+        Reminders are kept in a min-heap keyed by fire time (occurrence start
+        minus `reminder_minutes`). The heap is fed from the event service's
+        occurrence cache, so every occurrence of a recurring event gets its
+        own reminder. The scheduler thread sleeps until the earliest one is
+        due and is woken early whenever the cache materializes new
+        occurrences, so idle cost does not depend on the number of events.
+        
+        Fired reminders are handed to a delivery pipeline, whose workers
+        print or send them; the scheduler thread never waits on a sink.
+        
         Args:
             event_service: EventService instance
-            check_interval: Check interval in seconds (default: 60 seconds)
+            check_interval: Longest the thread sleeps without re-checking the
+                clock, in seconds (default: 60 seconds). Guards against wall
+                clock adjustments and rolls the occurrence cache forward; no
+                events are scanned on these wake-ups.
+            reminder_minutes: How long before an occurrence its reminder fires
+            leader_lock: When several processes share the data, the lock that
+                elects the one process that delivers reminders. The others keep
+                trying to take it every check_interval, so one of them takes
+                over if the leader exits. Listeners (add_listener) are called
+                in every process, since they serve that process's clients.
+            refresh_interval: If set, pick up other processes' writes
+                (`event_service.refresh()`) at least this often, in seconds
+            delivery: Pipeline that delivers reminders to their sinks, started
+                and stopped with the scheduler (default: print to stdout)
+            ledger: Record of fired reminders. Give it a file shared by the
+                processes so a restart or a new leader neither repeats nor
+                loses reminders (default: in memory only)
         """
         self.event_service = event_service
         self.check_interval = check_interval
+        self.reminder_minutes = reminder_minutes
+        self.leader_lock = leader_lock
+        self.refresh_interval = refresh_interval
+        self.delivery = delivery if delivery is not None else DeliveryPipeline([StdoutSink()])
         self.running = False
         self.thread = None
-        self.last_checked_events = set()  # Track events we've already reminded about
+        self.ledger = ledger if ledger is not None else ReminderLedger()
+        # Reminders already passed to this process's listeners
+        self._announced = ReminderLedger()
+        self._condition = threading.Condition()
+        # Claimed reminders no sink delivered, retried on the next pass
+        self._failed: Set[ReminderKey] = set()
+        self._heap: List[Tuple[datetime, int, Occurrence]] = []  # (fire_time, sequence, occurrence)
+        self._sequence = 0
+        self._listeners: List[ReminderListener] = []
+    
+    def add_listener(self, listener: ReminderListener):
+        """Register a callback for fired reminders (e.g. the stream broker)"""
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: ReminderListener):
+        """Unregister a callback added with add_listener"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
     
     def start(self):
         """Start the reminder scheduler in a background thread"""
@@ -26,66 +85,173 @@ class ReminderScheduler:
             return
         
         self.running = True
+        self.delivery.start()
+        cache = self.event_service.occurrence_cache
+        cache.add_listener(self._on_occurrences)
+        self._on_occurrences(cache.between(datetime.now(), cache.window_end))
+        if self.is_leader:
+            self._resume_pending()
         self.thread = threading.Thread(target=self._run, daemon=True)
         self.thread.start()
-        print(f"Reminder scheduler started. Checking every {self.check_interval} seconds.")
+        print(f"Reminder scheduler started. Reminding {self.reminder_minutes} minutes before each event.")
     
     def stop(self):
         """Stop the reminder scheduler"""
-        self.running = False
+        self.event_service.occurrence_cache.remove_listener(self._on_occurrences)
+        with self._condition:
+            self.running = False
+            self._condition.notify()
         if self.thread:
             self.thread.join()
+        self.delivery.stop()
+        if self.leader_lock is not None and self.leader_lock.held:
+            self.leader_lock.release()
         print("Reminder scheduler stopped.")
     
+    def _on_occurrences(self, occurrences: List[Occurrence]):
+        """Occurrence cache listener: queue reminders for new occurrences and wake the thread"""
+        now = datetime.now()
+        with self._condition:
+            for occurrence in occurrences:
+                if occurrence.start >= now:
+                    fire_time = occurrence.start - timedelta(minutes=self.reminder_minutes)
+                    self._sequence += 1
+                    heapq.heappush(self._heap, (fire_time, self._sequence, occurrence))
+            self._condition.notify()
+    
+    def _seconds_until_next(self) -> Optional[float]:
+        """Seconds until the earliest queued reminder, or None if the heap is empty"""
+        if not self._heap:
+            return None
+        return (self._heap[0][0] - datetime.now()).total_seconds()
+    
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process fires reminders (always, without a leader lock)"""
+        return self.leader_lock is None or self.leader_lock.held
+    
     def _run(self):
-        """Main loop for checking reminders"""
+        """Main loop: sleep until the next reminder is due or new occurrences arrive"""
         while self.running:
             try:
+                if not self.is_leader and self.leader_lock.acquire(blocking=False):
+                    # Taking over: deliver what the previous leader claimed but never finished
+                    self._resume_pending()
+                elif self.is_leader:
+                    self._retry_failed()
+                if self.refresh_interval is not None:
+                    self.event_service.refresh()
+                self.event_service.occurrence_cache.refresh()
+                with self._condition:
+                    delay = self._seconds_until_next()
+                    # Followers without listeners have nothing to fire
+                    fires = self.is_leader or bool(self._listeners)
+                    interval = self.check_interval
+                    if self.refresh_interval is not None:
+                        interval = min(interval, self.refresh_interval)
+                    if delay is None or delay > 0 or not fires:
+                        timeout = interval if delay is None or not fires else min(delay, interval)
+                        self._condition.wait(timeout)
+                        continue
                 self._check_reminders()
-                time.sleep(self.check_interval)
             except Exception as e:
                 print(f"Error in reminder scheduler: {e}")
-                time.sleep(self.check_interval)
+                with self._condition:
+                    self._condition.wait(self.check_interval)
     
-    def _check_reminders(self):
-        """Check for upcoming events and display reminders"""
-        upcoming_events = self.event_service.get_upcoming_reminders(minutes=60)
-        current_time = datetime.now()
-        
-        for event in upcoming_events:
-            # Only show reminder if we haven't shown it recently
-            if event.id not in self.last_checked_events:
-                time_until = (event.start_time - current_time).total_seconds() / 60
-                
-                if 0 <= time_until <= 60: 
-                    message = format_reminder_message(event)
-                    print(f"\n🔔 {message}")
-                    print(f"   📅 {event.start_time.strftime('%Y-%m-%d %H:%M')}")
-                    print(f"   📝 {event.description}")
-                    print(f"   ⏰ Duration: {(event.end_time - event.start_time).total_seconds() / 60:.0f} minutes")
-                    
-                    # Mark this event as checked
-                    self.last_checked_events.add(event.id)
-        
-        # Clean up old events from tracking (events that have passed)
-        self._cleanup_old_events()
+    def _pop_due(self) -> List[Occurrence]:
+        """Pop every reminder whose fire time has passed, skipping stale heap entries"""
+        due = []
+        now = datetime.now()
+        cache = self.event_service.occurrence_cache
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                _, _, occurrence = heapq.heappop(self._heap)
+                # Entries for moved or deleted events stay in the heap and are dropped here
+                if cache.contains(occurrence):
+                    due.append(occurrence)
+        return due
+    
+    def _deliver(self, key: ReminderKey, event: Event, occurrence: Occurrence, message: str):
+        """Hand a claimed reminder to the delivery pipeline; the ledger entry completes once it is delivered"""
+        reminder = reminder_payload(event, occurrence, message)
+        # Stable across redeliveries, so receivers can drop a repeat after a crash
+        reminder['reminder_id'] = f"{event.id}:{occurrence.start.isoformat()}:{key[2]}"
+        # Only queued here; slow sinks cannot hold up later reminders
+        self.delivery.submit(reminder, on_done=functools.partial(self._on_delivered, key))
+    
+    def _on_delivered(self, key: ReminderKey, delivered: bool):
+        """Delivery callback: complete the ledger entry, or keep it pending for a retry"""
+        if delivered:
+            self.ledger.complete(key)
+            return
+        with self._condition:
+            self._failed.add(key)
     
-    def _cleanup_old_events(self):
-        """Remove events that have already passed from tracking"""
+    def _retry_failed(self):
+        """Redeliver the reminders every sink dropped or gave up on, until their occurrence starts"""
+        with self._condition:
+            if not self._failed:
+                return
+            failed, self._failed = self._failed, set()
+        self._resume_pending(failed)
+    
+    def _resume_pending(self, keys: Optional[Set[ReminderKey]] = None):
+        """Redeliver pending reminders (those in `keys`, or all): claimed before a crash or failover, or never delivered"""
+        now = datetime.now()
+        self.ledger.prune(now)
+        cache = self.event_service.occurrence_cache
+        for key in self.ledger.pending():
+            if keys is not None and key not in keys:
+                continue
+            event_id, start, _ = key
+            event = self.event_service.get_event_by_id(event_id)
+            occurrence = cache.next_occurrence(event_id, start) if event else None
+            if occurrence is None or occurrence.start != start:
+                # The event was deleted or moved meanwhile; nothing left to deliver
+                self.ledger.complete(key)
+                continue
+            self._deliver(key, event, occurrence, format_reminder_message(event, start))
+    
+    def _check_reminders(self):
+        """Fire reminders that are due"""
         current_time = datetime.now()
-        events_to_remove = set()
         
-        for event_id in self.last_checked_events:
-            event = self.event_service.get_event_by_id(event_id)
-            if event and event.start_time < current_time:
-                events_to_remove.add(event_id)
+        for occurrence in self._pop_due():
+            event = self.event_service.get_event_by_id(occurrence.base_id)
+            time_until = (occurrence.start - current_time).total_seconds() / 60
+            if not event or not 0 <= time_until <= self.reminder_minutes:
+                continue
+            
+            key = (occurrence.base_id, occurrence.start, self.reminder_minutes)
+            message = format_reminder_message(event, occurrence.start)
+            # The ledger claim is what keeps a reminder from firing twice, across restarts too
+            if self.is_leader and self.ledger.claim(key):
+                self._deliver(key, event, occurrence, message)
+            if self._listeners and self._announced.claim(key):
+                for listener in list(self._listeners):
+                    try:
+                        listener(event, occurrence, message)
+                    except Exception as e:
+                        print(f"Error in reminder listener: {e}")
         
-        self.last_checked_events -= events_to_remove
+        # Forget reminders whose occurrences have started, oldest first. Only the
+        # leader writes the shared ledger: a follower rewriting it could lose a claim
+        if self.is_leader:
+            self.ledger.prune(current_time)
+        self._announced.prune(current_time)
     
     def get_status(self) -> dict:
         """Get the current status of the scheduler"""
+        with self._condition:
+            next_reminder = self._heap[0][0].isoformat() if self._heap else None
+            pending = len(self._heap)
         return {
             'running': self.running,
+            'leader': self.is_leader,
             'check_interval': self.check_interval,
-            'tracked_events': len(self.last_checked_events)
-        } 
\ No newline at end of file
+            'tracked_events': len(self.ledger),
+            'pending_reminders': pending,
+            'next_reminder_at': next_reminder,
+            'delivery': self.delivery.stats()
+        }
@@ -1,33 +1,302 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_restful import Api, Resource
-from .services import EventService
+from werkzeug.http import http_date, quote_etag
+from .models import EVENT_FIELDS, Event, parse_datetime
+from .services import BatchValidationError, EventService, EventConflictError
+from .sqlite_service import SQLiteEventService
+from .mapped_service import MappedEventService
+from .storage import WriteBehindStorage, create_storage
+from .locks import FileLock
+from .changelog import ResyncRequired
+from .broker import Broker, MESSAGE_TYPES
+from .delivery import create_delivery
+from .ledger import ReminderLedger
+from .columnar import ColumnarEventStore, NUMPY_AVAILABLE
+from .streaming import (
+    JSON_MIMETYPE, NDJSON_MIMETYPE, json_envelope, json_response, ndjson_lines, streaming_response
+)
+from .utils import decode_cursor, encode_cursor, format_reminder_message
 from .reminder_scheduler import ReminderScheduler
 from datetime import datetime, timedelta
+from itertools import islice
+from urllib.parse import urlencode
+import atexit
+import functools
+import hashlib
+import json
+import time
 
 def create_app(config_object):
     app = Flask(__name__)
     app.config.from_object(config_object)
     
     # Initialize services
-    event_service = EventService(app.config['DATA_FILE'])
+    multi_process = app.config.get('MULTI_PROCESS', False)
+    if app.config.get('EVENT_BACKEND') == 'sqlite':
+        event_service = SQLiteEventService(
+            app.config['SQLITE_DATABASE'],
+            json_file=app.config['DATA_FILE'],
+            occurrence_horizon_days=app.config.get('OCCURRENCE_HORIZON_DAYS', 30),
+            query_cache_size=app.config.get('QUERY_CACHE_SIZE', 256),
+            changelog_size=app.config.get('CHANGELOG_SIZE', 10000)
+        )
+        shared_file = app.config['SQLITE_DATABASE']
+    elif app.config.get('EVENT_BACKEND') == 'mmap':
+        event_service = MappedEventService(
+            app.config['BINARY_SNAPSHOT'],
+            json_file=app.config['DATA_FILE'],
+            occurrence_horizon_days=app.config.get('OCCURRENCE_HORIZON_DAYS', 30),
+            query_cache_size=app.config.get('QUERY_CACHE_SIZE', 256),
+            compact_threshold=app.config.get('MMAP_COMPACT_THRESHOLD', 10000),
+            fsync=app.config.get('JOURNAL_FSYNC', True),
+            shared=multi_process,
+            changelog_size=app.config.get('CHANGELOG_SIZE', 10000)
+        )
+        shared_file = app.config['BINARY_SNAPSHOT']
+    else:
+        storage = create_storage(app.config, app.config['DATA_FILE'])
+        if multi_process and isinstance(storage, WriteBehindStorage):
+            raise ValueError("MULTI_PROCESS requires DURABILITY = 'sync'")
+        event_service = EventService(
+            app.config['DATA_FILE'],
+            storage=storage,
+            occurrence_horizon_days=app.config.get('OCCURRENCE_HORIZON_DAYS', 30),
+            query_cache_size=app.config.get('QUERY_CACHE_SIZE', 256),
+            shared=multi_process,
+            changelog_size=app.config.get('CHANGELOG_SIZE', 10000)
+        )
+        shared_file = app.config['DATA_FILE']
+        if isinstance(storage, WriteBehindStorage):
+            # Flush queued writes on a clean interpreter shutdown
+            atexit.register(event_service.close)
     
-    # Initialize reminder scheduler
-    reminder_scheduler = ReminderScheduler(event_service)
+    # Columnar mirror for /api/stats (optional, needs numpy)
+    stats_store = None
+    stats_unavailable = 'Statistics require numpy to be installed'
+    if isinstance(event_service, MappedEventService):
+        # The mirror would hold every event in each worker, which the mapped snapshot avoids
+        stats_unavailable = 'Statistics are not available with the mmap backend'
+    elif app.config.get('COLUMNAR_STATS', True) and NUMPY_AVAILABLE:
+        stats_store = ColumnarEventStore(event_service)
+    
+    # Initialize reminder scheduler; sinks (stdout, webhook, file) get reminders from its delivery workers
+    delivery = create_delivery(app.config)
+    # Fired reminders are recorded next to the data, so restarts and failovers do not repeat them
+    ledger = ReminderLedger(
+        app.config.get('REMINDER_LEDGER_FILE') or f"{shared_file}.reminders",
+        fsync=app.config.get('JOURNAL_FSYNC', True)
+    )
+    if multi_process:
+        # Only the worker holding the leader lock fires reminders
+        reminder_scheduler = ReminderScheduler(
+            event_service,
+            leader_lock=FileLock(f"{shared_file}.leader"),
+            refresh_interval=app.config.get('CHANGE_POLL_INTERVAL', 1.0),
+            delivery=delivery,
+            ledger=ledger
+        )
+        
+        @app.before_request
+        def pick_up_external_writes():
+            # One stat() per request unless another worker has written
+            event_service.refresh()
+    else:
+        reminder_scheduler = ReminderScheduler(event_service, delivery=delivery, ledger=ledger)
+    
+    # Fan-out of changes and fired reminders to GET /api/stream subscribers
+    broker = Broker(
+        event_service,
+        max_queued=app.config.get('STREAM_QUEUE_SIZE', 1000),
+        replay_size=app.config.get('STREAM_REPLAY_SIZE', 1000),
+        max_subscribers=app.config.get('STREAM_MAX_SUBSCRIBERS', 500)
+    )
     
     # Start the reminder scheduler
     reminder_scheduler.start()
     
     api = Api(app)
     
+    def parse_fields():
+        """Read the optional comma-separated `fields` projection"""
+        fields = request.args.get('fields')
+        if not fields:
+            return None
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in EVENT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Valid fields: {', '.join(EVENT_FIELDS)}")
+        return fields
+    
+    def wants_ndjson():
+        """Whether the client explicitly accepts newline-delimited JSON"""
+        return any(mimetype == NDJSON_MIMETYPE for mimetype, _ in request.accept_mimetypes)
+    
+    def wants_stream():
+        """Whether the client asked for a streamed body (?stream=true or an NDJSON Accept header)"""
+        return wants_ndjson() or request.args.get('stream', '').lower() == 'true'
+    
+    def event_encoder(fields=None):
+        """Encode events from their cached JSON, or as a projection of `fields`"""
+        if fields is None:
+            return Event.to_json
+        return lambda event: json.dumps(event.to_dict(fields), separators=(',', ':'))
+    
+    def stream_items(items, head, encode=None):
+        """Stream `items` as NDJSON, or inside the usual JSON envelope after the `head` fields"""
+        encode_args = {'encode': encode} if encode else {}
+        if wants_ndjson():
+            pieces, mimetype = ndjson_lines(items, **encode_args), NDJSON_MIMETYPE
+        else:
+            pieces, mimetype = json_envelope(items, head, **encode_args), JSON_MIMETYPE
+        return streaming_response(
+            pieces,
+            mimetype,
+            gzip=app.config.get('STREAM_GZIP', True) and 'gzip' in request.accept_encodings,
+            chunk_size=app.config.get('STREAM_CHUNK_SIZE', 64 * 1024),
+            gzip_min_size=app.config.get('GZIP_MIN_SIZE', 1024),
+            gzip_level=app.config.get('GZIP_LEVEL', 6)
+        )
+    
+    # Time buckets folded into the ETag of time-dependent endpoints
+    def today_bucket():
+        return datetime.combine(datetime.now().date(), datetime.min.time())
+    
+    def week_bucket():
+        today = today_bucket()
+        return today - timedelta(days=today.weekday())
+    
+    def minute_bucket():
+        return datetime.now().replace(second=0, microsecond=0)
+    
+    def conditional_get(time_bucket=None):
+        """
+        Decorator for GET handlers: tag 200 responses with ETag/Last-Modified
+        and answer a matching If-None-Match with 304 without running the handler
+        
+        The tag covers the store version, the path and normalized query
+        string, the representation (JSON or NDJSON) and, for endpoints whose
+        result depends on the clock, the current `time_bucket()`.
+        """
+        def decorator(get):
+            @functools.wraps(get)
+            def wrapper(*args, **kwargs):
+                # Read the version before running the query, so a concurrent
+                # write can only make the tag older than the data, never newer
+                version = event_service.version
+                last_modified = event_service.last_modified
+                parts = [
+                    request.path,
+                    urlencode(sorted(request.args.items(multi=True))),
+                    'ndjson' if wants_ndjson() else 'json'
+                ]
+                if time_bucket is not None:
+                    bucket = time_bucket()
+                    parts.append(bucket.isoformat())
+                    last_modified = max(last_modified, bucket.astimezone())
+                digest = hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()[:16]
+                etag = f'{event_service.version_epoch}-{version}-{digest}'
+                headers = {'ETag': quote_etag(etag, weak=True), 'Last-Modified': http_date(last_modified)}
+                
+                if request.if_none_match.contains_weak(etag):
+                    return Response(status=304, headers=headers)
+                
+                result = get(*args, **kwargs)
+                if isinstance(result, Response):
+                    if result.status_code == 200:
+                        result.headers.update(headers)
+                    return result
+                data, status = result
+                return (data, status, headers) if status == 200 else result
+            return wrapper
+        return decorator
+    
     class EventListResource(Resource):
+        @conditional_get()
         def get(self):
-            """Get all events with advanced search and filtering"""
+            """Get all events with advanced search and filtering, optionally paginated by cursor"""
             try:
                 # Get search parameters
                 search_query = request.args.get('search')
                 start_date = request.args.get('start_date')
                 end_date = request.args.get('end_date')
                 recurrence = request.args.get('recurrence')
+                sort = request.args.get('sort', 'start_time')
+                fields = parse_fields()
+                filters = {'recurrence': recurrence} if recurrence else {}
+                filters_applied = {
+                    'search': search_query,
+                    'start_date': start_date,
+                    'end_date': end_date,
+                    'recurrence': recurrence,
+                    'sort': sort
+                }
+                
+                # limit/cursor switch to keyset pagination over (start_time, id)
+                limit = request.args.get('limit')
+                cursor = request.args.get('cursor')
+                if limit is not None or cursor is not None:
+                    if sort != 'start_time':
+                        raise ValueError('Cursor pagination only supports sort=start_time')
+                    try:
+                        limit = int(limit) if limit is not None else app.config.get('DEFAULT_PAGE_SIZE', 100)
+                    except ValueError:
+                        raise ValueError(f'Invalid limit: {limit}')
+                    if limit < 1:
+                        raise ValueError('limit must be at least 1')
+                    limit = min(limit, app.config.get('MAX_PAGE_SIZE', 1000))
+                    after = decode_cursor(cursor) if cursor else None
+                    
+                    # Fetch one extra event to learn whether another page follows
+                    events = event_service.get_events_page(
+                        limit + 1,
+                        after=after,
+                        query=search_query,
+                        start_date=start_date,
+                        end_date=end_date,
+                        **filters
+                    )
+                    has_more = len(events) > limit
+                    events = events[:limit]
+                    
+                    response = {
+                        'success': True,
+                        'data': [event.to_dict(fields) for event in events],
+                        'limit': limit,
+                        'has_more': has_more,
+                        'next_cursor': encode_cursor(events[-1].start_time, events[-1].id) if has_more else None,
+                        'filters_applied': filters_applied
+                    }
+                    if request.args.get('include_total', '').lower() == 'true':
+                        response['total'] = event_service.count_events(
+                            query=search_query,
+                            start_date=start_date,
+                            end_date=end_date,
+                            **filters
+                        )
+                    return response, 200
+                
+                # Streamed bodies serialize events one at a time as they are read
+                if wants_stream():
+                    if sort == 'relevance' and search_query:
+                        events = event_service.search_events(
+                            query=search_query,
+                            start_date=start_date,
+                            end_date=end_date,
+                            order_by=sort,
+                            **filters
+                        )
+                    else:
+                        events = event_service.iter_events(
+                            query=search_query,
+                            start_date=start_date,
+                            end_date=end_date,
+                            **filters
+                        )
+                    return stream_items(
+                        events,
+                        {'success': True, 'filters_applied': filters_applied},
+                        event_encoder(fields)
+                    )
                 
                 # Use enhanced search if any parameters are provided
                 if any([search_query, start_date, end_date, recurrence]):
@@ -35,22 +304,20 @@ def create_app(config_object):
                         query=search_query,
                         start_date=start_date,
                         end_date=end_date,
-                        recurrence=recurrence
+                        order_by=sort,
+                        **filters
                     )
                 else:
                     events = event_service.get_all_events()
                 
-                return {
-                    'success': True,
-                    'data': [event.to_dict() for event in events],
-                    'total': len(events),
-                    'filters_applied': {
-                        'search': search_query,
-                        'start_date': start_date,
-                        'end_date': end_date,
-                        'recurrence': recurrence
-                    }
-                }, 200
+                # Concatenate each event's cached JSON instead of re-serializing it
+                return json_response(
+                    events,
+                    {'success': True, 'filters_applied': filters_applied},
+                    event_encoder(fields)
+                )
+            except ValueError as e:
+                return {'success': False, 'error': str(e)}, 400
             except Exception as e:
                 return {'success': False, 'error': str(e)}, 500
         
@@ -65,26 +332,41 @@ def create_app(config_object):
                     if field not in data:
                         return {'success': False, 'error': f'Missing required field: {field}'}, 400
                 
+                # check_conflicts=true rejects overlapping events, check_conflicts=warn reports them
+                check_conflicts = str(request.args.get('check_conflicts', data.get('check_conflicts', ''))).lower()
+                
                 event = event_service.create_event(
                     title=data['title'],
                     description=data['description'],
                     start_time=data['start_time'],
                     end_time=data['end_time'],
-                    recurrence=data.get('recurrence')
+                    recurrence=data.get('recurrence'),
+                    reject_conflicts=check_conflicts in ('true', '1', 'reject')
                 )
                 
-                return {
+                response = {
                     'success': True,
                     'message': 'Event created successfully',
                     'data': event.to_dict()
-                }, 201
+                }
+                if check_conflicts == 'warn':
+                    conflicts = event_service.find_conflicts(event.start_time, event.end_time, exclude_id=event.id)
+                    response['conflicts'] = [conflict.to_dict() for conflict in conflicts]
+                return response, 201
                 
+            except EventConflictError as e:
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'conflicts': [conflict.to_dict() for conflict in e.conflicts]
+                }, 409
             except ValueError as e:
                 return {'success': False, 'error': str(e)}, 400
             except Exception as e:
                 return {'success': False, 'error': str(e)}, 500
     
     class EventResource(Resource):
+        @conditional_get()
         def get(self, event_id):
             """Get a specific event"""
             try:
@@ -133,22 +415,136 @@ def create_app(config_object):
             except Exception as e:
                 return {'success': False, 'error': str(e)}, 500
     
+    def batch_items(key):
+        """Read a batch body: a bare JSON array or an object holding it under `key`"""
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get(key)
+        if not isinstance(data, list):
+            raise ValueError(f'Request body must be a JSON array or an object with a "{key}" array')
+        max_size = app.config.get('BATCH_MAX_SIZE', 10000)
+        if len(data) > max_size:
+            raise ValueError(f'Batches are limited to {max_size} items')
+        return data
+    
+    def batch_error(e):
+        """400 response listing every invalid item of a rejected batch"""
+        return {
+            'success': False,
+            'error': str(e),
+            'errors': [{'index': index, 'error': error} for index, error in sorted(e.errors.items())]
+        }, 400
+    
+    class EventBatchResource(Resource):
+        def post(self):
+            """Create many events; nothing is created unless every item is valid"""
+            try:
+                events = event_service.create_events(batch_items('events'))
+                
+                return {
+                    'success': True,
+                    'message': f'{len(events)} event(s) created successfully',
+                    'results': [
+                        {'index': index, 'success': True, 'data': event.to_dict()}
+                        for index, event in enumerate(events)
+                    ],
+                    'total': len(events)
+                }, 201
+            except BatchValidationError as e:
+                return batch_error(e)
+            except ValueError as e:
+                return {'success': False, 'error': str(e)}, 400
+            except Exception as e:
+                return {'success': False, 'error': str(e)}, 500
+        
+        def patch(self):
+            """Update many events (items carry an id plus the fields to change)"""
+            try:
+                events = event_service.update_events(batch_items('events'))
+                
+                return {
+                    'success': True,
+                    'message': f'{len(events)} event(s) updated successfully',
+                    'results': [
+                        {'index': index, 'success': True, 'data': event.to_dict()}
+                        for index, event in enumerate(events)
+                    ],
+                    'total': len(events)
+                }, 200
+            except BatchValidationError as e:
+                return batch_error(e)
+            except ValueError as e:
+                return {'success': False, 'error': str(e)}, 400
+            except Exception as e:
+                return {'success': False, 'error': str(e)}, 500
+        
+        def delete(self):
+            """Delete many events by id"""
+            try:
+                events = event_service.delete_events(batch_items('ids'))
+                
+                return {
+                    'success': True,
+                    'message': f'{len(events)} event(s) deleted successfully',
+                    'results': [
+                        {'index': index, 'success': True, 'id': event.id}
+                        for index, event in enumerate(events)
+                    ],
+                    'total': len(events)
+                }, 200
+            except BatchValidationError as e:
+                return batch_error(e)
+            except ValueError as e:
+                return {'success': False, 'error': str(e)}, 400
+            except Exception as e:
+                return {'success': False, 'error': str(e)}, 500
+    
+    def occurrence_dict(event, occurrence):
+        """Serialize an occurrence as its event plus the occurrence's own times"""
+        event_data = event.to_dict()
+        event_data['occurrence_start'] = occurrence.start.isoformat()
+        event_data['occurrence_end'] = occurrence.end.isoformat()
+        return event_data
+    
+    def iter_occurrence_dicts(occurrences):
+        """Lazily serialize occurrences, skipping events deleted meanwhile"""
+        for occurrence in occurrences:
+            event = event_service.get_event_by_id(occurrence.base_id)
+            if event is not None:
+                yield occurrence_dict(event, occurrence)
+    
+    def occurrence_dicts(occurrences):
+        """Serialize a list of occurrences, skipping events deleted meanwhile"""
+        return list(iter_occurrence_dicts(occurrences))
+    
+    def iter_reminder_dicts(occurrences):
+        """Lazily build a reminder entry per occurrence, skipping events deleted meanwhile"""
+        for occurrence in occurrences:
+            event = event_service.get_event_by_id(occurrence.base_id)
+            if event is None:
+                continue
+            time_until = (occurrence.start - datetime.now()).total_seconds() / 60
+            yield {
+                'event': occurrence_dict(event, occurrence),
+                'message': format_reminder_message(event, occurrence.start),
+                'minutes_until': int(time_until)
+            }
+    
     class ReminderResource(Resource):
+        @conditional_get(minute_bucket)
         def get(self):
-            """Get upcoming reminders"""
+            """Get upcoming reminders (one per occurrence, recurring events included)"""
             try:
                 minutes = request.args.get('minutes', 60, type=int)
-                upcoming_events = event_service.get_upcoming_reminders(minutes)
-                
-                reminders = []
-                for event in upcoming_events:
-                    time_until = (event.start_time - datetime.now()).total_seconds() / 60
-                    message = f"REMINDER: '{event.title}' starts in {int(time_until)} minutes at {event.start_time.strftime('%H:%M')}"
-                    reminders.append({
-                        'event': event.to_dict(),
-                        'message': message,
-                        'minutes_until': int(time_until)
-                    })
+                upcoming = event_service.get_upcoming_occurrences(minutes)
+                
+                if wants_stream():
+                    return stream_items(
+                        iter_reminder_dicts(upcoming),
+                        {'success': True, 'check_interval_minutes': minutes}
+                    )
+                
+                reminders = list(iter_reminder_dicts(upcoming))
                 
                 return {
                     'success': True,
@@ -159,15 +555,85 @@ def create_app(config_object):
             except Exception as e:
                 return {'success': False, 'error': str(e)}, 500
     
+    def publish_reminder(event, occurrence, message):
+        """Reminder listener: push a fired reminder to stream subscribers, shaped like /api/reminders entries"""
+        broker.publish_reminder({
+            'event': occurrence_dict(event, occurrence),
+            'message': message,
+            'minutes_until': int((occurrence.start - datetime.now()).total_seconds() / 60)
+        })
+    
+    reminder_scheduler.add_listener(publish_reminder)
+    
+    def sse_frames(subscription):
+        """Yield a subscriber's frames as they arrive, with a comment line as heartbeat"""
+        heartbeat = app.config.get('STREAM_HEARTBEAT_INTERVAL', 15)
+        max_duration = app.config.get('STREAM_MAX_DURATION', 300)
+        deadline = time.monotonic() + max_duration if max_duration else None
+        try:
+            yield f"retry: {app.config.get('STREAM_RETRY_MS', 3000)}\n\n"
+            while True:
+                timeout = heartbeat
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        # The client reconnects with Last-Event-ID and misses nothing
+                        return
+                    timeout = min(timeout, remaining)
+                broker.check_gaps()
+                frames = subscription.get(timeout)
+                yield ''.join(frames) if frames else ': keepalive\n\n'
+        finally:
+            # Also runs when the client disconnects and the server closes the generator
+            subscription.close()
+    
+    class StreamResource(Resource):
+        def get(self):
+            """Push event changes and fired reminders as Server-Sent Events"""
+            try:
+                types = request.args.get('types')
+                if types:
+                    types = [name.strip() for name in types.split(',') if name.strip()]
+                    unknown = [name for name in types if name not in MESSAGE_TYPES]
+                    if unknown:
+                        raise ValueError(f"Unknown type(s): {', '.join(unknown)}. Valid types: {', '.join(MESSAGE_TYPES)}")
+                else:
+                    types = MESSAGE_TYPES
+                # EventSource sends the header on reconnects; the parameter serves the first connection
+                last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+                try:
+                    subscription = broker.subscribe(last_event_id, types)
+                except OverflowError as e:
+                    return {'success': False, 'error': str(e)}, 503, {'Retry-After': '5'}
+                
+                return Response(
+                    sse_frames(subscription),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+                )
+            except ValueError as e:
+                return {'success': False, 'error': str(e)}, 400
+            except Exception as e:
+                return {'success': False, 'error': str(e)}, 500
+    
+    class StreamStatsResource(Resource):
+        def get(self):
+            """Get stream subscriber, queue and drop counters"""
+            try:
+                return {'success': True, 'data': broker.stats()}, 200
+            except Exception as e:
+                return {'success': False, 'error': str(e)}, 500
+    
     class TodayEventsResource(Resource):
+        @conditional_get(today_bucket)
         def get(self):
-            """Get all events scheduled for today"""
+            """Get all event occurrences scheduled for today"""
             try:
-                today_events = event_service.get_today_events()
+                today_events = occurrence_dicts(event_service.get_today_occurrences())
                 
                 return {
                     'success': True,
-                    'data': [event.to_dict() for event in today_events],
+                    'data': today_events,
                     'total': len(today_events),
                     'date': datetime.now().date().isoformat()
                 }, 200
@@ -175,16 +641,211 @@ def create_app(config_object):
                 return {'success': False, 'error': str(e)}, 500
     
     class WeekEventsResource(Resource):
+        @conditional_get(week_bucket)
         def get(self):
-            """Get all events scheduled for the current week"""
+            """Get all event occurrences scheduled for the current week"""
             try:
-                week_events = event_service.get_week_events()
+                week_start = (datetime.now().date() - timedelta(days=datetime.now().weekday())).isoformat()
+                
+                if wants_stream():
+                    return stream_items(
+                        iter_occurrence_dicts(event_service.get_week_occurrences()),
+                        {'success': True, 'week_start': week_start}
+                    )
+                
+                week_events = occurrence_dicts(event_service.get_week_occurrences())
                 
                 return {
                     'success': True,
-                    'data': [event.to_dict() for event in week_events],
+                    'data': week_events,
                     'total': len(week_events),
-                    'week_start': (datetime.now().date() - timedelta(days=datetime.now().weekday())).isoformat()
+                    'week_start': week_start
+                }, 200
+            except Exception as e:
+                return {'success': False, 'error': str(e)}, 500
+    
+    def parse_window(start_param='start', end_param='end'):
+        """Read the required window query parameters as datetimes"""
+        start = request.args.get(start_param)
+        end = request.args.get(end_param)
+        if not start or not end:
+            raise ValueError(f'Both {start_param} and {end_param} query parameters are required')
+        start_time, end_time = parse_datetime(start), parse_datetime(end)
+        if start_time >= end_time:
+            raise ValueError(f'{start_param} must be before {end_param}')
+        return start_time, end_time
+    
+    class ConflictsResource(Resource):
+        @conditional_get()
+        def get(self):
+            """Get events overlapping the [start, end) window"""
+            try:
+                start_time, end_time = parse_window()
+                conflicts = event_service.find_conflicts(start_time, end_time)
+                
+                return {
+                    'success': True,
+                    'data': [event.to_dict() for event in conflicts],
+                    'total': len(conflicts),
+                    'start': start_time.isoformat(),
+                    'end': end_time.isoformat()
+                }, 200
+            except ValueError as e:
+                return {'success': False, 'error': str(e)}, 400
+            except Exception as e:
+                return {'success': False, 'error': str(e)}, 500
+    
+    class ConflictPairsResource(Resource):
+        @conditional_get()
+        def get(self):
+            """Get every pair of events that clash within the [start, end) window"""
+            try:
+                start_time, end_time = parse_window()
+                pairs = event_service.get_conflicting_pairs(start_time, end_time)
+                
+                return {
+                    'success': True,
+                    'data': [
+                        {
+                            'events': [first.to_dict(), second.to_dict()],
+                            'overlap_start': max(first.start_time, second.start_time).isoformat(),
+                            'overlap_end': min(first.end_time, second.end_time).isoformat()
+                        }
+                        for first, second in pairs
+                    ],
+                    'total': len(pairs),
+                    'start': start_time.isoformat(),
+                    'end': end_time.isoformat()
+                }, 200
+            except ValueError as e:
+                return {'success': False, 'error': str(e)}, 400
+            except Exception as e:
+                return {'success': False, 'error': str(e)}, 500
+    
+    class EventChangesResource(Resource):
+        @conditional_get()
+        def get(self):
+            """Get the changes made after sequence number `since`, or 410 when a full resync is needed"""
+            try:
+                changelog = event_service.changelog
+                if changelog is None:
+                    return {'success': False, 'error': 'The change feed is disabled'}, 501
+                since = request.args.get('since', 0)
+                try:
+                    since = int(since)
+                except ValueError:
+                    raise ValueError(f'Invalid since: {since}')
+                limit = request.args.get('limit', app.config.get('MAX_PAGE_SIZE', 1000), type=int)
+                if limit < 1:
+                    raise ValueError('limit must be at least 1')
+                limit = min(limit, app.config.get('MAX_PAGE_SIZE', 1000))
+                
+                # Sequence numbers restart with the process; a client from another epoch must resync
+                epoch = request.args.get('epoch')
+                try:
+                    if epoch is not None and epoch != changelog.epoch:
+                        raise ResyncRequired(changelog.latest)
+                    changes = changelog.since(since, limit + 1)
+                except ResyncRequired as e:
+                    return {
+                        'success': False,
+                        'resync': True,
+                        'error': str(e),
+                        'latest': e.latest,
+                        'epoch': changelog.epoch
+                    }, 410
+                
+                has_more = len(changes) > limit
+                changes = changes[:limit]
+                return {
+                    'success': True,
+                    'resync': False,
+                    'data': [change.to_dict() for change in changes],
+                    'total': len(changes),
+                    'since': since,
+                    'next': changes[-1].seq if changes else since,
+                    'has_more': has_more,
+                    'epoch': changelog.epoch
+                }, 200
+            except ValueError as e:
+                return {'success': False, 'error': str(e)}, 400
+            except Exception as e:
+                return {'success': False, 'error': str(e)}, 500
+    
+    class OccurrencesResource(Resource):
+        @conditional_get()
+        def get(self):
+            """Get occurrences of all events (recurring ones expanded) in the [from, to) window"""
+            try:
+                start_time, end_time = parse_window('from', 'to')
+                limit = request.args.get('limit', type=int)
+                occurrences = event_service.get_occurrences(start_time, end_time)
+                if limit is not None:
+                    occurrences = islice(occurrences, max(limit, 0))
+                
+                data = []
+                for occurrence in occurrences:
+                    event = event_service.get_event_by_id(occurrence.base_id)
+                    if event is None:
+                        # Deleted since the occurrences were listed
+                        continue
+                    data.append({
+                        'event_id': occurrence.base_id,
+                        'title': event.title,
+                        'start_time': occurrence.start.isoformat(),
+                        'end_time': occurrence.end.isoformat(),
+                        'recurrence': event.recurrence
+                    })
+                
+                return {
+                    'success': True,
+                    'data': data,
+                    'total': len(data),
+                    'from': start_time.isoformat(),
+                    'to': end_time.isoformat()
+                }, 200
+            except ValueError as e:
+                return {'success': False, 'error': str(e)}, 400
+            except Exception as e:
+                return {'success': False, 'error': str(e)}, 500
+    
+    class StatsResource(Resource):
+        @conditional_get()
+        def get(self):
+            """Get event histograms, scheduled minutes and busiest windows for a date range"""
+            if stats_store is None:
+                return {'success': False, 'error': stats_unavailable}, 501
+            try:
+                start = request.args.get('start')
+                end = request.args.get('end')
+                top = request.args.get('top', 5, type=int)
+                stats = stats_store.stats(
+                    start=parse_datetime(start) if start else None,
+                    end=parse_datetime(end) if end else None,
+                    top=top
+                )
+                
+                return {
+                    'success': True,
+                    'data': stats,
+                    'start': start,
+                    'end': end
+                }, 200
+            except ValueError as e:
+                return {'success': False, 'error': str(e)}, 400
+            except Exception as e:
+                return {'success': False, 'error': str(e)}, 500
+    
+    class QueryCacheResource(Resource):
+        def get(self):
+            """Get hit/miss counters of the query result cache"""
+            try:
+                if event_service.query_cache is None:
+                    return {'success': True, 'data': {'enabled': False}}, 200
+                
+                return {
+                    'success': True,
+                    'data': dict(event_service.query_cache.stats(), enabled=True)
                 }, 200
             except Exception as e:
                 return {'success': False, 'error': str(e)}, 500
@@ -203,11 +864,20 @@ def create_app(config_object):
                 return {'success': False, 'error': str(e)}, 500
     
     api.add_resource(EventListResource, '/api/events')
+    api.add_resource(EventBatchResource, '/api/events/batch')
     api.add_resource(EventResource, '/api/events/<string:event_id>')
     api.add_resource(ReminderResource, '/api/reminders')
     api.add_resource(TodayEventsResource, '/api/events/today')
     api.add_resource(WeekEventsResource, '/api/events/week')
+    api.add_resource(ConflictsResource, '/api/events/conflicts')
+    api.add_resource(ConflictPairsResource, '/api/events/conflicts/pairs')
+    api.add_resource(EventChangesResource, '/api/events/changes')
+    api.add_resource(OccurrencesResource, '/api/events/occurrences')
+    api.add_resource(StatsResource, '/api/stats')
+    api.add_resource(QueryCacheResource, '/api/cache/stats')
     api.add_resource(SchedulerStatusResource, '/api/scheduler/status')
+    api.add_resource(StreamResource, '/api/stream')
+    api.add_resource(StreamStatsResource, '/api/stream/stats')
     
     @app.route('/')
     def index():
@@ -220,17 +890,38 @@ def create_app(config_object):
                 'GET /api/events/<id>': 'Get specific event',
                 'PUT /api/events/<id>': 'Update event',
                 'DELETE /api/events/<id>': 'Delete event',
+                'POST /api/events/batch': 'Create many events at once',
+                'PATCH /api/events/batch': 'Update many events at once',
+                'DELETE /api/events/batch': 'Delete many events at once',
                 'GET /api/events/today': 'Get today\'s events',
                 'GET /api/events/week': 'Get this week\'s events',
+                'GET /api/events/conflicts': 'Get events overlapping a start/end window',
+                'GET /api/events/conflicts/pairs': 'Get all clashing event pairs in a start/end window',
+                'GET /api/events/occurrences': 'Get occurrences (recurring events expanded) in a from/to window',
                 'GET /api/reminders': 'Get upcoming reminders',
-                'GET /api/scheduler/status': 'Get scheduler status'
+                'GET /api/stats': 'Get event statistics for a start/end range (requires numpy)',
+                'GET /api/cache/stats': 'Get query cache hit/miss counters',
+                'GET /api/scheduler/status': 'Get scheduler status',
+                'GET /api/stream': 'Server-Sent Events: event changes and fired reminders',
+                'GET /api/stream/stats': 'Get stream subscriber and drop counters'
             },
             'search_parameters': {
-                'search': 'Search in title and description',
+                'search': 'Search in title and description (all words must match, prefixes allowed)',
+                'sort': 'start_time (default) or relevance for text searches',
                 'start_date': 'Filter events from this date (ISO format)',
                 'end_date': 'Filter events until this date (ISO format)',
-                'recurrence': 'Filter by recurrence type (daily/weekly/monthly)'
+                'recurrence': 'Filter by recurrence type (daily/weekly/monthly)',
+                'limit': 'Page size; switches to cursor pagination',
+                'cursor': 'next_cursor from the previous page',
+                'fields': 'Comma-separated fields to include for each event',
+                'include_total': 'true to count all matches when paginating',
+                'stream': 'true to stream the response body'
             }
         })
     
+    # Expose the services to tooling (benchmarks, shutdown hooks)
+    app.extensions['event_service'] = event_service
+    app.extensions['reminder_scheduler'] = reminder_scheduler
+    app.extensions['broker'] = broker
+    
     return app
\ No newline at end of file
@@ -1,162 +1,751 @@
-import json
+import copy
+import functools
+import itertools
 import os
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
-from .models import Event
+import threading
+import uuid
+from bisect import bisect_right
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Iterable, Iterator, List, Optional, Dict, Any, Set, Tuple
+from datetime import datetime, timezone
+from .models import Event, parse_datetime, validate_recurrence, validate_text
+from .storage import Operation, StorageBackend, JournalStorage
+from .indexes import StartTimeIndex, IntervalTree, InvertedIndex, tokenize
+from .locks import FileLock, ReadWriteLock
+from .query_cache import QueryCache, range_predicate, search_predicate
+from .changelog import Changelog
+from .occurrence_cache import OccurrenceCache, OccurrenceQueries
+from .utils import RECURRENCE_RULES, Occurrence, find_conflicting_pairs, merge_occurrences
 
-class EventService:
-    def __init__(self, data_file: str):
-        self.data_file = data_file
-        self._ensure_data_directory()
-        self.events: List[Event] = self._load_events()
+# Default for filters where None is itself a meaningful value
+UNSET: Any = object()
+
+def parse_filter_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO date filter, returning None when it is missing or invalid"""
+    if not value:
+        return None
+    try:
+        return parse_datetime(value)
+    except ValueError:
+        return None
+
+class EventConflictError(ValueError):
+    """Raised when a new event overlaps existing events and conflicts are rejected"""
+    def __init__(self, conflicts: List[Event]):
+        super().__init__(f"Event overlaps {len(conflicts)} existing event(s)")
+        self.conflicts = conflicts
+
+class BatchValidationError(ValueError):
+    """Raised when any operation of a batch is invalid; nothing in the batch is applied"""
+    def __init__(self, errors: Dict[int, str], size: int):
+        super().__init__(f"{len(errors)} of {size} operation(s) are invalid; nothing was applied")
+        self.errors = errors
+
+REQUIRED_EVENT_FIELDS = ('title', 'description', 'start_time', 'end_time')
+UPDATABLE_EVENT_FIELDS = ('title', 'description', 'start_time', 'end_time', 'recurrence')
+
+def event_from_item(item: Any) -> Event:
+    """Build a new Event from a batch item, raising ValueError if it is invalid"""
+    if not isinstance(item, dict):
+        raise ValueError("Each item must be an object")
+    for field in REQUIRED_EVENT_FIELDS:
+        if field not in item:
+            raise ValueError(f"Missing required field: {field}")
+    return Event(
+        title=item['title'],
+        description=item['description'],
+        start_time=item['start_time'],
+        end_time=item['end_time'],
+        recurrence=item.get('recurrence')
+    )
+
+def validate_changes(event: Event, changes: Dict[str, Any]) -> Tuple[datetime, datetime]:
+    """
+    Check every field of `changes` to `event`, raising ValueError if any is invalid
     
-    def _ensure_data_directory(self):
-        """Create data directory if it doesn't exist"""
-        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+    Returns the start and end time after the changes. A validated change
+    set is applied by updated_event without anything failing halfway.
+    """
+    for field in ('title', 'description'):
+        if field in changes:
+            validate_text(field, changes[field])
+    if 'recurrence' in changes:
+        validate_recurrence(changes['recurrence'])
+    start_time = event._parse_datetime(changes['start_time']) if 'start_time' in changes else event.start_time
+    end_time = event._parse_datetime(changes['end_time']) if 'end_time' in changes else event.end_time
+    if start_time >= end_time:
+        raise ValueError("Start time must be before end time")
+    return start_time, end_time
+
+def updated_event(event: Event, changes: Dict[str, Any], start_time: datetime, end_time: datetime) -> Event:
+    """A copy of an event with validated changes applied (updates are copy-on-write)"""
+    updated = copy.copy(event)
+    updated._invalidate_serialization()
+    for field in ('title', 'description', 'recurrence'):
+        if field in changes:
+            setattr(updated, field, changes[field])
+    updated.start_time = start_time
+    updated.end_time = end_time
+    return updated
+
+def validate_batch(items: List[Any], validate: Callable[[Any], Any]) -> List[Any]:
+    """
+    Run `validate(item)` on every item, collecting ValueErrors
     
-    def _load_events(self) -> List[Event]:
-        """Load events from JSON file"""
-        if not os.path.exists(self.data_file):
-            return []
-        
+    Returns the validated values in order, or raises BatchValidationError
+    listing every invalid item.
+    """
+    if not isinstance(items, list):
+        raise ValueError("Expected a list of items")
+    values, errors = [], {}
+    for index, item in enumerate(items):
         try:
-            with open(self.data_file, 'r') as f:
-                data = json.load(f)
-                return [Event.from_dict(event_data) for event_data in data]
-        except (json.JSONDecodeError, FileNotFoundError):
-            return []
+            values.append(validate(item))
+        except ValueError as e:
+            errors[index] = str(e)
+    if errors:
+        raise BatchValidationError(errors, len(items))
+    return values
+
+def validate_update_item(get_event: Callable[[str], Optional[Event]], item: Any,
+                         seen: Set[str]) -> Tuple[Event, Dict[str, Any], datetime, datetime]:
+    """Check one update_events item, returning (event, changes, start_time, end_time)"""
+    if not isinstance(item, dict) or 'id' not in item:
+        raise ValueError("Each item must be an object with an id")
+    event_id = item['id']
+    if event_id in seen:
+        raise ValueError(f"Event {event_id} appears more than once in the batch")
+    seen.add(event_id)
+    event = get_event(event_id)
+    if event is None:
+        raise ValueError(f"Event not found: {event_id}")
+    changes = {field: item[field] for field in UPDATABLE_EVENT_FIELDS if field in item}
+    return (event, changes) + validate_changes(event, changes)
+
+def validate_delete_item(get_event: Callable[[str], Optional[Event]], event_id: Any, seen: Set[str]) -> Event:
+    """Check one delete_events id, returning the event it refers to"""
+    if not isinstance(event_id, str):
+        raise ValueError("Each item must be an event id")
+    if event_id in seen:
+        raise ValueError(f"Event {event_id} appears more than once in the batch")
+    seen.add(event_id)
+    event = get_event(event_id)
+    if event is None:
+        raise ValueError(f"Event not found: {event_id}")
+    return event
+
+EventListener = Callable[[str, Event], None]
+
+class EventChangeNotifier:
+    """Lets other components subscribe to event writes.
     
-    def _save_events(self):
-        """Save events to JSON file"""
-        with open(self.data_file, 'w') as f:
-            json.dump([event.to_dict() for event in self.events], f, indent=2)
+    Listeners are called as `listener(op, event)` after every successful
+    'create', 'update' or 'delete', on the thread that made the change.
+    
+    Also keeps a data version for conditional requests: `version` grows by
+    one with every write (after the listeners have run, so derived caches
+    are already up to date) and `last_modified` records when. The random
+    `version_epoch` tells two processes or restarts with equal versions apart.
+    """
+    def __init__(self):
+        self._listeners: List[EventListener] = []
+        self._versions = itertools.count(1)
+        self.version = 0
+        self.version_epoch = uuid.uuid4().hex[:8]
+        self.last_modified = datetime.now(timezone.utc)
+    
+    def add_listener(self, listener: EventListener):
+        """Register a callback for event changes"""
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: EventListener):
+        """Unregister a callback added with add_listener"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _notify(self, op: str, event: Event):
+        for listener in list(self._listeners):
+            listener(op, event)
+        self._bump_version()
+    
+    def _bump_version(self):
+        """Record that the data changed, for conditional requests"""
+        self.last_modified = datetime.now(timezone.utc)
+        self.version = next(self._versions)
+
+def _read_locked(method):
+    """Run an EventService query under the shared read lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.read_locked():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+class EventServiceBase(OccurrenceQueries, EventChangeNotifier):
+    """What every event service backend shares, whatever its storage.
+    
+    Writes run the same steps everywhere: inside `_writing()` they validate
+    and change the state queries see under `_mutating()` (`_put`, `_remove`),
+    persist (`_persist`) and notify listeners, then wait for durability
+    (`_wait_durable`) once writers are released. The listeners keep the
+    occurrence cache (today/week/reminders), the query cache and the
+    changelog up to date, and search and date-range results are served
+    through the query cache here. A backend implements those hooks and the
+    queries themselves (`_search_events`, `get_events_page`, `count_events`,
+    `find_conflicts`, `get_recurring_events`, `_get_events_by_date_range`...).
+    """
+    def _init_caches(self, occurrence_horizon_days: int, query_cache_size: int, changelog_size: int):
+        """Create the caches kept up to date by listening to writes, once queries work"""
+        self.occurrence_cache = OccurrenceCache(self, occurrence_horizon_days)
+        # Search and date-range results (disabled with query_cache_size=0)
+        self.query_cache = QueryCache(self, query_cache_size) if query_cache_size else None
+        # Recent writes for delta sync (disabled with changelog_size=0)
+        self.changelog = Changelog(self, changelog_size) if changelog_size else None
+    
+    def _writing(self):
+        """Context manager serializing writers (with other processes too, in shared mode)"""
+        raise NotImplementedError
+    
+    def _mutating(self):
+        """Context manager around a write's reads and its changes to what queries see"""
+        return nullcontext()
+    
+    def _put(self, event: Event, previous: Optional[Event] = None):
+        """Make a created or updated event visible to queries, replacing `previous`"""
+    
+    def _remove(self, event: Event):
+        """Stop showing a deleted event to queries"""
+    
+    def _persist(self, op: str, events: List[Event], batch: bool = False):
+        """Persist one operation on `events` through `self.storage`, as a single batch write if `batch`"""
+        if batch:
+            self.storage.record_batch([
+                (op, event.id, event.to_dict() if op != 'delete' else None) for event in events
+            ])
+        else:
+            event = events[0]
+            self.storage.record(op, event.id, event.to_dict() if op != 'delete' else None)
+    
+    def _wait_durable(self):
+        """Block until this thread's writes are on disk (called once writers are released)"""
     
     def create_event(self, title: str, description: str, start_time: str, 
-                    end_time: str, recurrence: str = None) -> Event:
-        """Create a new event"""
+                    end_time: str, recurrence: str = None, reject_conflicts: bool = False) -> Event:
+        """Create a new event, optionally refusing it if it overlaps existing events"""
         event = Event(title, description, start_time, end_time, recurrence=recurrence)
-        self.events.append(event)
-        self._save_events()
+        with self._writing():
+            with self._mutating():
+                if reject_conflicts:
+                    conflicts = self.find_conflicts(event.start_time, event.end_time)
+                    if conflicts:
+                        raise EventConflictError(conflicts)
+                self._put(event)
+            self._persist('create', [event])
+            self._notify('create', event)
+        self._wait_durable()
         return event
     
-    def get_all_events(self, sort_by_time: bool = True) -> List[Event]:
-        """Get all events, optionally sorted by start time"""
-        if sort_by_time:
-            return sorted(self.events, key=lambda e: e.start_time)
-        return self.events.copy()
-    
-    def get_event_by_id(self, event_id: str) -> Optional[Event]:
-        """Get event by ID"""
-        return next((event for event in self.events if event.id == event_id), None)
+    def create_events(self, items: List[Dict[str, Any]]) -> List[Event]:
+        """
+        Create several events at once
+        
+        Every item is validated before anything is applied; if any is
+        invalid a BatchValidationError lists them and nothing changes.
+        The batch is persisted with a single storage write.
+        """
+        events = validate_batch(items, event_from_item)
+        with self._writing():
+            with self._mutating():
+                for event in events:
+                    self._put(event)
+            self._persist('create', events, batch=True)
+            for event in events:
+                self._notify('create', event)
+        self._wait_durable()
+        return events
     
     def update_event(self, event_id: str, **kwargs) -> Optional[Event]:
         """Update an existing event"""
-        event = self.get_event_by_id(event_id)
-        if not event:
-            return None
-        
-        # Update fields if provided
-        if 'title' in kwargs:
-            event.title = kwargs['title']
-        if 'description' in kwargs:
-            event.description = kwargs['description']
-        if 'start_time' in kwargs:
-            event.start_time = event._parse_datetime(kwargs['start_time'])
-        if 'end_time' in kwargs:
-            event.end_time = event._parse_datetime(kwargs['end_time'])
-        if 'recurrence' in kwargs:
-            event.recurrence = kwargs['recurrence']
-        
-        # Validate times after update
-        if event.start_time >= event.end_time:
-            raise ValueError("Start time must be before end time")
+        with self._writing():
+            with self._mutating():
+                event = self.get_event_by_id(event_id)
+                if not event:
+                    return None
+                
+                # Validate the changes before touching the event or its indexes
+                start_time, end_time = validate_changes(event, kwargs)
+                updated = updated_event(event, kwargs, start_time, end_time)
+                self._put(updated, event)
+            self._persist('update', [updated])
+            self._notify('update', updated)
+        self._wait_durable()
+        return updated
+    
+    def update_events(self, items: List[Dict[str, Any]]) -> List[Event]:
+        """
+        Update several events at once; each item holds an `id` and the fields to change
         
-        self._save_events()
-        return event
+        All-or-nothing like create_events: unknown ids, duplicate ids and
+        invalid times are reported before anything is modified.
+        """
+        with self._writing():
+            with self._mutating():
+                seen: Set[str] = set()
+                updates = validate_batch(items, lambda item: validate_update_item(self.get_event_by_id, item, seen))
+                events = []
+                for event, changes, start_time, end_time in updates:
+                    updated = updated_event(event, changes, start_time, end_time)
+                    self._put(updated, event)
+                    events.append(updated)
+            self._persist('update', events, batch=True)
+            for event in events:
+                self._notify('update', event)
+        self._wait_durable()
+        return events
     
     def delete_event(self, event_id: str) -> bool:
         """Delete an event"""
-        event = self.get_event_by_id(event_id)
-        if event:
-            self.events.remove(event)
-            self._save_events()
-            return True
-        return False
+        with self._writing():
+            with self._mutating():
+                event = self.get_event_by_id(event_id)
+                if not event:
+                    return False
+                self._remove(event)
+            self._persist('delete', [event])
+            self._notify('delete', event)
+        self._wait_durable()
+        return True
+    
+    def delete_events(self, event_ids: List[str]) -> List[Event]:
+        """Delete several events at once (all-or-nothing, like create_events), returning them"""
+        with self._writing():
+            with self._mutating():
+                seen: Set[str] = set()
+                events = validate_batch(
+                    event_ids, lambda event_id: validate_delete_item(self.get_event_by_id, event_id, seen)
+                )
+                for event in events:
+                    self._remove(event)
+            self._persist('delete', events, batch=True)
+            for event in events:
+                self._notify('delete', event)
+        self._wait_durable()
+        return events
     
     def search_events(self, query: str = None, start_date: str = None, 
-                     end_date: str = None, recurrence: str = None) -> List[Event]:
+                     end_date: str = None, recurrence: Optional[str] = UNSET,
+                     order_by: str = 'start_time') -> List[Event]:
         """
         Advanced search events with multiple filters
         
         Args:
-            query: Search in title and description
+            query: Search in title and description; every word must match
+                the start of a word in the event
             start_date: Filter events starting from this date (ISO format)
             end_date: Filter events ending before this date (ISO format)
-            recurrence: Filter by recurrence type ('daily', 'weekly', 'monthly', None)
+            recurrence: Filter by recurrence type ('daily', 'weekly', 'monthly');
+                None selects non-recurring events, omit it to skip the filter
+            order_by: 'start_time' (default) or 'relevance' (TF-IDF, see
+                indexes.relevance) for text queries
         """
-        filtered_events = self.events.copy()
+        if self.query_cache is None:
+            return self._search_events(query, start_date, end_date, recurrence, order_by)
+        start_datetime = parse_filter_date(start_date)
+        end_datetime = parse_filter_date(end_date)
+        filter_recurrence = recurrence is not UNSET
+        return self.query_cache.get_or_compute(
+            ('search', tuple(tokenize(query)) if query else None, start_datetime, end_datetime,
+             recurrence, order_by),
+            search_predicate(query, start_datetime, end_datetime, recurrence, filter_recurrence),
+            lambda: self._search_events(query, start_date, end_date, recurrence, order_by)
+        )
+    
+    def iter_events(self, query: str = None, start_date: str = None, end_date: str = None,
+                    recurrence: Optional[str] = UNSET, batch_size: int = 500) -> Iterator[Event]:
+        """
+        Lazily yield events matching the search filters, ordered by (start_time, id)
         
+        Events are fetched in keyset pages of `batch_size`, so writes made
+        while a consumer is still iterating never cause events to be skipped
+        or repeated.
+        """
+        after = None
+        while True:
+            page = self.get_events_page(batch_size, after, query, start_date, end_date, recurrence)
+            yield from page
+            if len(page) < batch_size:
+                return
+            after = (page[-1].start_time, page[-1].id)
+    
+    def get_conflicting_pairs(self, start: datetime, end: datetime) -> List[Tuple[Event, Event]]:
+        """Get every pair of events that overlap each other within [start, end)"""
+        return find_conflicting_pairs(self.find_conflicts(start, end))
+    
+    def get_occurrences(self, start: datetime, end: datetime) -> Iterator[Occurrence]:
+        """Lazily yield every occurrence overlapping [start, end), ordered by start time"""
+        one_off = (
+            event for event in self.find_conflicts(start, end)
+            if event.recurrence not in RECURRENCE_RULES
+        )
+        return merge_occurrences(one_off, self.get_recurring_events(before=end), start, end)
+    
+    def get_events_by_date_range(self, start_date: datetime, end_date: datetime) -> List[Event]:
+        """Get events within a specific date range"""
+        if self.query_cache is not None:
+            return self.query_cache.get_or_compute(
+                ('range', start_date, end_date),
+                range_predicate(start_date, end_date),
+                lambda: self._get_events_by_date_range(start_date, end_date)
+            )
+        return self._get_events_by_date_range(start_date, end_date)
+
+class EventService(EventServiceBase):
+    """In-memory event store with indexes, safe to share between threads.
+    
+    Queries take a shared read lock, so they run concurrently. A write
+    holds the commit lock for its whole duration, which serializes writers,
+    but holds the exclusive write lock only while it changes the in-memory
+    indexes. Persisting and notifying listeners happen after the write lock
+    is released, so readers never wait on disk I/O. With write-behind storage
+    a writer waits for durability (`wait_durable`) after releasing the commit
+    lock too, so concurrent writers can share one flush.
+    
+    Updates are copy-on-write: the changed event is a new object swapped
+    into the indexes. Readers still holding the old object see a consistent
+    old version instead of a half-applied update.
+    
+    With `shared=True` several processes can serve the same data file. Writes
+    hold an advisory file lock (`<data_file>.lock`) and first catch up with
+    writes made by other processes; `refresh()` does the same for readers
+    and costs only a stat() when nothing has changed. Shared mode needs
+    storage that persists before returning (not write-behind).
+    """
+    def __init__(self, data_file: str, storage: StorageBackend = None,
+                 occurrence_horizon_days: int = 30, query_cache_size: int = 256,
+                 shared: bool = False, changelog_size: int = 10000):
+        super().__init__()
+        self.data_file = data_file
+        self._ensure_data_directory()
+        self.storage = storage or JournalStorage(data_file)
+        self.storage.bind(self._snapshot_records)
+        self._events_by_id: Dict[str, Event] = {}
+        self._start_index = StartTimeIndex()
+        self._interval_index = IntervalTree()
+        self._text_index = InvertedIndex()
+        self._recurrence_index: Dict[Optional[str], Set[str]] = {}
+        self._lock = ReadWriteLock()
+        self._commit_lock = threading.RLock()
+        self._file_lock = FileLock(f"{data_file}.lock") if shared else None
+        with self._file_lock or nullcontext():
+            self._build_indexes(self._load_events())
+            self._signature = self.storage.signature()
+        self._init_caches(occurrence_horizon_days, query_cache_size, changelog_size)
+    
+    @property
+    @_read_locked
+    def events(self) -> List[Event]:
+        """All events, in insertion order"""
+        return list(self._events_by_id.values())
+    
+    def _ensure_data_directory(self):
+        """Create data directory if it doesn't exist"""
+        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+    
+    def _load_events(self) -> Iterator[Event]:
+        """Stream events from the storage backend through the trusted fast path"""
+        return (Event.from_stored(record) for record in self.storage.iter_records())
+    
+    def _build_indexes(self, events: Iterable[Event]):
+        """Build the id map, start-time, interval, text and recurrence indexes"""
+        self._events_by_id = {event.id: event for event in events}
+        # One pass collects every index's input; each index is then bulk-built
+        entries = []
+        recurrence_index: Dict[Optional[str], Set[str]] = {}
+        for event in self._events_by_id.values():
+            entries.append((event.start_time, event.end_time, event.id))
+            recurrence_index.setdefault(event.recurrence, set()).add(event.id)
+        entries.sort(key=lambda entry: (entry[0], entry[2]))
+        
+        self._start_index = StartTimeIndex((start, event_id) for start, _, event_id in entries)
+        self._interval_index = IntervalTree(entries)
+        self._text_index = InvertedIndex()
+        self._text_index.add_many(
+            (event.id, event.title, event.description) for event in self._events_by_id.values()
+        )
+        self._recurrence_index = recurrence_index
+    
+    def _index_event(self, event: Event):
+        """Add an event to every index, or to none of them if an insert fails"""
+        start_time = event.start_time
+        undo = []
+        try:
+            self._start_index.add(start_time, event.id)
+            undo.append(lambda: self._start_index.remove(start_time, event.id))
+            self._interval_index.add(start_time, event.end_time, event.id)
+            undo.append(lambda: self._interval_index.remove(start_time, event.id))
+            self._text_index.add(event.id, event.title, event.description)
+        except Exception:
+            for step in reversed(undo):
+                step()
+            raise
+        self._events_by_id[event.id] = event
+        self._recurrence_index.setdefault(event.recurrence, set()).add(event.id)
+    
+    def _unindex_event(self, event: Event):
+        del self._events_by_id[event.id]
+        self._start_index.remove(event.start_time, event.id)
+        self._interval_index.remove(event.start_time, event.id)
+        self._text_index.remove(event.id)
+        recurrence_ids = self._recurrence_index[event.recurrence]
+        recurrence_ids.discard(event.id)
+        if not recurrence_ids:
+            del self._recurrence_index[event.recurrence]
+    
+    def _events_for_ids(self, event_ids) -> List[Event]:
+        events_by_id = self._events_by_id
+        return [events_by_id[event_id] for event_id in event_ids]
+    
+    @_read_locked
+    def _snapshot_records(self) -> List[Dict[str, Any]]:
+        """Every event as a dict, captured under the read lock (the storage snapshot source)"""
+        return [event.to_dict() for event in self._events_by_id.values()]
+    
+    @contextmanager
+    def _writing(self):
+        """
+        Hold the commit lock for a write
+        
+        In shared mode also hold the file lock, after catching up with other
+        processes' writes, and note the files' signature once done so our own
+        write is not mistaken for an external one.
+        """
+        with self._commit_lock:
+            if self._file_lock is None:
+                yield
+                return
+            with self._file_lock:
+                self._sync_locked()
+                try:
+                    yield
+                finally:
+                    self._signature = self.storage.signature()
+    
+    def refresh(self) -> bool:
+        """
+        Pick up writes other processes made to the shared data file
+        
+        A no-op unless the service is shared. When nothing changed this costs
+        one stat() per file; otherwise new journal entries are replayed, or
+        everything is reloaded if another process compacted. Listeners are
+        notified of every change. Returns whether anything was reloaded.
+        """
+        if self._file_lock is None or self.storage.signature() == self._signature:
+            return False
+        with self._commit_lock, self._file_lock:
+            return self._sync_locked()
+    
+    def _sync_locked(self) -> bool:
+        """Apply external changes (caller holds the commit and file locks)"""
+        signature = self.storage.signature()
+        if signature == self._signature:
+            return False
+        operations = self.storage.read_changes()
+        if operations is None:
+            operations = self._diff_records(self.storage.load())
+        changes = self._apply_operations(operations)
+        self._signature = signature
+        for op, event in changes:
+            self._notify(op, event)
+        return True
+    
+    @_read_locked
+    def _diff_records(self, records: List[Dict[str, Any]]) -> List[Operation]:
+        """Operations turning the in-memory events into `records`"""
+        remaining = set(self._events_by_id)
+        operations: List[Operation] = []
+        for record in records:
+            remaining.discard(record['id'])
+            current = self._events_by_id.get(record['id'])
+            if current is None or current.to_dict() != record:
+                operations.append(('update', record['id'], record))
+        operations.extend(('delete', event_id, None) for event_id in remaining)
+        return operations
+    
+    def _apply_operations(self, operations: List[Operation]) -> List[Tuple[str, Event]]:
+        """Apply persisted operations to the indexes, returning (op, event) pairs to notify"""
+        changes = []
+        with self._lock.write_locked():
+            for op, event_id, data in operations:
+                current = self._events_by_id.get(event_id)
+                if current is not None:
+                    self._unindex_event(current)
+                if data is None:
+                    if current is not None:
+                        changes.append(('delete', current))
+                else:
+                    event = Event.from_dict(data)
+                    self._index_event(event)
+                    changes.append(('create' if current is None else 'update', event))
+        return changes
+    
+    def _save_events(self):
+        """Write a full snapshot of all events"""
+        with self._writing():
+            self.storage.save_snapshot(self._snapshot_records())
+    
+    def close(self):
+        """Flush and release the storage backend"""
+        with self._writing():
+            self.storage.close()
+    
+    def _mutating(self):
+        return self._lock.write_locked()
+    
+    def _put(self, event: Event, previous: Optional[Event] = None):
+        if previous is None:
+            self._index_event(event)
+            return
+        self._unindex_event(previous)
+        try:
+            self._index_event(event)
+        except Exception:
+            # Leave the previous version in place rather than losing the event
+            self._index_event(previous)
+            raise
+    
+    def _remove(self, event: Event):
+        self._unindex_event(event)
+    
+    def _wait_durable(self):
+        self.storage.wait_durable()
+    
+    @_read_locked
+    def get_all_events(self, sort_by_time: bool = True) -> List[Event]:
+        """Get all events, optionally sorted by start time"""
+        if sort_by_time:
+            return self._events_for_ids(self._start_index)
+        return list(self._events_by_id.values())
+    
+    def get_event_by_id(self, event_id: str) -> Optional[Event]:
+        """Get event by ID"""
+        # A single dict lookup is atomic, so this needs no lock
+        return self._events_by_id.get(event_id)
+    
+    @_read_locked
+    def _search_events(self, query: str = None, start_date: str = None, 
+                      end_date: str = None, recurrence: Optional[str] = UNSET,
+                      order_by: str = 'start_time') -> List[Event]:
+        start_datetime = parse_filter_date(start_date)
+        end_datetime = parse_filter_date(end_date)
+        
+        # Each filter backed by an index yields a candidate id set; they are
+        # intersected smallest first instead of filtering the full list
+        scores = None
+        candidate_sets: List[Set[str]] = []
         if query:
-            query_lower = query.lower()
+            scores = self._text_index.score(query)
+            candidate_sets.append(scores.keys())
+        if recurrence is not UNSET:
+            candidate_sets.append(self._recurrence_index.get(recurrence, set()))
+        candidate_sets.sort(key=len)
+        
+        # An event ending by end_date must also have started by then
+        date_filtered = start_datetime is not None or end_datetime is not None
+        if not candidate_sets or (date_filtered and
+                                  self._start_index.count(start_datetime, end_datetime) <= len(candidate_sets[0])):
+            # Drive from the start-time index: results come out already sorted
             filtered_events = [
-                event for event in filtered_events
-                if query_lower in event.title.lower() or query_lower in event.description.lower()
+                event for event in self._events_for_ids(self._start_index.range(start_datetime, end_datetime))
+                if all(event.id in ids for ids in candidate_sets)
             ]
+        else:
+            smallest, others = candidate_sets[0], candidate_sets[1:]
+            filtered_events = sorted(
+                (self._events_by_id[event_id] for event_id in smallest
+                 if all(event_id in ids for ids in others)),
+                key=lambda e: (e.start_time, e.id)
+            )
+            if start_datetime:
+                filtered_events = [event for event in filtered_events if event.start_time >= start_datetime]
         
-        if start_date:
-            try:
-                start_datetime = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                filtered_events = [
-                    event for event in filtered_events
-                    if event.start_time >= start_datetime
-                ]
-            except ValueError:
-                pass  
-        
-        if end_date:
-            try:
-                end_datetime = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-                filtered_events = [
-                    event for event in filtered_events
-                    if event.end_time <= end_datetime
-                ]
-            except ValueError:
-                pass 
-        
-        if recurrence is not None:
+        if end_datetime:
             filtered_events = [
                 event for event in filtered_events
-                if event.recurrence == recurrence
+                if event.end_time <= end_datetime
             ]
         
-        return sorted(filtered_events, key=lambda e: e.start_time)
+        if order_by == 'relevance' and scores is not None:
+            # Stable sort keeps start-time order among equal scores
+            filtered_events.sort(key=lambda e: scores[e.id], reverse=True)
+        
+        return filtered_events
+    
+    @_read_locked
+    def get_events_page(self, limit: int, after: Optional[Tuple[datetime, str]] = None,
+                        query: str = None, start_date: str = None, end_date: str = None,
+                        recurrence: Optional[str] = UNSET) -> List[Event]:
+        """
+        Get up to `limit` events ordered by (start_time, id) (keyset pagination)
+        
+        Args:
+            limit: Maximum number of events to return
+            after: (start_time, id) of the last event of the previous page;
+                the page starts strictly after it
+            query, start_date, end_date, recurrence: Filters, as for search_events
+        """
+        if query or recurrence is not UNSET:
+            # Text and recurrence filters are driven by their own indexes
+            events = self.search_events(query, start_date, end_date, recurrence)
+            position = 0
+            if after is not None:
+                position = bisect_right(events, after, key=lambda e: (e.start_time, e.id))
+            return events[position:position + limit]
+        
+        # Otherwise seek straight into the start-time index and stop after `limit` matches
+        start_datetime = parse_filter_date(start_date)
+        end_datetime = parse_filter_date(end_date)
+        page = []
+        for event_id in self._start_index.scan(start_datetime, end_datetime, after):
+            if len(page) == limit:
+                break
+            event = self._events_by_id[event_id]
+            if end_datetime is None or event.end_time <= end_datetime:
+                page.append(event)
+        return page
     
-    def get_upcoming_reminders(self, minutes: int = 60) -> List[Event]:
-        """Get events that are due within specified minutes"""
-        return [event for event in self.events if event.is_due_soon(minutes)]
+    def iter_events(self, query: str = None, start_date: str = None, end_date: str = None,
+                    recurrence: Optional[str] = UNSET, batch_size: int = 500) -> Iterator[Event]:
+        if query or recurrence is not UNSET:
+            # Pages of these filters slice one search result, so take it whole
+            return iter(self.search_events(query, start_date, end_date, recurrence))
+        return super().iter_events(query, start_date, end_date, recurrence, batch_size)
     
-    def get_events_by_date_range(self, start_date: datetime, end_date: datetime) -> List[Event]:
-        """Get events within a specific date range"""
+    @_read_locked
+    def count_events(self, query: str = None, start_date: str = None, end_date: str = None,
+                     recurrence: Optional[str] = UNSET) -> int:
+        """Count events matching the same filters as search_events"""
+        if not any([query, start_date, end_date]) and recurrence is UNSET:
+            return len(self._events_by_id)
+        return len(self.search_events(query, start_date, end_date, recurrence))
+    
+    @_read_locked
+    def find_conflicts(self, start: datetime, end: datetime, exclude_id: str = None) -> List[Event]:
+        """Get events overlapping [start, end), ordered by start time"""
         return [
-            event for event in self.events
-            if start_date <= event.start_time <= end_date
+            event for event in self._events_for_ids(self._interval_index.overlapping(start, end))
+            if event.id != exclude_id
         ]
     
-    def get_today_events(self) -> List[Event]:
-        """Get all events scheduled for today"""
-        today = datetime.now().date()
+    @_read_locked
+    def get_recurring_events(self, before: datetime = None) -> List[Event]:
+        """Get events with a recurrence rule, optionally only those whose series starts before `before`"""
         return [
-            event for event in self.events
-            if event.start_time.date() == today
+            event
+            for rule in RECURRENCE_RULES
+            for event in self._events_for_ids(self._recurrence_index.get(rule, ()))
+            if before is None or event.start_time < before
         ]
     
-    def get_week_events(self) -> List[Event]:
-        """Get all events scheduled for the current week"""
-        today = datetime.now().date()
-        week_start = today - timedelta(days=today.weekday())
-        week_end = week_start + timedelta(days=6)
-        
-        return self.get_events_by_date_range(
-            datetime.combine(week_start, datetime.min.time()),
-            datetime.combine(week_end, datetime.max.time())
-        )
\ No newline at end of file
+    @_read_locked
+    def _get_events_by_date_range(self, start_date: datetime, end_date: datetime) -> List[Event]:
+        return self._events_for_ids(self._start_index.range(start_date, end_date))
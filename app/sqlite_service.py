@@ -0,0 +1,361 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+from .models import Event, to_micros
+from .services import UNSET, EventServiceBase, parse_filter_date
+from .indexes import inverse_document_frequency, matches_terms, relevance, tokenize
+from .storage import JournalStorage
+from .utils import RECURRENCE_RULES
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    start_us INTEGER NOT NULL,
+    end_us INTEGER NOT NULL,
+    recurrence TEXT,
+    created_at TEXT NOT NULL
+);
+DROP INDEX IF EXISTS idx_events_start;
+CREATE INDEX IF NOT EXISTS idx_events_start_id ON events (start_us, id);
+CREATE INDEX IF NOT EXISTS idx_events_end ON events (end_us);
+CREATE INDEX IF NOT EXISTS idx_events_recurrence ON events (recurrence, start_us);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    op TEXT NOT NULL,
+    id TEXT NOT NULL,
+    event TEXT NOT NULL
+);
+"""
+
+_COLUMNS = "id, title, description, start_time, end_time, recurrence, created_at"
+
+
+def _text_match(term: str, title: str, description: str) -> bool:
+    """SQL function: whether `term` is the prefix of a word of the event (see indexes.matches_terms)"""
+    return matches_terms((term,), title, description)
+
+
+class SQLiteEventService(EventServiceBase):
+    """EventService backed by SQLite so filters run as indexed SQL queries.
+
+    Exposes the same interface as `EventService`, but events live in the
+    database rather than in a Python list: memory use does not grow with the
+    number of events, and date-window queries are index range scans on
+    `start_us`/`end_us`. Each thread gets its own connection; the database
+    runs in WAL mode so readers never block the writer. The write sequence,
+    listeners and caches come from `EventServiceBase`; this class
+    implements the storage and the queries.
+
+    Every write also appends its operations, tagged with this service's
+    `version_epoch`, to a `changes` table in the same transaction (the last
+    `change_retention` are kept). `refresh()` replays the operations other
+    processes logged through the listeners, so the occurrence cache, query
+    cache, changelog and stream subscribers see them as if made here.
+    """
+
+    def __init__(self, database: str, json_file: str = None, occurrence_horizon_days: int = 30,
+                 query_cache_size: int = 256, changelog_size: int = 10000,
+                 change_retention: int = 10000):
+        super().__init__()
+        self.database = database
+        self.change_retention = change_retention
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+        if json_file and self._count() == 0:
+            self.import_json(json_file)
+        # Last logged operation this service has seen
+        self._change_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+        self._init_caches(occurrence_horizon_days, query_cache_size, changelog_size)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.database)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.create_function("text_match", 3, _text_match, deterministic=True)
+            self._local.conn = conn
+        return conn
+
+    def _count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    @staticmethod
+    def _row_to_event(row) -> Event:
+        return Event.from_dict({
+            'id': row[0],
+            'title': row[1],
+            'description': row[2],
+            'start_time': row[3],
+            'end_time': row[4],
+            'recurrence': row[5],
+            'created_at': row[6]
+        })
+
+    @staticmethod
+    def _event_params(event: Event) -> Dict[str, Any]:
+        return {
+            'id': event.id,
+            'title': event.title,
+            'description': event.description,
+            'start_time': event.start_time.isoformat(),
+            'end_time': event.end_time.isoformat(),
+            'start_us': to_micros(event.start_time),
+            'end_us': to_micros(event.end_time),
+            'recurrence': event.recurrence,
+            'created_at': event.created_at.isoformat()
+        }
+
+    def _query(self, where: str = "", params=(), order: str = "start_us, id",
+               limit: Optional[int] = None) -> List[Event]:
+        sql = f"SELECT {_COLUMNS} FROM events"
+        if where:
+            sql += f" WHERE {where}"
+        if order:
+            sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = list(params) + [limit]
+        return [self._row_to_event(row) for row in self._conn().execute(sql, params)]
+
+    def _upsert(self, conn: sqlite3.Connection, event: Event):
+        conn.execute(
+            "INSERT INTO events "
+            "(id, title, description, start_time, end_time, start_us, end_us, recurrence, created_at) "
+            "VALUES (:id, :title, :description, :start_time, :end_time, :start_us, :end_us, :recurrence, :created_at) "
+            "ON CONFLICT(id) DO UPDATE SET title = excluded.title, description = excluded.description, "
+            "start_time = excluded.start_time, end_time = excluded.end_time, start_us = excluded.start_us, "
+            "end_us = excluded.end_us, recurrence = excluded.recurrence",
+            self._event_params(event)
+        )
+
+    def _log_changes(self, conn: sqlite3.Connection, op: str, events: List[Event]):
+        """Record operations in the changes table, inside the caller's transaction"""
+        if not events:
+            return
+        conn.executemany(
+            "INSERT INTO changes (origin, op, id, event) VALUES (?, ?, ?, ?)",
+            [(self.version_epoch, op, event.id, json.dumps(event.to_dict(), separators=(',', ':')))
+             for event in events]
+        )
+        conn.execute("DELETE FROM changes WHERE seq <= last_insert_rowid() - ?", (self.change_retention,))
+
+    def import_json(self, json_file: str) -> int:
+        """Import events from an `events.json` snapshot (and its journal, if any)"""
+        records = JournalStorage(json_file).load()
+        events = [Event.from_dict(record) for record in records]
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                for event in events:
+                    self._upsert(conn, event)
+                self._log_changes(conn, 'create', events)
+        return len(events)
+
+    @property
+    def events(self) -> List[Event]:
+        """All events, in insertion order"""
+        return self._query(order="rowid")
+
+    def refresh(self) -> bool:
+        """
+        Pick up writes other processes made to the shared database
+
+        `PRAGMA data_version` is a per-connection counter that changes on
+        commits made through any other connection, so when nothing changed
+        the check is O(1). Otherwise the operations other services logged
+        since the last refresh are replayed through the listeners, like
+        `EventService.refresh()` does with the journal. If some of them were
+        already pruned from the changes table, the query cache is cleared,
+        the occurrence cache rebuilt and only the version bumped, which the
+        changelog and broker answer with a resync. Returns whether anything
+        changed.
+        """
+        conn = self._conn()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        last = getattr(self._local, 'data_version', None)
+        self._local.data_version = version
+        if last == version:
+            return False
+
+        with self._sync_lock:
+            rows = conn.execute(
+                "SELECT seq, origin, op, event FROM changes WHERE seq > ? ORDER BY seq", (self._change_seq,)
+            ).fetchall()
+            if not rows:
+                return False
+            missed = rows[0][0] != self._change_seq + 1
+            self._change_seq = rows[-1][0]
+            if missed:
+                if self.query_cache is not None:
+                    self.query_cache.clear()
+                self.occurrence_cache.rebuild()
+                self._bump_version()
+                return True
+            changed = False
+            for _, origin, op, data in rows:
+                if origin != self.version_epoch:
+                    self._notify(op, Event.from_dict(json.loads(data)))
+                    changed = True
+            return changed
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @contextmanager
+    def _writing(self):
+        """Serialize this process's writers; SQLite itself serializes processes"""
+        with self._write_lock:
+            yield
+
+    def _persist(self, op: str, events: List[Event], batch: bool = False):
+        """Write the operation and its change log entries in one transaction"""
+        conn = self._conn()
+        with conn:
+            if op == 'delete':
+                conn.executemany("DELETE FROM events WHERE id = ?", [(event.id,) for event in events])
+            else:
+                for event in events:
+                    self._upsert(conn, event)
+            self._log_changes(conn, op, events)
+
+    def get_all_events(self, sort_by_time: bool = True) -> List[Event]:
+        """Get all events, optionally sorted by start time"""
+        return self._query(order="start_us, id" if sort_by_time else "rowid")
+
+    def get_event_by_id(self, event_id: str) -> Optional[Event]:
+        """Get event by ID"""
+        events = self._query("id = ?", (event_id,), order="")
+        return events[0] if events else None
+
+    def _search_filters(self, query: str = None, start_date: str = None, end_date: str = None,
+                        recurrence: Optional[str] = UNSET) -> Tuple[List[str], List[Any], List[str]]:
+        """WHERE clauses and parameters for the search filters, plus the query terms"""
+        clauses = []
+        params = []
+        terms = tokenize(query or '')
+
+        for term in terms:
+            clauses.append(self._term_clause(term))
+            params.extend(self._term_params(term))
+
+        start_datetime = parse_filter_date(start_date)
+        if start_datetime:
+            clauses.append("start_us >= ?")
+            params.append(to_micros(start_datetime))
+
+        end_datetime = parse_filter_date(end_date)
+        if end_datetime:
+            clauses.append("end_us <= ?")
+            params.append(to_micros(end_datetime))
+
+        if recurrence is None:
+            clauses.append("recurrence IS NULL")
+        elif recurrence is not UNSET:
+            clauses.append("recurrence = ?")
+            params.append(recurrence)
+
+        return clauses, params, terms
+
+    @staticmethod
+    def _term_clause(term: str) -> str:
+        """WHERE clause matching events with a word starting with `term`"""
+        clause = "text_match(?, title, description)"
+        if term.isascii():
+            # LIKE (case-insensitive for ASCII only) cheaply rules out most rows first
+            clause = f"(title LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\') AND {clause}"
+        return clause
+
+    @staticmethod
+    def _term_params(term: str) -> List[str]:
+        if not term.isascii():
+            return [term]
+        pattern = '%' + term.replace('_', '\\_') + '%'
+        return [pattern, pattern, term]
+
+    def _idfs(self, terms: List[str]) -> Dict[str, float]:
+        """IDF of every query term over all events, for relevance ordering"""
+        conn = self._conn()
+        total = self._count()
+        idfs = {}
+        for term in set(terms):
+            matching = conn.execute(
+                f"SELECT COUNT(*) FROM events WHERE {self._term_clause(term)}", self._term_params(term)
+            ).fetchone()[0]
+            idfs[term] = inverse_document_frequency(total, max(matching, 1))
+        return idfs
+
+    def _search_events(self, query: str = None, start_date: str = None,
+                      end_date: str = None, recurrence: Optional[str] = UNSET,
+                      order_by: str = 'start_time') -> List[Event]:
+        clauses, params, terms = self._search_filters(query, start_date, end_date, recurrence)
+        events = self._query(" AND ".join(clauses), params)
+        if order_by == 'relevance' and terms:
+            idfs = self._idfs(terms)
+            # Stable sort keeps start-time order among equal scores
+            events.sort(key=lambda e: relevance(idfs, e.title, e.description), reverse=True)
+        return events
+
+    def get_events_page(self, limit: int, after: Optional[Tuple[datetime, str]] = None,
+                        query: str = None, start_date: str = None, end_date: str = None,
+                        recurrence: Optional[str] = UNSET) -> List[Event]:
+        """Get up to `limit` events ordered by (start_time, id), seeking past `after` with a row-value comparison"""
+        clauses, params, _ = self._search_filters(query, start_date, end_date, recurrence)
+        if after is not None:
+            clauses.append("(start_us, id) > (?, ?)")
+            params.extend([to_micros(after[0]), after[1]])
+        return self._query(" AND ".join(clauses), params, limit=limit)
+
+    def count_events(self, query: str = None, start_date: str = None, end_date: str = None,
+                     recurrence: Optional[str] = UNSET) -> int:
+        """Count events matching the same filters as search_events"""
+        clauses, params, _ = self._search_filters(query, start_date, end_date, recurrence)
+        sql = "SELECT COUNT(*) FROM events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return self._conn().execute(sql, params).fetchone()[0]
+
+    def find_conflicts(self, start: datetime, end: datetime, exclude_id: str = None) -> List[Event]:
+        """Get events overlapping [start, end), ordered by start time"""
+        events = self._query(
+            "start_us < ? AND end_us > ?",
+            (to_micros(end), to_micros(start))
+        )
+        return [event for event in events if event.id != exclude_id]
+
+    def get_recurring_events(self, before: datetime = None) -> List[Event]:
+        """Get events with a recurrence rule, optionally only those whose series starts before `before`"""
+        where = f"recurrence IN ({', '.join('?' * len(RECURRENCE_RULES))})"
+        params = list(RECURRENCE_RULES)
+        if before is not None:
+            where += " AND start_us < ?"
+            params.append(to_micros(before))
+        return self._query(where, params)
+
+    def _get_events_by_date_range(self, start_date: datetime, end_date: datetime) -> List[Event]:
+        return self._query(
+            "start_us BETWEEN ? AND ?",
+            (to_micros(start_date), to_micros(end_date))
+        )
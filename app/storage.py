@@ -0,0 +1,542 @@
+import json
+import io
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+Record = Dict[str, Any]
+Operation = Tuple[str, str, Optional[Record]]  # (op, event_id, data)
+
+DURABILITY_MODES = ('sync', 'group', 'async')
+
+
+def file_stat(path: str) -> Optional[Tuple[int, int, int]]:
+    """(inode, size, mtime in ns) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+_SEPARATORS = re.compile(r'[\s,]*')
+_DECODER = json.JSONDecoder()
+
+
+def iter_json_array(f: TextIO, chunk_size: int = 64 * 1024) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array in a file one at a time.
+
+    The file is read in chunks and each element decoded as soon as it is
+    complete, so memory holds one chunk and the current element instead of
+    the whole text plus the whole parsed list. An empty file yields nothing.
+    """
+    buffer = f.read(chunk_size)
+    position = 0
+    eof = not buffer
+    started = False
+    while True:
+        position = _SEPARATORS.match(buffer, position).end()
+        if position == len(buffer):
+            more = f.read(chunk_size) if not eof else ''
+            if more:
+                buffer, position = more, 0
+                continue
+            if started:
+                raise ValueError("Unexpected end of JSON array")
+            return
+        if not started:
+            if buffer[position] != '[':
+                raise ValueError("Expected a JSON array")
+            started = True
+            position += 1
+            continue
+        if buffer[position] == ']':
+            return
+        try:
+            item, end = _DECODER.raw_decode(buffer, position)
+            # A value ending exactly at the buffer end may continue in the next chunk
+            complete = end < len(buffer) or eof
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            more = f.read(chunk_size)
+            eof = not more
+            buffer, position = buffer[position:] + more, 0
+            continue
+        yield item
+        position = end
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = 2):
+    """Write JSON to a temp file next to `path`, fsync it and rename it into place.
+
+    A crash at any point leaves either the old file or the new one, never a
+    partially written file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class StorageBackend:
+    """Base class for event persistence backends.
+
+    The service calls `record()` once per create/update/delete with just the
+    changed event. Backends that need the full data set (snapshots,
+    compaction) pull it from the source registered with `bind()`.
+    """
+
+    def __init__(self):
+        self._snapshot_source: Callable[[], Iterable[Record]] = lambda: []
+
+    def bind(self, snapshot_source: Callable[[], Iterable[Record]]):
+        """Register the callable that returns every event as a dict"""
+        self._snapshot_source = snapshot_source
+
+    def load(self) -> List[Record]:
+        """Return all persisted events as dicts"""
+        raise NotImplementedError
+
+    def iter_records(self) -> Iterator[Record]:
+        """Yield all persisted events as dicts, streaming them where the backend can"""
+        return iter(self.load())
+
+    def record(self, op: str, event_id: str, data: Optional[Record] = None):
+        """Persist a single 'create', 'update' or 'delete' operation"""
+        raise NotImplementedError
+
+    def record_batch(self, operations: List[Operation]):
+        """Persist several operations at once (atomically, where the backend can)"""
+        for op, event_id, data in operations:
+            self.record(op, event_id, data)
+
+    def save_snapshot(self, records: Iterable[Record]):
+        """Replace the persisted state with `records`"""
+        raise NotImplementedError
+
+    def wait_durable(self):
+        """Block until the operations this thread recorded are on disk"""
+
+    def signature(self) -> Any:
+        """Cheap fingerprint of the persisted files; changes whenever any process writes them"""
+        return None
+
+    def read_changes(self) -> Optional[List[Operation]]:
+        """
+        Operations written by other processes since the last load or write
+
+        Returns None when they cannot be read incrementally, in which case
+        the caller reloads everything.
+        """
+        return None
+
+    def close(self):
+        """Release resources and flush anything pending"""
+
+
+class JSONFileStorage(StorageBackend):
+    """Stores all events in a single JSON file, rewritten on every change"""
+
+    def __init__(self, data_file: str):
+        super().__init__()
+        self.data_file = data_file
+
+    def load(self) -> List[Record]:
+        return list(self.iter_records())
+
+    def iter_records(self) -> Iterator[Record]:
+        # A damaged file ends the stream where the damage starts
+        try:
+            with open(self.data_file, 'r') as f:
+                yield from iter_json_array(f)
+        except (ValueError, FileNotFoundError):
+            return
+
+    def record(self, op: str, event_id: str, data: Optional[Record] = None):
+        self.save_snapshot(self._snapshot_source())
+
+    def record_batch(self, operations: List[Operation]):
+        # The whole batch costs one rewrite
+        self.save_snapshot(self._snapshot_source())
+
+    def save_snapshot(self, records: Iterable[Record]):
+        atomic_write_json(self.data_file, list(records))
+
+    def signature(self) -> Any:
+        return file_stat(self.data_file)
+
+
+class JournalStorage(JSONFileStorage):
+    """Snapshot file plus an append-only journal of operations.
+
+    Each write appends one JSON line (`{"op": ..., "id": ..., "event": ...}`)
+    to `<data_file>.journal`, so the cost of a write depends only on the size
+    of the changed event. Once the journal holds `compact_threshold` records
+    it is folded into a fresh snapshot and truncated.
+
+    A batch of operations is written as a single `{"op": "batch", "ops": [...]}`
+    line, so after a crash either all of it or none of it is replayed.
+
+    On load the journal is read first and folded into the final state of
+    every event it touches; the snapshot is then streamed with those events
+    replaced or dropped, and journal-only events follow. Replay is idempotent (creates and updates carry the full event), so a
+    crash between writing a snapshot and truncating the journal is harmless.
+    A torn final line left by a crash mid-append is skipped by readers and
+    cut off by the next write.
+    """
+
+    def __init__(self, data_file: str, compact_threshold: int = 1000, fsync: bool = True):
+        super().__init__(data_file)
+        self.journal_file = f"{data_file}.journal"
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        self.journal_records = 0
+        self._journal = None
+        # Where this process's view of the files ends, for read_changes()
+        self._snapshot_stat = None
+        self._journal_offset = 0
+
+    def iter_records(self) -> Iterator[Record]:
+        self._snapshot_stat = file_stat(self.data_file)
+        changed = self._read_journal()
+        for record in self._iter_snapshot():
+            if record['id'] in changed:
+                record = changed.pop(record['id'])
+                if record is None:
+                    continue
+            yield record
+        for record in changed.values():
+            if record is not None:
+                yield record
+
+    def _iter_snapshot(self) -> Iterator[Record]:
+        """Stream the records of the snapshot file alone"""
+        return JSONFileStorage.iter_records(self)
+
+    def _write_snapshot(self, records: Iterable[Record]):
+        """Replace the snapshot file with `records`"""
+        JSONFileStorage.save_snapshot(self, records)
+
+    def _read_journal(self) -> Dict[str, Optional[Record]]:
+        """Final state of every event in the journal (None once deleted)"""
+        self.journal_records = 0
+        self._journal_offset = 0
+        changed: Dict[str, Optional[Record]] = {}
+        if not os.path.exists(self.journal_file):
+            return changed
+
+        # Reading never modifies the file: a torn tail is skipped here and
+        # cut off by the next writer (see _repair_tail)
+        valid_bytes = 0
+        with open(self.journal_file, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                for _, event_id, data in self._operations(entry):
+                    changed[event_id] = data
+                self.journal_records += 1
+                valid_bytes += len(line)
+        self._journal_offset = valid_bytes
+        return changed
+
+    @staticmethod
+    def _operations(entry: Record) -> Iterator[Operation]:
+        """The operations in one journal entry, with batches flattened"""
+        if entry['op'] == 'batch':
+            for operation in entry['ops']:
+                yield from JournalStorage._operations(operation)
+        else:
+            yield entry['op'], entry['id'], entry.get('event')
+
+    def signature(self) -> Any:
+        return file_stat(self.data_file), file_stat(self.journal_file)
+
+    def read_changes(self) -> Optional[List[Operation]]:
+        # A replaced snapshot or truncated journal means another process compacted
+        if file_stat(self.data_file) != self._snapshot_stat:
+            return None
+        journal_stat = file_stat(self.journal_file)
+        if journal_stat is None:
+            return [] if self._journal_offset == 0 else None
+        if journal_stat[1] < self._journal_offset:
+            return None
+
+        operations: List[Operation] = []
+        with open(self.journal_file, 'rb') as f:
+            f.seek(self._journal_offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                operations.extend(self._operations(entry))
+                self.journal_records += 1
+                self._journal_offset += len(line)
+        return operations
+
+    @staticmethod
+    def _entry(op: str, event_id: str, data: Optional[Record] = None) -> Record:
+        entry = {'op': op, 'id': event_id}
+        if data is not None:
+            entry['event'] = data
+        return entry
+
+    def _repair_tail(self):
+        """
+        Cut off a torn final line left by a crashed writer before appending
+
+        Only called by the writer, which holds the service's write lock (and
+        in shared mode the file lock), so nobody else appends meanwhile. The
+        cut never goes past the size observed here, and never removes a
+        complete record.
+        """
+        size = os.fstat(self._journal.fileno()).st_size
+        if size <= self._journal_offset:
+            return
+        valid_bytes = self._journal_offset
+        with open(self.journal_file, 'rb') as f:
+            f.seek(valid_bytes)
+            for line in io.BytesIO(f.read(size - valid_bytes)):
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    json.loads(line)
+                except ValueError:
+                    break
+                valid_bytes += len(line)
+        if valid_bytes < size:
+            self._journal.truncate(valid_bytes)
+
+    def _append(self, entry: Record, records: int):
+        """Append one journal line counting as `records` operations, compacting when due"""
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'ab')
+        self._repair_tail()
+        line = (json.dumps(entry, separators=(',', ':')) + '\n').encode()
+        self._journal.write(line)
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self.journal_records += records
+        self._journal_offset += len(line)
+
+        if self.journal_records >= self.compact_threshold:
+            self.compact()
+
+    def record(self, op: str, event_id: str, data: Optional[Record] = None):
+        self._append(self._entry(op, event_id, data), 1)
+
+    def record_batch(self, operations: List[Operation]):
+        if operations:
+            entry = {'op': 'batch', 'ops': [self._entry(*operation) for operation in operations]}
+            self._append(entry, len(operations))
+
+    def compact(self):
+        """Fold the journal into a new snapshot and truncate it"""
+        self.save_snapshot(self._snapshot_source())
+
+    def save_snapshot(self, records: Iterable[Record]):
+        self._write_snapshot(records)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        with open(self.journal_file, 'w'):
+            pass
+        self.journal_records = 0
+        self._snapshot_stat = file_stat(self.data_file)
+        self._journal_offset = 0
+
+    def close(self):
+        if self.journal_records:
+            self.compact()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+class WriteBehindStorage(StorageBackend):
+    """Queues writes for a background thread that persists them in batches.
+
+    Wraps another backend: `record()` only queues the operation, and a
+    flusher thread hands everything queued so far to the wrapped backend's
+    `record_batch()`. A burst of writes therefore costs one journal line and
+    one fsync (one atomic rewrite for JSONFileStorage). Queued operations on
+    the same event collapse into the latest one.
+
+    With 'group' durability writers then block in `wait_durable()` until the
+    batch holding their write is on disk. The flusher starts a new batch as
+    soon as the previous one is written, so writers arriving during an fsync
+    share the next one. With 'async' durability writes are acknowledged at
+    once and flushed every `flush_interval` seconds, or as soon as
+    `max_pending` operations are queued; a crash loses at most that window.
+
+    A failed flush keeps its operations queued for the next attempt and is
+    raised to the 'group' writers waiting on it.
+    """
+
+    def __init__(self, backend: StorageBackend, durability: str = 'group',
+                 flush_interval: float = 0.5, max_pending: int = 1000):
+        if durability not in ('group', 'async'):
+            raise ValueError(f"Unsupported write-behind durability: {durability}")
+        super().__init__()
+        self.backend = backend
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.flushes = 0
+        self._pending: Dict[str, Operation] = {}
+        self._condition = threading.Condition()
+        # Held while taking and writing a batch, so batches reach the backend in order
+        self._io_lock = threading.Lock()
+        self._queued = 0
+        self._flushed = 0
+        self._failed = 0
+        self._error: Optional[BaseException] = None
+        self._local = threading.local()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='storage-flusher', daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Number of queued operations not yet handed to the backend"""
+        with self._condition:
+            return len(self._pending)
+
+    def bind(self, snapshot_source: Callable[[], Iterable[Record]]):
+        super().bind(snapshot_source)
+        self.backend.bind(snapshot_source)
+
+    def load(self) -> List[Record]:
+        return self.backend.load()
+
+    def iter_records(self) -> Iterator[Record]:
+        return self.backend.iter_records()
+
+    def record(self, op: str, event_id: str, data: Optional[Record] = None):
+        self.record_batch([(op, event_id, data)])
+
+    def record_batch(self, operations: List[Operation]):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Storage is closed")
+            for operation in operations:
+                self._pending[operation[1]] = operation
+            self._queued += 1
+            self._local.ticket = self._queued
+            if self.durability == 'group' or len(self._pending) >= self.max_pending:
+                self._condition.notify_all()
+
+    def wait_durable(self):
+        if self.durability != 'group':
+            return
+        ticket = getattr(self._local, 'ticket', 0)
+        with self._condition:
+            while self._flushed < ticket:
+                if self._failed >= ticket:
+                    raise self._error
+                self._condition.wait()
+
+    def flush(self):
+        """Write everything queued so far, in the calling thread"""
+        with self._io_lock:
+            self._write_pending()
+
+    def save_snapshot(self, records: Iterable[Record]):
+        with self._io_lock:
+            self._write_pending()
+            self.backend.save_snapshot(records)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        with self._io_lock:
+            self._write_pending()
+            self.backend.close()
+
+    def _write_pending(self) -> bool:
+        """Hand the queued operations to the backend as one batch (caller holds _io_lock)"""
+        with self._condition:
+            batch, self._pending = self._pending, {}
+            ticket = self._queued
+        if not batch:
+            return True
+        try:
+            self.backend.record_batch(list(batch.values()))
+        except Exception as e:
+            with self._condition:
+                # Requeue ahead of newer operations, which win for the same event
+                batch.update(self._pending)
+                self._pending = batch
+                self._error = e
+                self._failed = ticket
+                self._condition.notify_all()
+            return False
+        with self._condition:
+            self._flushed = ticket
+            self.flushes += 1
+            self._condition.notify_all()
+        return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                if self.durability == 'async':
+                    deadline = time.monotonic() + self.flush_interval
+                    while len(self._pending) < self.max_pending and not self._closed:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+            with self._io_lock:
+                written = self._write_pending()
+            if not written:
+                # Back off instead of retrying a failing disk in a tight loop
+                with self._condition:
+                    self._condition.wait(self.flush_interval)
+
+
+def create_storage(config: Dict[str, Any], data_file: str) -> StorageBackend:
+    """Build the storage backend selected by `STORAGE_BACKEND` and `DURABILITY` in the config"""
+    backend = config.get('STORAGE_BACKEND', 'journal')
+    if backend == 'json':
+        storage = JSONFileStorage(data_file)
+    elif backend == 'journal':
+        storage = JournalStorage(
+            data_file,
+            compact_threshold=config.get('JOURNAL_COMPACT_THRESHOLD', 1000),
+            fsync=config.get('JOURNAL_FSYNC', True)
+        )
+    else:
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+    durability = config.get('DURABILITY', 'sync')
+    if durability not in DURABILITY_MODES:
+        raise ValueError(f"Unknown durability mode: {durability}")
+    if durability == 'sync':
+        return storage
+    return WriteBehindStorage(
+        storage,
+        durability=durability,
+        flush_interval=config.get('FLUSH_INTERVAL', 0.5),
+        max_pending=config.get('FLUSH_MAX_PENDING', 1000)
+    )
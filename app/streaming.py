@@ -0,0 +1,112 @@
+import json
+import zlib
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+from flask import Response
+
+JSON_MIMETYPE = 'application/json'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+# Pieces of a body: text, or JSON that is already encoded (e.g. Event.to_json)
+Piece = Union[str, bytes]
+Encoder = Callable[[Any], Piece]
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'))
+
+
+def json_envelope(items: Iterable[Any], head: Optional[Dict[str, Any]] = None,
+                  encode: Encoder = _dumps) -> Iterator[Piece]:
+    """
+    Yield the JSON text of `{**head, "data": [...], "total": n}` piece by piece
+
+    Items are serialized with `encode` one at a time as they are pulled from
+    `items`, and `total` is written after the list once it is known.
+    """
+    yield '{'
+    for key, value in (head or {}).items():
+        yield f'{_dumps(key)}:{_dumps(value)},'
+    yield '"data":['
+    total = 0
+    for item in items:
+        if total:
+            yield ','
+        yield encode(item)
+        total += 1
+    yield f'],"total":{total}}}'
+
+
+def ndjson_lines(items: Iterable[Any], encode: Encoder = _dumps) -> Iterator[Piece]:
+    """Yield one JSON document per line"""
+    for item in items:
+        yield encode(item)
+        yield '\n'
+
+
+def _to_bytes(piece: Piece) -> bytes:
+    return piece.encode('utf-8') if isinstance(piece, str) else piece
+
+
+def json_response(items: Iterable[Any], head: Optional[Dict[str, Any]] = None,
+                  encode: Encoder = _dumps, status: int = 200) -> Response:
+    """Build a buffered JSON envelope response by joining the encoded pieces"""
+    body = b''.join(_to_bytes(piece) for piece in json_envelope(items, head, encode))
+    return Response(body, status=status, mimetype=JSON_MIMETYPE)
+
+
+def chunked(pieces: Iterable[Piece], chunk_size: int) -> Iterator[bytes]:
+    """Group pieces into encoded chunks of roughly `chunk_size` bytes"""
+    buffer: List[bytes] = []
+    size = 0
+    for piece in pieces:
+        data = _to_bytes(piece)
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a chunk stream into a gzip stream, flushing after every chunk"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        # A sync flush hands each chunk to the client as soon as it is compressed
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def streaming_response(pieces: Iterable[Piece], mimetype: str = JSON_MIMETYPE, gzip: bool = False,
+                       chunk_size: int = 64 * 1024, gzip_min_size: int = 1024,
+                       gzip_level: int = 6) -> Response:
+    """
+    Build a chunked response from text pieces
+
+    At most `chunk_size` bytes are buffered at a time. With `gzip` the body
+    is compressed on the fly, unless it turns out smaller than
+    `gzip_min_size`: chunks are read ahead until that much output exists,
+    and a body that ends first is sent uncompressed. The read-ahead also
+    runs the first part of the generator before any headers go out, so
+    errors raised there still produce an error response.
+    """
+    chunks = chunked(pieces, chunk_size)
+    head: List[bytes] = []
+    size = 0
+    for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= gzip_min_size or not gzip:
+            break
+
+    body: Iterable[bytes] = chain(head, chunks)
+    headers = {}
+    if gzip:
+        headers['Vary'] = 'Accept-Encoding'
+        if size >= gzip_min_size:
+            body = gzip_chunks(body, gzip_level)
+            headers['Content-Encoding'] = 'gzip'
+    return Response(body, mimetype=mimetype, headers=headers)
@@ -1,45 +1,142 @@
+import base64
+import binascii
+import calendar
+import heapq
+import json
 from datetime import datetime, timedelta
-from typing import List
-from .models import Event
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from .models import RECURRENCE_RULES, Event, parse_datetime
+
+class Occurrence(NamedTuple):
+    """A single occurrence of a (possibly recurring) event"""
+    start: datetime
+    end: datetime
+    base_id: str
+
+_FIXED_PERIODS = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1)
+}
+
+def add_months(dt: datetime, months: int) -> datetime:
+    """Shift `dt` by whole months, clamping the day to the end of shorter months"""
+    month_index = dt.month - 1 + months
+    year, month = dt.year + month_index // 12, month_index % 12 + 1
+    return dt.replace(year=year, month=month, day=min(dt.day, calendar.monthrange(year, month)[1]))
+
+def iter_occurrences(event: Event, window_start: Optional[datetime] = None,
+                     window_end: Optional[datetime] = None) -> Iterator[Occurrence]:
+    """
+    Lazily yield occurrences of `event` that overlap [window_start, window_end)
+    
+    Daily and weekly rules jump straight to the first occurrence in the
+    window. Monthly occurrences are always computed from the base date, so a
+    series starting on Jan 31 falls on Feb 28/29, Mar 31, Apr 30, and so on.
+    Events without a known recurrence rule yield at most one occurrence.
+    Without `window_end` a recurring series is infinite.
+    """
+    base_start, duration = event.start_time, event.end_time - event.start_time
+    
+    if event.recurrence not in RECURRENCE_RULES:
+        if (window_start is None or event.end_time > window_start) and \
+                (window_end is None or base_start < window_end):
+            yield Occurrence(base_start, event.end_time, event.id)
+        return
+    
+    if event.recurrence in _FIXED_PERIODS:
+        period = _FIXED_PERIODS[event.recurrence]
+        index = 0
+        if window_start is not None and base_start + duration <= window_start:
+            index = (window_start - duration - base_start) // period + 1
+        start = base_start + period * index
+        while window_end is None or start < window_end:
+            yield Occurrence(start, start + duration, event.id)
+            index += 1
+            start = base_start + period * index
+        return
+    
+    # Monthly: seek to a few months before the window, then step forward
+    index = 0
+    if window_start is not None and window_start > base_start:
+        months_apart = (window_start.year - base_start.year) * 12 + window_start.month - base_start.month
+        index = max(0, months_apart - duration.days // 28 - 1)
+    while True:
+        start = add_months(base_start, index)
+        if window_end is not None and start >= window_end:
+            return
+        if window_start is None or start + duration > window_start:
+            yield Occurrence(start, start + duration, event.id)
+        index += 1
+
+def merge_occurrences(one_off_events: Iterable[Event], recurring_events: Iterable[Event],
+                      window_start: datetime, window_end: datetime) -> Iterator[Occurrence]:
+    """
+    Merge occurrences of many events into a single stream ordered by start
+    
+    `one_off_events` must already be ordered by start time. Each recurring
+    event contributes a lazy occurrence iterator, and all streams are combined
+    with a k-way heap merge, so taking the first k occurrences costs
+    O(k log m) for m recurring events.
+    """
+    streams = [
+        (Occurrence(event.start_time, event.end_time, event.id) for event in one_off_events)
+    ]
+    streams.extend(iter_occurrences(event, window_start, window_end) for event in recurring_events)
+    return heapq.merge(*streams, key=lambda occurrence: occurrence.start)
 
 def generate_recurring_events(base_event: Event, end_date: datetime) -> List[Event]:
     """Generate recurring events based on base event"""
-    if not base_event.recurrence:
+    if base_event.recurrence not in RECURRENCE_RULES:
         return [base_event]
     
     events = [base_event]
-    current_start = base_event.start_time
-    current_end = base_event.end_time
-    
-    while current_start < end_date:
-        if base_event.recurrence == 'daily':
-            current_start += timedelta(days=1)
-            current_end += timedelta(days=1)
-        elif base_event.recurrence == 'weekly':
-            current_start += timedelta(weeks=1)
-            current_end += timedelta(weeks=1)
-        elif base_event.recurrence == 'monthly':
-            # Simple monthly increment (doesn't handle edge cases perfectly)
-            if current_start.month == 12:
-                current_start = current_start.replace(year=current_start.year + 1, month=1)
-                current_end = current_end.replace(year=current_end.year + 1, month=1)
-            else:
-                current_start = current_start.replace(month=current_start.month + 1)
-                current_end = current_end.replace(month=current_end.month + 1)
-        
-        if current_start < end_date:
-            recurring_event = Event(
-                title=f"{base_event.title} (Recurring)",
-                description=base_event.description,
-                start_time=current_start.isoformat(),
-                end_time=current_end.isoformat(),
-                recurrence=base_event.recurrence
-            )
-            events.append(recurring_event)
+    occurrences = iter_occurrences(base_event, window_end=end_date)
+    next(occurrences)  # the base event itself
+    for occurrence in occurrences:
+        events.append(Event(
+            title=f"{base_event.title} (Recurring)",
+            description=base_event.description,
+            start_time=occurrence.start.isoformat(),
+            end_time=occurrence.end.isoformat(),
+            recurrence=base_event.recurrence
+        ))
     
     return events
 
-def format_reminder_message(event: Event) -> str:
-    """Format reminder message for an event"""
-    time_until = (event.start_time - datetime.now()).total_seconds() / 60
-    return f"REMINDER: '{event.title}' starts in {int(time_until)} minutes at {event.start_time.strftime('%H:%M')}"
\ No newline at end of file
+def format_reminder_message(event: Event, start_time: Optional[datetime] = None) -> str:
+    """Format reminder message for an event (or one occurrence of it, starting at `start_time`)"""
+    start_time = start_time or event.start_time
+    time_until = (start_time - datetime.now()).total_seconds() / 60
+    return f"REMINDER: '{event.title}' starts in {int(time_until)} minutes at {start_time.strftime('%H:%M')}"
+
+def find_conflicting_pairs(events: Iterable[Event]) -> List[Tuple[Event, Event]]:
+    """
+    Find every pair of overlapping events with a sweep line
+    
+    `events` must be ordered by start time. Events still running are kept in
+    a min-heap keyed by end time, so the cost is O(n log n + pairs) rather
+    than comparing every pair.
+    """
+    pairs = []
+    active = []  # (end_time, sequence, event)
+    for sequence, event in enumerate(events):
+        while active and active[0][0] <= event.start_time:
+            heapq.heappop(active)
+        for _, _, other in active:
+            pairs.append((other, event))
+        heapq.heappush(active, (event.end_time, sequence, event))
+    return pairs
+
+def encode_cursor(start_time: datetime, event_id: str) -> str:
+    """Encode the (start_time, id) key of the last event on a page as an opaque cursor"""
+    payload = json.dumps([start_time.isoformat(), event_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor made by encode_cursor back into its (start_time, id) key (naive local time, like the index)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        start_time, event_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return parse_datetime(start_time), str(event_id)
+    except (binascii.Error, UnicodeError, TypeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
@@ -0,0 +1,108 @@
+"""Measure memory per loaded event with tracemalloc, compact Event vs the previous layout.
+
+Usage: python benchmarks/bench_memory.py [count ...]   (default: 10000 100000 1000000)
+
+"at rest" is after loading from dicts; "serialized" is after every event has
+been encoded once, as happens when a list response is served.
+"""
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import Event, parse_datetime  # noqa: E402
+
+
+class DictEvent:
+    """The previous Event layout: per-instance __dict__, datetimes, cached dict and JSON"""
+
+    def __init__(self, title, description, start_time, end_time, event_id=None, recurrence=None):
+        self.id = event_id or str(uuid.uuid4())
+        self.title = title
+        self.description = description
+        self.start_time = parse_datetime(start_time)
+        self.end_time = parse_datetime(end_time)
+        self.recurrence = recurrence
+        self.created_at = datetime.now()
+
+    def _serialized_dict(self):
+        data = self.__dict__.get('_serialized')
+        if data is None:
+            data = self._serialized = {
+                'id': self.id,
+                'title': self.title,
+                'description': self.description,
+                'start_time': self.start_time.isoformat(),
+                'end_time': self.end_time.isoformat(),
+                'recurrence': self.recurrence,
+                'created_at': self.created_at.isoformat()
+            }
+        return data
+
+    def to_json(self):
+        encoded = self.__dict__.get('_encoded')
+        if encoded is None:
+            encoded = self._encoded = json.dumps(self._serialized_dict(), separators=(',', ':')).encode('utf-8')
+        return encoded
+
+    @classmethod
+    def from_dict(cls, data):
+        event = cls(data['title'], data['description'], data['start_time'], data['end_time'],
+                    event_id=data['id'], recurrence=data.get('recurrence'))
+        event.created_at = datetime.fromisoformat(data['created_at'])
+        return event
+
+
+def make_records(count, seed=1):
+    rng = random.Random(seed)
+    base = datetime(2030, 1, 1)
+    created = datetime(2029, 12, 1).isoformat()
+    for i in range(count):
+        start = base + timedelta(minutes=rng.randrange(0, 365 * 24 * 60))
+        yield {
+            'id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'title': f"Meeting {i}",
+            'description': f"Planning session {i} with the platform team",
+            'start_time': start.isoformat(),
+            'end_time': (start + timedelta(minutes=rng.choice((15, 30, 60)))).isoformat(),
+            'recurrence': rng.choice((None, None, 'weekly')),
+            'created_at': created
+        }
+
+
+def measure(cls, count):
+    """Bytes per event retained after loading, and after serializing each event once"""
+    gc.collect()
+    tracemalloc.start()
+    events = [cls.from_dict(record) for record in make_records(count)]
+    gc.collect()
+    at_rest = tracemalloc.get_traced_memory()[0]
+    for event in events:
+        event.to_json()
+    serialized = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del events
+    return at_rest / count, serialized / count
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f"{'events':>10} {'layout':<8} {'at rest':>12} {'serialized':>12}")
+    for count in counts:
+        results = {}
+        for label, cls in (('before', DictEvent), ('after', Event)):
+            results[label] = measure(cls, count)
+            at_rest, serialized = results[label]
+            print(f"{count:>10,} {label:<8} {at_rest:>10.0f} B {serialized:>10.0f} B")
+        print(f"{'':>10} {'saving':<8} {1 - results['after'][0] / results['before'][0]:>11.0%} "
+              f"{1 - results['after'][1] / results['before'][1]:>11.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Compare per-worker startup and memory: events.json (EventService) vs a mapped binary snapshot.
+
+Usage: python benchmarks/bench_mmap.py [count] [workers]   (default: 200000 4)
+
+For each backend `workers` processes start at once on the same data, run a
+date-window and a text query, and wait while their memory is read from
+/proc/<pid>/smaps_rollup (Linux). RSS counts shared pages in full; PSS
+splits them between the processes mapping them, so it is the fair
+per-worker cost; "private" is memory no other process can share.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.binary_snapshot import convert_json  # noqa: E402
+from app.storage import atomic_write_json  # noqa: E402
+from bench_startup import make_records  # noqa: E402
+
+
+def run(backend, data_file, snapshot_file):
+    """Child process: open the service, query it, report, then wait for the parent"""
+    from app.mapped_service import MappedEventService
+    from app.services import EventService
+
+    started = time.perf_counter()
+    if backend == 'mmap':
+        service = MappedEventService(snapshot_file, query_cache_size=0)
+    else:
+        service = EventService(data_file, query_cache_size=0)
+    elapsed = time.perf_counter() - started
+    service.get_events_by_date_range(datetime(2030, 3, 1), datetime(2030, 3, 2))
+    service.search_events("session 4242")
+    print(f"{elapsed:.3f}", flush=True)
+    sys.stdin.read()
+
+
+def memory_kb(pid):
+    """Rss, Pss and private (clean + dirty) kB of a process"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields['Rss'], fields['Pss'], fields['Private_Clean'] + fields['Private_Dirty']
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == '--run':
+        run(*sys.argv[2:])
+        return
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    directory = tempfile.mkdtemp()
+    data_file = os.path.join(directory, 'events.json')
+    snapshot_file = os.path.join(directory, 'events.snap')
+    try:
+        print(f"Generating {count:,} events...")
+        atomic_write_json(data_file, list(make_records(count)))
+        started = time.perf_counter()
+        convert_json(data_file, snapshot_file)
+        print(f"converted to binary snapshot in {time.perf_counter() - started:.1f} s "
+              f"({os.path.getsize(data_file) / 2 ** 20:.0f} MB JSON -> "
+              f"{os.path.getsize(snapshot_file) / 2 ** 20:.0f} MB snapshot)")
+        print(f"{'backend':<8} {'workers':>7} {'startup':>9} {'RSS':>9} {'PSS':>9} {'private':>9}   (per worker)")
+
+        for backend in ('json', 'mmap'):
+            processes = [
+                subprocess.Popen(
+                    [sys.executable, __file__, '--run', backend, data_file, snapshot_file],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+                )
+                for _ in range(workers)
+            ]
+            startups = [float(process.stdout.readline()) for process in processes]
+            usage = [memory_kb(process.pid) for process in processes]
+            for process in processes:
+                process.communicate('')
+            rss, pss, private = (sum(column) / workers / 1024 for column in zip(*usage))
+            print(f"{backend:<8} {workers:>7} {sum(startups) / workers:>7.2f} s "
+                  f"{rss:>6.0f} MB {pss:>6.0f} MB {private:>6.0f} MB")
+    finally:
+        for name in os.listdir(directory):
+            os.unlink(os.path.join(directory, name))
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
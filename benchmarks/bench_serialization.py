@@ -0,0 +1,99 @@
+"""Benchmark GET /api/events with and without cached per-event serialization.
+
+Usage: python benchmarks/bench_serialization.py [number_of_events]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.routes import create_app  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def make_records(count, seed=1):
+    rng = random.Random(seed)
+    base = datetime(2030, 1, 1)
+    created = datetime(2029, 12, 1).isoformat()
+    records = []
+    for i in range(count):
+        start = base + timedelta(minutes=rng.randrange(0, 365 * 24 * 60))
+        records.append({
+            'id': f"event-{i:08d}",
+            'title': f"Meeting {i}",
+            'description': "Quarterly planning with the platform team " * 2,
+            'start_time': start.isoformat(),
+            'end_time': (start + timedelta(minutes=rng.choice((15, 30, 60)))).isoformat(),
+            'recurrence': rng.choice((None, None, 'weekly')),
+            'created_at': created
+        })
+    return records
+
+
+def legacy_body(events):
+    """The response as built before caching: a fresh dict per event, encoded in one go"""
+    data = [
+        {
+            'id': event.id,
+            'title': event.title,
+            'description': event.description,
+            'start_time': event.start_time.isoformat(),
+            'end_time': event.end_time.isoformat(),
+            'recurrence': event.recurrence,
+            'created_at': event.created_at.isoformat()
+        }
+        for event in events
+    ]
+    return json.dumps({'success': True, 'data': data, 'total': len(data)}).encode('utf-8')
+
+
+def timed(label, func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<40} {best * 1000:10.1f} ms  ({1 / best:6.1f} req/s)")
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    print(f"Generating {count:,} events...")
+    fd, data_file = tempfile.mkstemp(suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(make_records(count), f)
+
+    class BenchConfig(Config):
+        DATA_FILE = data_file
+        DEBUG = False
+        TESTING = True
+
+    try:
+        app = create_app(BenchConfig)
+        client = app.test_client()
+        service = app.extensions['event_service']
+        events = service.get_all_events()
+
+        def cold_request():
+            for event in events:
+                event._invalidate_serialization()
+            return client.get('/api/events').data
+
+        legacy = timed("uncached dicts + json.dumps", lambda: legacy_body(events))
+        timed("GET /api/events, cold cache", cold_request)
+        warm = timed("GET /api/events, warm cache", lambda: client.get('/api/events').data)
+        print(f"speedup (warm vs uncached): {legacy / warm:.1f}x over {count:,} events")
+    finally:
+        for path in (data_file, data_file + '.journal', data_file + '.tmp'):
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+if __name__ == '__main__':
+    main()
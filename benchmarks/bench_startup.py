@@ -0,0 +1,107 @@
+"""Measure cold start (EventService construction) on a large events.json snapshot.
+
+Usage: python benchmarks/bench_startup.py [count ...]   (default: 100000 1000000)
+
+Each variant runs in a fresh interpreter so peak RSS is its own. "before" is
+the previous load path: json.load of the whole file, Event.from_dict per
+record and one insert per event into the interval and text indexes.
+"""
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.indexes import IntervalTree, InvertedIndex, StartTimeIndex  # noqa: E402
+from app.models import Event  # noqa: E402
+from app.services import EventService  # noqa: E402
+from app.storage import atomic_write_json  # noqa: E402
+
+
+class LegacyLoadEventService(EventService):
+    """EventService with the previous load and index build"""
+
+    def _load_events(self):
+        return [Event.from_dict(record) for record in self.storage.load_whole()]
+
+    def _build_indexes(self, events):
+        self._events_by_id = {event.id: event for event in events}
+        self._start_index = StartTimeIndex(
+            (event.start_time, event.id) for event in self._events_by_id.values()
+        )
+        self._interval_index = IntervalTree()
+        for event in self._events_by_id.values():
+            self._interval_index.add(event.start_time, event.end_time, event.id)
+        self._text_index = InvertedIndex()
+        self._recurrence_index = {}
+        for event in self._events_by_id.values():
+            self._text_index.add(event.id, event.title, event.description)
+            self._recurrence_index.setdefault(event.recurrence, set()).add(event.id)
+
+
+def make_records(count, seed=1):
+    rng = random.Random(seed)
+    base = datetime(2030, 1, 1)
+    created = datetime(2029, 12, 1).isoformat()
+    for i in range(count):
+        start = base + timedelta(minutes=rng.randrange(0, 365 * 24 * 60))
+        yield {
+            'id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'title': f"Meeting {i}",
+            'description': f"Planning session {i} with the platform team",
+            'start_time': start.isoformat(),
+            'end_time': (start + timedelta(minutes=rng.choice((15, 30, 60)))).isoformat(),
+            'recurrence': rng.choice((None, None, 'weekly')),
+            'created_at': created
+        }
+
+
+def run(variant, data_file):
+    """Child process: build the service once and print seconds and peak RSS"""
+    from app.storage import JournalStorage
+    import json
+
+    storage = JournalStorage(data_file)
+    storage.load_whole = lambda: json.load(open(data_file))
+    service_class = LegacyLoadEventService if variant == 'before' else EventService
+    started = time.perf_counter()
+    service = service_class(data_file, storage=storage, query_cache_size=0)
+    elapsed = time.perf_counter() - started
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.2f} {peak_mb:.0f} {len(service.events)}")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--run':
+        run(sys.argv[2], sys.argv[3])
+        return
+
+    counts = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    print(f"{'events':>10} {'load path':<10} {'cold start':>11} {'peak RSS':>10}")
+    for count in counts:
+        fd, data_file = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            atomic_write_json(data_file, list(make_records(count)))
+            for variant in ('before', 'after'):
+                output = subprocess.run(
+                    [sys.executable, __file__, '--run', variant, data_file],
+                    check=True, capture_output=True, text=True
+                ).stdout.split()
+                seconds, peak_mb, loaded = float(output[0]), output[1], int(output[2])
+                assert loaded == count
+                print(f"{count:>10,} {variant:<10} {seconds:>9.2f} s {peak_mb:>7} MB")
+        finally:
+            for path in (data_file, data_file + '.journal', data_file + '.tmp'):
+                if os.path.exists(path):
+                    os.unlink(path)
+
+
+if __name__ == '__main__':
+    main()
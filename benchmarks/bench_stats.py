@@ -0,0 +1,82 @@
+"""Benchmark /api/stats aggregation: ColumnarEventStore vs a pure-Python loop.
+
+Usage: python benchmarks/bench_stats.py [number_of_events]
+"""
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.columnar import ColumnarEventStore  # noqa: E402
+from app.models import Event  # noqa: E402
+
+
+def make_events(count, seed=1):
+    rng = random.Random(seed)
+    base = datetime(2030, 1, 1)
+    recurrences = [None, None, None, 'daily', 'weekly', 'monthly']
+    events = []
+    for i in range(count):
+        start = base + timedelta(minutes=rng.randrange(0, 365 * 24 * 60))
+        event = Event.__new__(Event)
+        event.id = str(i)
+        event.start_time = start
+        event.end_time = start + timedelta(minutes=rng.choice((15, 30, 45, 60, 90)))
+        event.recurrence = rng.choice(recurrences)
+        events.append(event)
+    return events
+
+
+def python_stats(events, start, end, top=5):
+    """The same aggregates as ColumnarEventStore.stats, one Event at a time"""
+    per_day = Counter()
+    per_hour = [0] * 24
+    buckets = Counter()
+    by_recurrence = Counter()
+    total_minutes = 0.0
+    total = 0
+    for event in events:
+        if not (start <= event.start_time < end):
+            continue
+        total += 1
+        per_day[event.start_time.date()] += 1
+        per_hour[event.start_time.hour] += 1
+        buckets[event.start_time.replace(minute=0, second=0, microsecond=0)] += 1
+        by_recurrence[event.recurrence] += 1
+        total_minutes += (event.end_time - event.start_time).total_seconds() / 60
+    return total, per_day, per_hour, buckets.most_common(top), by_recurrence, total_minutes
+
+
+def timed(label, func, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<32} {best * 1000:10.1f} ms")
+    return best, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Generating {count:,} events...")
+    events = make_events(count)
+
+    store = ColumnarEventStore()
+    timed("columnar load (one-off)", lambda: store.extend(events), repeat=1)
+
+    start, end = datetime(2030, 3, 1), datetime(2030, 9, 1)
+    python_time, python_result = timed("pure Python loop", lambda: python_stats(events, start, end))
+    numpy_time, numpy_result = timed("ColumnarEventStore.stats", lambda: store.stats(start, end))
+
+    assert python_result[0] == numpy_result['total_events']
+    print(f"speedup: {python_time / numpy_time:.1f}x over {python_result[0]:,} matching events")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,4 +3,87 @@ import os
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key'
     DATA_FILE = os.path.join(os.path.dirname(__file__), 'data', 'events.json')
-    DEBUG = True
\ No newline at end of file
+    DEBUG = True
+    
+    # Event store: 'memory' (EventService), 'sqlite' (SQLiteEventService) or
+    # 'mmap' (MappedEventService over a binary snapshot that workers map read-only).
+    # An empty SQLite database or a missing snapshot is populated from DATA_FILE on first start.
+    EVENT_BACKEND = os.environ.get('EVENT_BACKEND', 'memory')
+    SQLITE_DATABASE = os.path.join(os.path.dirname(__file__), 'data', 'events.db')
+    BINARY_SNAPSHOT = os.path.join(os.path.dirname(__file__), 'data', 'events.snap')
+    # Journaled writes held in the mmap backend's overlay before a new snapshot is written
+    MMAP_COMPACT_THRESHOLD = 10000
+    
+    # Several worker processes serving the same data: writes take a file lock
+    # and catch up with other workers first, every request checks (one stat)
+    # for external writes, and only the process holding the leader lock runs
+    # the reminder scheduler. Requires DURABILITY = 'sync' and a POSIX host.
+    MULTI_PROCESS = os.environ.get('MULTI_PROCESS', 'false').lower() == 'true'
+    # Longest the scheduler goes without checking for other workers' writes, in seconds
+    CHANGE_POLL_INTERVAL = 1.0
+    
+    # Entries in the LRU cache of search/date-range query results (0 disables it)
+    QUERY_CACHE_SIZE = 256
+    
+    # Recent writes kept for delta sync on GET /api/events/changes?since= (0 disables the feed)
+    CHANGELOG_SIZE = 10000
+    
+    # Reminder delivery: the scheduler queues fired reminders and worker threads hand
+    # them to each sink in REMINDER_SINKS ('stdout', 'webhook', 'file'). A sink's
+    # queue holds REMINDER_QUEUE_SIZE reminders (more are dropped and counted);
+    # failed batches are retried REMINDER_MAX_RETRIES times with exponential backoff.
+    REMINDER_SINKS = [name.strip() for name in os.environ.get('REMINDER_SINKS', 'stdout').split(',') if name.strip()]
+    REMINDER_WEBHOOK_URL = os.environ.get('REMINDER_WEBHOOK_URL')
+    REMINDER_WEBHOOK_TIMEOUT = 5.0
+    REMINDER_FILE = os.environ.get('REMINDER_FILE')
+    REMINDER_QUEUE_SIZE = 1000
+    REMINDER_WORKERS = 2
+    REMINDER_BATCH_SIZE = 50
+    REMINDER_MAX_RETRIES = 5
+    REMINDER_RETRY_BACKOFF = 0.5
+    # Ledger of fired reminders (default: <data file>.reminders), kept across restarts
+    REMINDER_LEDGER_FILE = os.environ.get('REMINDER_LEDGER_FILE')
+    
+    # Server-Sent Events on GET /api/stream. Each subscriber's queue holds at most
+    # STREAM_QUEUE_SIZE messages (older states of the same event are coalesced, then
+    # the oldest is dropped and the client told to resync); the last STREAM_REPLAY_SIZE
+    # messages serve Last-Event-ID resumes. Connections close after STREAM_MAX_DURATION
+    # seconds (0: never) and clients reconnect where they left off.
+    STREAM_QUEUE_SIZE = 1000
+    STREAM_REPLAY_SIZE = 1000
+    STREAM_MAX_SUBSCRIBERS = 500
+    STREAM_HEARTBEAT_INTERVAL = 15
+    STREAM_MAX_DURATION = 300
+    STREAM_RETRY_MS = 3000
+    
+    # Days ahead that recurring events are materialized for today/week/reminder queries
+    OCCURRENCE_HORIZON_DAYS = 30
+    
+    # Keep a NumPy columnar mirror of event times for /api/stats (skipped if numpy is missing)
+    COLUMNAR_STATS = True
+    
+    # Persistence: 'journal' (snapshot + append-only journal) or 'json' (full rewrite)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'journal')
+    JOURNAL_COMPACT_THRESHOLD = 1000
+    JOURNAL_FSYNC = True
+    
+    # Write durability: 'sync' (persist before responding), 'group' (a background
+    # flusher batches concurrent writes into one fsync; writers wait for it) or
+    # 'async' (respond at once; flush every FLUSH_INTERVAL seconds or once
+    # FLUSH_MAX_PENDING writes are queued). Pending writes are flushed on shutdown.
+    DURABILITY = os.environ.get('DURABILITY', 'sync')
+    FLUSH_INTERVAL = 0.5
+    FLUSH_MAX_PENDING = 1000
+    
+    # Page sizes for cursor pagination on GET /api/events (?limit=&cursor=)
+    DEFAULT_PAGE_SIZE = 100
+    MAX_PAGE_SIZE = 1000
+    
+    # Streamed list responses (?stream=true or Accept: application/x-ndjson)
+    STREAM_CHUNK_SIZE = 64 * 1024
+    STREAM_GZIP = True
+    GZIP_MIN_SIZE = 1024
+    GZIP_LEVEL = 6
+    
+    # Largest accepted batch for /api/events/batch
+    BATCH_MAX_SIZE = 10000
\ No newline at end of file
@@ -1,10 +1,23 @@
 import pytest
+import copy
+import gzip
 import json
 import tempfile
 import os
-from datetime import datetime, timedelta
+import random
+import subprocess
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from app.binary_snapshot import SnapshotReader, convert_json, write_snapshot
+from app.changelog import Changelog, ResyncRequired
+from app.locks import FileLock, ReadWriteLock
+from app.mapped_service import MappedEventService
 from app.models import Event
-from app.services import EventService
+from app.services import BatchValidationError, EventService
+from app.storage import JournalStorage, JSONFileStorage, WriteBehindStorage, create_storage, iter_json_array
+from app.sqlite_service import SQLiteEventService
+from app.streaming import chunked, json_envelope
 from app.routes import create_app
 from config import Config
 
@@ -17,7 +30,10 @@ def temp_data_file():
     fd, path = tempfile.mkstemp(suffix='.json')
     os.close(fd)
     yield path
-    os.unlink(path)
+    for leftover in (path, path + '.journal', path + '.tmp', path + '.lock', path + '.leader',
+                     path + '.reminders', path + '.reminders.tmp'):
+        if os.path.exists(leftover):
+            os.unlink(leftover)
 
 @pytest.fixture
 def event_service(temp_data_file):
@@ -88,7 +104,86 @@ class TestEvent:
         assert recreated_event.title == original_event.title
         assert recreated_event.description == original_event.description
         assert recreated_event.id == original_event.id
-
+    
+    def test_serialization_cache_invalidation(self, event_service):
+        """Test cached dict/JSON forms are refreshed when an update changes the event"""
+        event = event_service.create_event(
+            title="Cached",
+            description="Before",
+            start_time="2030-01-01T09:00:00",
+            end_time="2030-01-01T10:00:00"
+        )
+        assert json.loads(event.to_json()) == event.to_dict()
+        
+        # Callers get a copy, so mutating it leaves the cache intact
+        event.to_dict()['title'] = "Mutated"
+        assert event.to_dict()['title'] == "Cached"
+        
+        updated = event_service.update_event(event.id, description="After", start_time="2030-01-01T08:00:00")
+        assert json.loads(updated.to_json())['description'] == "After"
+        assert updated.to_dict()['start_time'] == "2030-01-01T08:00:00"
+    
+    def test_compact_representation(self):
+        """Test events use slots, share recurrence names and keep time zones"""
+        first = Event("A", "", "2030-01-01T09:00:00", "2030-01-01T10:00:00", recurrence="weekly")
+        second = Event("B", "", "2030-01-02T09:00:00", "2030-01-02T10:00:00", recurrence="weekly")
+        assert not hasattr(first, '__dict__')
+        assert first.recurrence is second.recurrence
+        
+        # Time zones set directly (e.g. restored from a snapshot) are kept per field
+        zoned = Event("C", "", "2030-01-01T09:00:00.250000", "2030-01-01T10:00:00")
+        zoned.end_time = datetime(2030, 1, 1, 10, tzinfo=timezone.utc)
+        assert zoned.to_dict()['start_time'] == "2030-01-01T09:00:00.250000"
+        assert zoned.to_dict()['end_time'] == "2030-01-01T10:00:00+00:00"
+        zoned.end_time = datetime(2030, 1, 1, 10)
+        assert zoned._zones is None
+        
+        with pytest.raises(ValueError):
+            Event("D", "", "2030-01-01T09:00:00", "2030-01-01T10:00:00", recurrence=["weekly"])
+    
+    def test_times_with_offsets_become_local_time(self):
+        """Test parsed times with an offset are normalized to naive local time, like every other time"""
+        event = Event("A", "", "2030-01-01T09:00:00.250000+02:00", "2030-01-01T10:00:00Z")
+        expected = datetime(2030, 1, 1, 9, 0, 0, 250000, tzinfo=timezone(timedelta(hours=2))).astimezone().replace(tzinfo=None)
+        assert event.start_time == expected and event.start_time.tzinfo is None
+        assert event.end_time.tzinfo is None
+        assert Event.from_dict(event.to_dict()).to_dict() == event.to_dict()
+    
+    def test_micros_key_reads_offsets_as_local_time(self):
+        """Test the shared integer time key converts aware values like parse_datetime does"""
+        from app.models import from_micros, to_micros
+        
+        aware = datetime(2030, 1, 1, 9, 0, tzinfo=timezone.utc)
+        local = aware.astimezone().replace(tzinfo=None)
+        assert to_micros(aware) == to_micros(local)
+        assert from_micros(to_micros(aware)) == local
+        assert to_micros(Event("A", "", aware.isoformat(), "2030-01-02T00:00:00").start_time) == to_micros(aware)
+    
+    def test_unknown_recurrence_is_kept(self, client, temp_data_file):
+        """Test any recurrence string is accepted and kept, without growing the shared name table"""
+        from app import models
+        
+        size = len(models._RECURRENCES)
+        event_ids = []
+        for index in range(20):
+            response = client.post('/api/events', json={
+                'title': 'Custom', 'description': '', 'recurrence': f'custom{index}',
+                'start_time': '2030-01-01T09:00:00', 'end_time': '2030-01-01T10:00:00'
+            })
+            assert response.status_code == 201
+            event_ids.append(response.get_json()['data']['id'])
+        response = client.put(f'/api/events/{event_ids[0]}', json={'recurrence': 'yearly'})
+        assert response.status_code == 200 and response.get_json()['data']['recurrence'] == 'yearly'
+        assert client.put(f'/api/events/{event_ids[1]}', json={'recurrence': 7}).status_code == 400
+        assert len(models._RECURRENCES) == size
+        
+        # Known names are shared, other names survive a reload unchanged
+        assert Event("A", "", "2030-01-01T09:00:00", "2030-01-01T10:00:00", recurrence="weekly")._recurrence == 2
+        reloaded = EventService(temp_data_file)
+        assert reloaded.get_event_by_id(event_ids[0]).recurrence == 'yearly'
+        assert reloaded.get_event_by_id(event_ids[2]).recurrence == 'custom2'
+        assert [event.title for event in reloaded.search_events(recurrence='custom3')] == ['Custom']
+    
 class TestEventService:
     def test_create_event(self, event_service):
         """Test event creation through service"""
@@ -184,6 +279,736 @@ class TestEventService:
         business_events = event_service.search_events("business")
         assert len(business_events) == 1
 
+class TestEventIndexes:
+    def _create(self, service, title, start):
+        return service.create_event(
+            title=title,
+            description="Description",
+            start_time=start.isoformat(),
+            end_time=(start + timedelta(hours=1)).isoformat()
+        )
+    
+    def test_update_reorders_start_index(self, event_service):
+        """Test that changing start_time moves the event in sorted listings"""
+        base_time = datetime.now() + timedelta(days=1)
+        first = self._create(event_service, "First", base_time)
+        self._create(event_service, "Second", base_time + timedelta(hours=2))
+        
+        event_service.update_event(
+            first.id,
+            start_time=(base_time + timedelta(hours=4)).isoformat(),
+            end_time=(base_time + timedelta(hours=5)).isoformat()
+        )
+        
+        titles = [event.title for event in event_service.get_all_events()]
+        assert titles == ["Second", "First"]
+    
+    def test_invalid_update_leaves_event_unchanged(self, event_service):
+        """Test that a rejected update does not corrupt the event or its index"""
+        base_time = datetime.now() + timedelta(days=1)
+        event = self._create(event_service, "Stable", base_time)
+        
+        with pytest.raises(ValueError):
+            event_service.update_event(
+                event.id,
+                title="Changed",
+                start_time=(base_time + timedelta(hours=3)).isoformat()
+            )
+        
+        assert event.title == "Stable"
+        assert event_service.get_events_by_date_range(base_time, base_time) == [event]
+    
+    def test_times_with_offsets_mix_with_naive_times(self, event_service):
+        """Test events created with and without offsets share the indexes"""
+        base_time = datetime(2030, 1, 1, 9, 0)
+        naive = self._create(event_service, "Naive", base_time)
+        offset = event_service.create_event(
+            title="Offset",
+            description="Description",
+            start_time="2030-01-02T09:00:00+00:00",
+            end_time="2030-01-02T10:00:00Z"
+        )
+        
+        assert offset.start_time.tzinfo is None
+        in_range = event_service.get_events_by_date_range(base_time, base_time + timedelta(days=3))
+        assert in_range == [naive, offset]
+    
+    def test_failed_index_insert_is_rolled_back(self, event_service):
+        """Test an event that cannot be indexed is left out of every index"""
+        base_time = datetime(2030, 1, 1, 9, 0)
+        self._create(event_service, "Indexed", base_time)
+        broken = Event("Broken", "", base_time.isoformat(), (base_time + timedelta(hours=1)).isoformat())
+        broken.start_time = datetime(2030, 1, 1, 9, 30, tzinfo=timezone.utc)
+        broken.end_time = datetime(2030, 1, 1, 10, 30, tzinfo=timezone.utc)
+        
+        with pytest.raises(TypeError):
+            event_service._index_event(broken)
+        
+        assert event_service.get_event_by_id(broken.id) is None
+        assert event_service.search_events(query="Broken") == []
+        later = self._create(event_service, "Later", base_time + timedelta(hours=2))
+        in_range = event_service.get_events_by_date_range(base_time, base_time + timedelta(days=1))
+        assert [event.title for event in in_range] == ["Indexed", "Later"]
+        assert later in in_range
+    
+    def test_failed_update_keeps_previous_version(self, event_service):
+        """Test an update whose new version cannot be indexed leaves the old one in every index"""
+        base_time = datetime(2030, 1, 1, 9, 0)
+        event = self._create(event_service, "Original", base_time)
+        other = self._create(event_service, "Other", base_time + timedelta(hours=2))
+        broken = copy.copy(event)
+        broken.title = "Broken"
+        broken.start_time = datetime(2030, 1, 1, 9, 30, tzinfo=timezone.utc)
+        
+        with pytest.raises(TypeError):
+            with event_service._lock.write_locked():
+                event_service._put(broken, event)
+        
+        assert event_service.get_event_by_id(event.id) is event
+        assert event_service.search_events(query="Original") == [event]
+        assert event_service.get_events_by_date_range(base_time, base_time + timedelta(days=1)) == [event, other]
+    
+    def test_date_range_uses_current_times(self, event_service):
+        """Test range queries after create, update and delete"""
+        base_time = datetime(2030, 1, 1, 9, 0)
+        events = [self._create(event_service, f"Event {i}", base_time + timedelta(days=i)) for i in range(5)]
+        event_service.delete_event(events[1].id)
+        
+        in_range = event_service.get_events_by_date_range(base_time, base_time + timedelta(days=2))
+        assert [event.title for event in in_range] == ["Event 0", "Event 2"]
+        assert event_service.get_event_by_id(events[1].id) is None
+
+class TestConflictDetection:
+    def _create(self, service, title, start, hours=1):
+        return service.create_event(
+            title=title,
+            description="Description",
+            start_time=start.isoformat(),
+            end_time=(start + timedelta(hours=hours)).isoformat()
+        )
+    
+    def test_interval_tree_matches_brute_force(self):
+        """Test overlap queries against a pairwise scan"""
+        import random
+        from app.indexes import IntervalTree
+        
+        rng = random.Random(42)
+        base_time = datetime(2030, 1, 1)
+        intervals = {}
+        tree = IntervalTree()
+        for i in range(300):
+            start = base_time + timedelta(minutes=rng.randrange(0, 10000))
+            end = start + timedelta(minutes=rng.randrange(1, 600))
+            intervals[str(i)] = (start, end)
+            tree.add(start, end, str(i))
+        for i in range(0, 300, 3):
+            tree.remove(intervals.pop(str(i))[0], str(i))
+        
+        for _ in range(50):
+            lo = base_time + timedelta(minutes=rng.randrange(0, 10000))
+            hi = lo + timedelta(minutes=rng.randrange(1, 1000))
+            expected = {key for key, (start, end) in intervals.items() if start < hi and end > lo}
+            assert set(tree.overlapping(lo, hi)) == expected
+    
+    def test_bulk_built_interval_tree(self):
+        """Test a bulk-loaded tree keeps the heap order and stays correct under later changes"""
+        import random
+        from app.indexes import IntervalTree
+        
+        rng = random.Random(7)
+        base_time = datetime(2030, 1, 1)
+        intervals = {}
+        for i in range(500):
+            start = base_time + timedelta(minutes=rng.randrange(0, 10000))
+            intervals[str(i)] = (start, start + timedelta(minutes=rng.randrange(1, 600)))
+        tree = IntervalTree((start, end, key) for key, (start, end) in intervals.items())
+        
+        def check(node):
+            for child in (node.left, node.right):
+                if child is not None:
+                    assert child.priority <= node.priority
+                    check(child)
+        check(tree._root)
+        
+        for i in range(0, 500, 4):
+            tree.remove(intervals.pop(str(i))[0], str(i))
+        for i in range(500, 600):
+            start = base_time + timedelta(minutes=rng.randrange(0, 10000))
+            intervals[str(i)] = (start, start + timedelta(minutes=30))
+            tree.add(start, start + timedelta(minutes=30), str(i))
+        assert len(tree) == len(intervals)
+        for _ in range(50):
+            lo = base_time + timedelta(minutes=rng.randrange(0, 10000))
+            hi = lo + timedelta(minutes=rng.randrange(1, 1000))
+            expected = {key for key, (start, end) in intervals.items() if start < hi and end > lo}
+            assert set(tree.overlapping(lo, hi)) == expected
+    
+    def test_find_conflicts_follows_updates(self, event_service):
+        """Test that the interval index tracks changed event times"""
+        base_time = datetime(2030, 1, 1, 9, 0)
+        event = self._create(event_service, "Movable", base_time)
+        
+        assert event_service.find_conflicts(base_time, base_time + timedelta(minutes=30)) == [event]
+        
+        event = event_service.update_event(
+            event.id,
+            start_time=(base_time + timedelta(hours=5)).isoformat(),
+            end_time=(base_time + timedelta(hours=6)).isoformat()
+        )
+        assert event_service.find_conflicts(base_time, base_time + timedelta(minutes=30)) == []
+        assert event_service.find_conflicts(base_time + timedelta(hours=5), base_time + timedelta(hours=7)) == [event]
+    
+    def test_touching_events_do_not_conflict(self, event_service):
+        """Test that back-to-back events are not reported as clashing"""
+        base_time = datetime(2030, 1, 1, 9, 0)
+        self._create(event_service, "First", base_time)
+        self._create(event_service, "Second", base_time + timedelta(hours=1))
+        
+        assert event_service.get_conflicting_pairs(base_time, base_time + timedelta(hours=3)) == []
+    
+    def test_conflicting_pairs(self, event_service):
+        """Test the sweep-line pair report"""
+        base_time = datetime(2030, 1, 1, 9, 0)
+        self._create(event_service, "Long", base_time, hours=4)
+        self._create(event_service, "Inside A", base_time + timedelta(hours=1))
+        self._create(event_service, "Inside B", base_time + timedelta(hours=1, minutes=30))
+        self._create(event_service, "Later", base_time + timedelta(hours=5))
+        
+        pairs = event_service.get_conflicting_pairs(base_time, base_time + timedelta(days=1))
+        titles = sorted(tuple(sorted((a.title, b.title))) for a, b in pairs)
+        assert titles == [("Inside A", "Inside B"), ("Inside A", "Long"), ("Inside B", "Long")]
+    
+    def test_conflicts_api(self, client, sample_event_data):
+        """Test the conflict window endpoint and POST check_conflicts modes"""
+        client.post('/api/events', data=json.dumps(sample_event_data), content_type='application/json')
+        
+        rejected = client.post('/api/events?check_conflicts=true',
+                               data=json.dumps(sample_event_data),
+                               content_type='application/json')
+        assert rejected.status_code == 409
+        assert len(json.loads(rejected.data)['conflicts']) == 1
+        
+        warned = client.post('/api/events?check_conflicts=warn',
+                             data=json.dumps(sample_event_data),
+                             content_type='application/json')
+        assert warned.status_code == 201
+        assert len(json.loads(warned.data)['conflicts']) == 1
+        
+        response = client.get('/api/events/conflicts', query_string={
+            'start': sample_event_data['start_time'],
+            'end': sample_event_data['end_time']
+        })
+        assert response.status_code == 200
+        assert json.loads(response.data)['total'] == 2
+        
+        response = client.get('/api/events/conflicts/pairs', query_string={
+            'start': sample_event_data['start_time'],
+            'end': sample_event_data['end_time']
+        })
+        assert json.loads(response.data)['total'] == 1
+        
+        assert client.get('/api/events/conflicts').status_code == 400
+
+class TestOccurrences:
+    def test_monthly_month_end(self):
+        """Test that monthly series starting on the 31st clamp to month end"""
+        from app.utils import iter_occurrences
+        
+        event = Event("Billing", "Close the books", "2030-01-31T10:00:00", "2030-01-31T11:00:00",
+                      recurrence="monthly")
+        starts = [o.start.date().isoformat() for o in iter_occurrences(event, datetime(2030, 1, 1), datetime(2030, 5, 1))]
+        assert starts == ["2030-01-31", "2030-02-28", "2030-03-31", "2030-04-30"]
+    
+    def test_seeks_to_window(self):
+        """Test that a window far from the base date starts at the right occurrence"""
+        from app.utils import iter_occurrences
+        
+        event = Event("Standup", "Daily", "2020-01-01T09:00:00", "2020-01-01T09:15:00", recurrence="daily")
+        occurrences = list(iter_occurrences(event, datetime(2030, 6, 1, 9, 10), datetime(2030, 6, 3)))
+        assert [o.start for o in occurrences] == [
+            datetime(2030, 6, 1, 9, 0), datetime(2030, 6, 2, 9, 0)
+        ]
+        assert occurrences[0].base_id == event.id
+    
+    def test_generate_recurring_events_handles_month_end(self):
+        """Test the eager helper no longer fails for Jan 31"""
+        from app.utils import generate_recurring_events
+        
+        event = Event("Billing", "Close the books", "2030-01-31T10:00:00", "2030-01-31T11:00:00",
+                      recurrence="monthly")
+        events = generate_recurring_events(event, datetime(2030, 4, 1))
+        assert [e.start_time.day for e in events] == [31, 28, 31]
+    
+    def test_service_merges_in_start_order(self, event_service):
+        """Test that one-off and recurring occurrences are merged by start time"""
+        event_service.create_event("Weekly", "Sync", "2030-01-07T10:00:00", "2030-01-07T11:00:00", recurrence="weekly")
+        event_service.create_event("Daily", "Standup", "2030-01-01T09:00:00", "2030-01-01T09:15:00", recurrence="daily")
+        event_service.create_event("One-off", "Launch", "2030-01-15T12:00:00", "2030-01-15T13:00:00")
+        
+        occurrences = list(event_service.get_occurrences(datetime(2030, 1, 14), datetime(2030, 1, 16)))
+        starts = [o.start for o in occurrences]
+        assert starts == sorted(starts)
+        assert len(occurrences) == 4  # two standups, one weekly sync, one launch
+    
+    def test_occurrences_api(self, client):
+        """Test the occurrences endpoint"""
+        client.post('/api/events', data=json.dumps({
+            'title': 'Standup', 'description': 'Daily',
+            'start_time': '2030-01-01T09:00:00', 'end_time': '2030-01-01T09:15:00',
+            'recurrence': 'daily'
+        }), content_type='application/json')
+        
+        response = client.get('/api/events/occurrences?from=2030-02-01T00:00:00&to=2030-02-08T00:00:00')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['total'] == 7
+        assert data['data'][0]['start_time'] == '2030-02-01T09:00:00'
+        
+        limited = client.get('/api/events/occurrences?from=2030-02-01T00:00:00&to=2030-02-08T00:00:00&limit=2')
+        assert json.loads(limited.data)['total'] == 2
+        assert client.get('/api/events/occurrences').status_code == 400
+    
+    def test_occurrences_api_skips_deleted_events(self, client, monkeypatch):
+        """Test an event deleted after its occurrences were listed is skipped rather than failing the request"""
+        ids = [
+            client.post('/api/events', json={
+                'title': title, 'description': 'Daily',
+                'start_time': '2030-01-01T09:00:00', 'end_time': '2030-01-01T09:15:00'
+            }).get_json()['data']['id']
+            for title in ('Kept', 'Deleted')
+        ]
+        service = client.application.extensions['event_service']
+        lookup = service.get_event_by_id
+        monkeypatch.setattr(service, 'get_event_by_id', lambda event_id: None if event_id == ids[1] else lookup(event_id))
+        
+        response = client.get('/api/events/occurrences?from=2030-01-01T00:00:00&to=2030-01-02T00:00:00')
+        assert response.status_code == 200
+        assert [entry['event_id'] for entry in response.get_json()['data']] == [ids[0]]
+
+class TestRecurrenceAwareQueries:
+    def _create_series(self, service, start, recurrence):
+        return service.create_event(
+            title=f"{recurrence} series",
+            description="Recurring",
+            start_time=start.isoformat(),
+            end_time=(start + timedelta(minutes=30)).isoformat(),
+            recurrence=recurrence
+        )
+    
+    def test_weekly_series_shows_up_today(self, event_service):
+        """Test that a weekly event created weeks ago is in today's list"""
+        today_ten = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(hours=10)
+        event = self._create_series(event_service, today_ten - timedelta(weeks=3), 'weekly')
+        
+        assert [e.id for e in event_service.get_today_events()] == [event.id]
+        assert [o.start for o in event_service.get_today_occurrences()] == [today_ten]
+    
+    def test_daily_series_in_week_and_reminders(self, event_service):
+        """Test week occurrences and reminders for a daily series"""
+        soon = datetime.now() + timedelta(minutes=30)
+        event = self._create_series(event_service, soon - timedelta(days=10), 'daily')
+        
+        assert len(event_service.get_week_occurrences()) == 7
+        assert [e.id for e in event_service.get_week_events()] == [event.id]
+        assert [e.id for e in event_service.get_upcoming_reminders(60)] == [event.id]
+    
+    def test_update_invalidates_series(self, event_service):
+        """Test that changing the recurrence re-expands the cached occurrences"""
+        today_ten = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(hours=10)
+        event = self._create_series(event_service, today_ten - timedelta(days=2), 'daily')
+        assert [e.id for e in event_service.get_today_events()] == [event.id]
+        
+        event_service.update_event(event.id, recurrence=None)
+        assert event_service.get_today_events() == []
+        
+        event_service.delete_event(event.id)
+        assert len(event_service.occurrence_cache) == 0
+    
+    def test_cache_rolls_forward(self, event_service):
+        """Test that the horizon advances incrementally as the clock moves"""
+        from app.occurrence_cache import OccurrenceCache
+        
+        now = [datetime(2030, 1, 7, 8, 0)]  # a Monday
+        event_service.create_event("Standup", "Daily", "2030-01-01T09:00:00", "2030-01-01T09:15:00", recurrence="daily")
+        cache = OccurrenceCache(event_service, horizon_days=7, clock=lambda: now[0])
+        assert len(cache) == 7
+        
+        added = []
+        cache.add_listener(added.extend)
+        now[0] = datetime(2030, 1, 16, 8, 0)
+        
+        occurrences = cache.between(datetime(2030, 1, 16), datetime(2030, 1, 17))
+        assert [o.start for o in occurrences] == [datetime(2030, 1, 16, 9, 0)]
+        assert cache.window_start == datetime(2030, 1, 14)
+        assert [o.start.day for o in added] == [14, 15, 16, 17, 18, 19, 20, 21, 22]
+        assert min(o.start for o in cache.between(datetime(2030, 1, 14), datetime(2030, 1, 23))).day == 14
+    
+    def test_recurring_reminders_api(self, client):
+        """Test that /api/reminders includes occurrences of recurring events"""
+        soon = datetime.now() + timedelta(minutes=20)
+        client.post('/api/events', data=json.dumps({
+            'title': 'Standup', 'description': 'Daily',
+            'start_time': (soon - timedelta(days=5)).isoformat(),
+            'end_time': (soon - timedelta(days=5) + timedelta(minutes=15)).isoformat(),
+            'recurrence': 'daily'
+        }), content_type='application/json')
+        
+        data = json.loads(client.get('/api/reminders').data)
+        assert data['total'] == 1
+        assert data['data'][0]['event']['occurrence_start'] == soon.isoformat()
+
+class TestColumnarStats:
+    def test_stats_track_writes(self, event_service):
+        """Test that the columnar mirror follows creates, updates and deletes"""
+        pytest.importorskip('numpy')
+        from app.columnar import ColumnarEventStore
+        
+        first = event_service.create_event("A", "x", "2030-01-01T09:00:00", "2030-01-01T10:00:00")
+        store = ColumnarEventStore(event_service, initial_capacity=2)
+        second = event_service.create_event("B", "x", "2030-01-01T09:30:00", "2030-01-01T10:00:00", recurrence="weekly")
+        event_service.create_event("C", "x", "2030-01-02T14:00:00", "2030-01-02T14:15:00")
+        event_service.update_event(second.id, start_time="2030-01-01T09:15:00")
+        event_service.delete_event(first.id)
+        
+        stats = store.stats(datetime(2030, 1, 1), datetime(2030, 1, 3))
+        assert stats['total_events'] == 2
+        assert stats['total_scheduled_minutes'] == 45 + 15
+        assert stats['per_day'] == {'2030-01-01': 1, '2030-01-02': 1}
+        assert stats['per_hour'][9] == 1 and stats['per_hour'][14] == 1
+        assert stats['by_recurrence'] == {'none': 1, 'weekly': 1}
+        assert stats['busiest_windows'][0]['events'] == 1
+    
+    def test_tombstones_are_compacted(self, event_service):
+        """Test that deleted rows are compacted away"""
+        pytest.importorskip('numpy')
+        from app.columnar import ColumnarEventStore
+        
+        store = ColumnarEventStore(event_service)
+        events = [
+            event_service.create_event(f"E{i}", "x", f"2030-01-0{i + 1}T09:00:00", f"2030-01-0{i + 1}T10:00:00")
+            for i in range(4)
+        ]
+        for event in events[:2]:
+            event_service.delete_event(event.id)
+        
+        assert len(store) == 2
+        assert store.stats()['per_day'] == {'2030-01-03': 1, '2030-01-04': 1}
+    
+    def test_stats_api(self, client, sample_event_data):
+        """Test the stats endpoint"""
+        pytest.importorskip('numpy')
+        client.post('/api/events', data=json.dumps(sample_event_data), content_type='application/json')
+        
+        response = client.get('/api/stats')
+        assert response.status_code == 200
+        data = json.loads(response.data)['data']
+        assert data['total_events'] == 1
+        assert data['total_scheduled_minutes'] == 60
+
+class TestJournalStorage:
+    def _create(self, service, title="Journal Event"):
+        future_time = datetime.now() + timedelta(hours=2)
+        return service.create_event(
+            title=title,
+            description="Description",
+            start_time=future_time.isoformat(),
+            end_time=(future_time + timedelta(hours=1)).isoformat()
+        )
+    
+    def test_replay_after_restart(self, temp_data_file):
+        """Test that snapshot + journal are replayed on startup"""
+        service = EventService(temp_data_file)
+        kept = self._create(service, "Kept")
+        removed = self._create(service, "Removed")
+        service.update_event(kept.id, title="Kept and Updated")
+        service.delete_event(removed.id)
+        
+        reloaded = EventService(temp_data_file)
+        assert len(reloaded.events) == 1
+        assert reloaded.events[0].title == "Kept and Updated"
+    
+    def test_writes_append_to_journal(self, temp_data_file):
+        """Test that writes append to the journal instead of rewriting the snapshot"""
+        service = EventService(temp_data_file)
+        self._create(service)
+        self._create(service)
+        
+        assert os.path.getsize(temp_data_file) == 0
+        with open(temp_data_file + '.journal') as f:
+            assert len(f.readlines()) == 2
+    
+    def test_torn_journal_tail_is_ignored(self, temp_data_file):
+        """Test that a partially written journal record does not break loading"""
+        service = EventService(temp_data_file)
+        event = self._create(service)
+        with open(temp_data_file + '.journal', 'a') as f:
+            f.write('{"op": "delete", "id": "')
+        
+        torn_size = os.path.getsize(temp_data_file + '.journal')
+        reloaded = EventService(temp_data_file)
+        assert reloaded.get_event_by_id(event.id) is not None
+        # Loading only skips the torn record; the next write cuts it off
+        assert os.path.getsize(temp_data_file + '.journal') == torn_size
+        self._create(reloaded)
+        with open(temp_data_file + '.journal') as f:
+            assert [json.loads(line)['op'] for line in f] == ['create', 'create']
+        assert len(EventService(temp_data_file).events) == 2
+    
+    def test_compaction(self, temp_data_file):
+        """Test that the journal is folded into the snapshot at the threshold"""
+        service = EventService(temp_data_file, storage=JournalStorage(temp_data_file, compact_threshold=3))
+        for i in range(4):
+            self._create(service, f"Event {i}")
+        
+        with open(temp_data_file) as f:
+            assert len(json.load(f)) == 3
+        assert service.storage.journal_records == 1
+        assert len(EventService(temp_data_file).events) == 4
+    
+    def test_json_file_storage(self, temp_data_file):
+        """Test the full-rewrite backend still works"""
+        service = EventService(temp_data_file, storage=JSONFileStorage(temp_data_file))
+        self._create(service)
+        with open(temp_data_file) as f:
+            assert len(json.load(f)) == 1
+
+class TestBulkLoad:
+    def test_iter_json_array_across_chunks(self):
+        """Test streamed array parsing matches json.load for any chunk boundary"""
+        import io
+        records = [{'id': str(i), 'title': f"Caf\u00e9 {i}", 'tags': [i, {'n': None}], 'score': 1.5 * i}
+                   for i in range(20)]
+        for indent in (None, 2):
+            text = json.dumps(records, indent=indent)
+            for chunk_size in (1, 7, 64, 4096):
+                assert list(iter_json_array(io.StringIO(text), chunk_size)) == records
+        assert list(iter_json_array(io.StringIO(''))) == []
+        assert list(iter_json_array(io.StringIO(' [ ] '))) == []
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.StringIO('[{"id": 1}, {"id"'), 4))
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.StringIO('{"id": 1}')))
+    
+    def test_from_stored_matches_from_dict(self):
+        """Test the trusted loader rebuilds the same event, and falls back for other records"""
+        event = Event("Stored", "Text", "2030-01-01T09:00:00.5", "2030-01-01T10:00:00", recurrence="daily")
+        record = event.to_dict()
+        assert Event.from_stored(record).to_dict() == Event.from_dict(record).to_dict() == record
+        
+        aware = dict(record, start_time="2030-01-01T09:00:00+02:00", end_time="2030-01-01T10:00:00+02:00")
+        assert Event.from_stored(aware).to_dict() == Event.from_dict(aware).to_dict()
+        with pytest.raises(ValueError):
+            Event.from_stored(dict(record, end_time="2029-01-01T10:00:00"))
+        with pytest.raises(KeyError):
+            Event.from_stored({'id': 'partial'})
+    
+    def test_load_streams_snapshot_with_journal(self, temp_data_file):
+        """Test startup applies journaled updates, deletes and creates to the streamed snapshot"""
+        service = EventService(temp_data_file)
+        events = [service.create_event(f"Event {i}", "Loaded", f"2030-01-0{i + 1}T09:00:00",
+                                       f"2030-01-0{i + 1}T10:00:00") for i in range(4)]
+        service._save_events()
+        service.update_event(events[1].id, title="Renamed")
+        service.delete_event(events[2].id)
+        service.create_event("Journal Only", "Loaded", "2030-01-09T09:00:00", "2030-01-09T10:00:00")
+        
+        reloaded = EventService(temp_data_file)
+        assert [event.title for event in reloaded.events] == ["Event 0", "Renamed", "Event 3", "Journal Only"]
+        assert [event.title for event in reloaded.search_events("renamed")] == ["Renamed"]
+        assert len(reloaded.find_conflicts(datetime(2030, 1, 1), datetime(2030, 2, 1))) == 4
+
+class TestWriteBehindStorage:
+    def _create(self, service, title="Deferred"):
+        return service.create_event(
+            title=title,
+            description="Description",
+            start_time="2030-01-01T09:00:00",
+            end_time="2030-01-01T10:00:00"
+        )
+    
+    def _persisted_titles(self, temp_data_file):
+        return sorted(record['title'] for record in JournalStorage(temp_data_file).load())
+    
+    def test_group_commit_is_durable_on_return(self, temp_data_file):
+        """Test group durability batches concurrent writers and returns only once written"""
+        storage = WriteBehindStorage(JournalStorage(temp_data_file), durability='group')
+        service = EventService(temp_data_file, storage=storage)
+        
+        not_durable = []
+        errors = []
+        
+        def writer(i):
+            try:
+                event = self._create(service, f"Event {i}")
+                # Already on disk once create_event returns; loading never modifies the files
+                if event.id not in {record['id'] for record in JournalStorage(temp_data_file).load()}:
+                    not_durable.append(event.id)
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        assert not any(thread.is_alive() for thread in threads)
+        assert errors == [] and not_durable == []
+        assert len(self._persisted_titles(temp_data_file)) == 20
+        assert 1 <= storage.flushes <= 20
+        service.close()
+    
+    def test_async_flushes_on_close(self, temp_data_file):
+        """Test async durability acknowledges at once and flushes pending writes on close"""
+        storage = WriteBehindStorage(JournalStorage(temp_data_file), durability='async', flush_interval=60)
+        service = EventService(temp_data_file, storage=storage)
+        event = self._create(service, "First")
+        service.update_event(event.id, title="First Updated")
+        self._create(service, "Second")
+        
+        # Both writes to the first event collapsed into one queued operation
+        assert storage.pending == 2
+        assert self._persisted_titles(temp_data_file) == []
+        
+        service.close()
+        assert self._persisted_titles(temp_data_file) == ["First Updated", "Second"]
+    
+    def test_async_flushes_at_dirty_threshold(self, temp_data_file):
+        """Test async durability flushes early once enough writes are queued"""
+        storage = WriteBehindStorage(JournalStorage(temp_data_file), durability='async',
+                                     flush_interval=60, max_pending=5)
+        service = EventService(temp_data_file, storage=storage)
+        for i in range(5):
+            self._create(service, f"Event {i}")
+        
+        deadline = datetime.now() + timedelta(seconds=5)
+        while storage.flushes == 0 and datetime.now() < deadline:
+            threading.Event().wait(0.01)
+        assert storage.flushes == 1
+        assert len(self._persisted_titles(temp_data_file)) == 5
+        service.close()
+    
+    def test_failed_flush_is_reported_and_retried(self, temp_data_file):
+        """Test a failing flush raises to group writers and keeps the writes queued"""
+        class FlakyStorage(JournalStorage):
+            failures = 1
+            
+            def record_batch(self, operations):
+                if self.failures:
+                    self.failures -= 1
+                    raise OSError("disk full")
+                super().record_batch(operations)
+        
+        storage = WriteBehindStorage(FlakyStorage(temp_data_file), durability='group', flush_interval=0.01)
+        service = EventService(temp_data_file, storage=storage)
+        with pytest.raises(OSError):
+            self._create(service, "Retried")
+        self._create(service, "Next")
+        assert self._persisted_titles(temp_data_file) == ["Next", "Retried"]
+        service.close()
+    
+    def test_create_storage_durability(self, temp_data_file):
+        """Test the DURABILITY setting selects the write path"""
+        assert isinstance(create_storage({'DURABILITY': 'sync'}, temp_data_file), JournalStorage)
+        storage = create_storage({'DURABILITY': 'async', 'FLUSH_INTERVAL': 1}, temp_data_file)
+        assert isinstance(storage, WriteBehindStorage) and isinstance(storage.backend, JournalStorage)
+        storage.close()
+        with pytest.raises(ValueError):
+            create_storage({'DURABILITY': 'eventually'}, temp_data_file)
+
+class TestMultiProcess:
+    def _create(self, service, title):
+        return service.create_event(
+            title=title,
+            description="Shared",
+            start_time="2030-01-01T09:00:00",
+            end_time="2030-01-01T10:00:00"
+        )
+    
+    def test_refresh_picks_up_other_writers(self, temp_data_file):
+        """Test a shared service replays another writer's journal entries"""
+        first = EventService(temp_data_file, shared=True)
+        second = EventService(temp_data_file, shared=True)
+        assert second.search_events("alpha") == []
+        
+        event = self._create(first, "Alpha")
+        assert second.refresh() is True
+        assert second.refresh() is False
+        assert [match.id for match in second.search_events("alpha")] == [event.id]
+        
+        second.update_event(event.id, title="Alpha Renamed")
+        first.delete_event(event.id)
+        assert second.refresh() is True
+        assert second.get_event_by_id(event.id) is None
+    
+    def test_writes_catch_up_first(self, temp_data_file):
+        """Test a write first applies other writers' changes, so none are lost"""
+        first = EventService(temp_data_file, shared=True)
+        second = EventService(temp_data_file, shared=True)
+        kept = self._create(first, "From First")
+        self._create(second, "From Second")
+        
+        assert second.get_event_by_id(kept.id) is not None
+        assert second.refresh() is False
+        assert sorted(event.title for event in EventService(temp_data_file).events) == ["From First", "From Second"]
+    
+    def test_reload_after_compaction(self, temp_data_file):
+        """Test a snapshot replaced by another writer triggers a full reload"""
+        first = EventService(temp_data_file, storage=JournalStorage(temp_data_file, compact_threshold=3), shared=True)
+        second = EventService(temp_data_file, shared=True)
+        removed = self._create(second, "Removed")
+        for i in range(3):
+            self._create(first, f"Event {i}")
+        first.delete_event(removed.id)
+        
+        assert second.refresh() is True
+        assert sorted(event.title for event in second.events) == ["Event 0", "Event 1", "Event 2"]
+    
+    def test_separate_process(self, temp_data_file):
+        """Test writes from another OS process are seen after refresh"""
+        service = EventService(temp_data_file, shared=True)
+        script = (
+            "import sys; from app.services import EventService; "
+            "EventService(sys.argv[1], shared=True).create_event("
+            "'Child', 'Shared', '2030-01-01T09:00:00', '2030-01-01T10:00:00')"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, '-c', script, temp_data_file], cwd=root, check=True)
+        
+        assert service.refresh() is True
+        assert [event.title for event in service.events] == ["Child"]
+    
+    def test_leader_lock(self, temp_data_file):
+        """Test only one holder of the leader lock fires reminders"""
+        from app.reminder_scheduler import ReminderScheduler
+        
+        service = EventService(temp_data_file)
+        leader = ReminderScheduler(service, leader_lock=FileLock(temp_data_file + '.leader'))
+        follower = ReminderScheduler(service, leader_lock=FileLock(temp_data_file + '.leader'))
+        assert leader.leader_lock.acquire(blocking=False)
+        assert not follower.leader_lock.acquire(blocking=False)
+        assert leader.is_leader and not follower.is_leader
+        assert follower.get_status()['leader'] is False
+        
+        # The follower takes over once the leader lets go
+        leader.leader_lock.release()
+        assert follower.leader_lock.acquire(blocking=False)
+        follower.leader_lock.release()
+    
+    def test_api_sees_other_workers(self, temp_data_file):
+        """Test each request checks for writes made by other workers"""
+        class SharedConfig(TestConfig):
+            DATA_FILE = temp_data_file
+            MULTI_PROCESS = True
+        
+        client = create_app(SharedConfig).test_client()
+        first = client.get('/api/events')
+        other_worker = EventService(temp_data_file, shared=True)
+        self._create(other_worker, "Elsewhere")
+        
+        response = client.get('/api/events', headers={'If-None-Match': first.headers['ETag']})
+        assert response.status_code == 200
+        assert [event['title'] for event in response.get_json()['data']] == ["Elsewhere"]
+
 class TestAPI:
     def test_create_event_api(self, client, sample_event_data):
         """Test event creation via API"""
@@ -258,6 +1083,23 @@ class TestAPI:
         assert response.status_code == 400
         data = json.loads(response.data)
         assert data['success'] is False
+    
+    def test_text_fields_must_be_strings(self, client, sample_event_data):
+        """Test a non-string title or description is a 400 and leaves the event unchanged"""
+        response = client.post('/api/events', data=json.dumps(dict(sample_event_data, title=123)),
+                               content_type='application/json')
+        assert response.status_code == 400
+        
+        event_id = json.loads(client.post('/api/events', data=json.dumps(sample_event_data),
+                                          content_type='application/json').data)['data']['id']
+        for update in ({'title': 123}, {'description': ['x']}):
+            response = client.put(f'/api/events/{event_id}', data=json.dumps(update), content_type='application/json')
+            assert response.status_code == 400
+        
+        response = client.get(f'/api/events/{event_id}')
+        assert response.status_code == 200
+        assert json.loads(response.data)['data']['title'] == sample_event_data['title']
+        assert len(json.loads(client.get('/api/events').data)['data']) == 1
 
 class TestAdvancedSearch:
     def test_search_by_date_range(self, event_service):
@@ -451,6 +1293,65 @@ class TestReminderScheduler:
         assert status['check_interval'] == 60
         assert status['tracked_events'] == 0
 
+class TestEventDrivenScheduler:
+    def _wait_for(self, condition, timeout=2.0):
+        import time
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if condition():
+                return True
+            time.sleep(0.01)
+        return False
+    
+    def _create(self, service, start):
+        return service.create_event(
+            title="Reminder Event",
+            description="Description",
+            start_time=start.isoformat(),
+            end_time=(start + timedelta(hours=1)).isoformat()
+        )
+    
+    def test_new_event_wakes_scheduler(self, event_service):
+        """Test that creating a due event fires without waiting for check_interval"""
+        from app.reminder_scheduler import ReminderScheduler
+        
+        scheduler = ReminderScheduler(event_service, check_interval=3600)
+        scheduler.start()
+        try:
+            event = self._create(event_service, datetime.now() + timedelta(minutes=30))
+            assert self._wait_for(lambda: (event.id, event.start_time, 60) in scheduler.ledger)
+        finally:
+            scheduler.stop()
+    
+    def test_fires_at_reminder_time(self, event_service):
+        """Test that the thread sleeps until the exact fire time"""
+        import time
+        from app.reminder_scheduler import ReminderScheduler
+        
+        scheduler = ReminderScheduler(event_service, check_interval=3600)
+        scheduler.start()
+        try:
+            started = time.monotonic()
+            event = self._create(event_service, datetime.now() + timedelta(minutes=60, seconds=0.3))
+            assert scheduler.get_status()['pending_reminders'] == 1
+            assert self._wait_for(lambda: (event.id, event.start_time, 60) in scheduler.ledger)
+            assert time.monotonic() - started >= 0.25
+        finally:
+            scheduler.stop()
+    
+    def test_deleted_event_is_not_reminded(self, event_service):
+        """Test that deleting an event drops its pending reminder"""
+        from app.reminder_scheduler import ReminderScheduler
+        
+        event = self._create(event_service, datetime.now() + timedelta(minutes=60, seconds=0.2))
+        scheduler = ReminderScheduler(event_service, check_interval=3600)
+        scheduler.start()
+        try:
+            event_service.delete_event(event.id)
+            assert not self._wait_for(lambda: (event.id, event.start_time, 60) in scheduler.ledger, timeout=0.5)
+        finally:
+            scheduler.stop()
+
 class TestNewAPIEndpoints:
     def test_get_today_events_api(self, client, sample_event_data):
         """Test getting today's events via API"""
@@ -527,5 +1428,1381 @@ class TestNewAPIEndpoints:
         assert 'data' in data
         assert 'running' in data['data']
 
+@pytest.fixture
+def sqlite_database(temp_data_file):
+    """Path to a throwaway SQLite database"""
+    path = temp_data_file + '.db'
+    yield path
+    for suffix in ('', '-wal', '-shm', '.reminders'):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+class SQLiteBackendMixin:
+    """Re-runs the inherited service tests against SQLiteEventService"""
+    @pytest.fixture
+    def event_service(self, sqlite_database):
+        service = SQLiteEventService(sqlite_database)
+        yield service
+        service.close()
+
+class TestSQLiteEventService(SQLiteBackendMixin, TestEventService):
+    def test_persists_across_connections(self, event_service, sqlite_database):
+        """Test that events survive reopening the database"""
+        future_time = datetime.now() + timedelta(hours=2)
+        event = event_service.create_event(
+            title="Stored Event",
+            description="Description",
+            start_time=future_time.isoformat(),
+            end_time=(future_time + timedelta(hours=1)).isoformat()
+        )
+        
+        reopened = SQLiteEventService(sqlite_database)
+        assert reopened.get_event_by_id(event.id).title == "Stored Event"
+        reopened.close()
+    
+    def test_migrates_from_json(self, temp_data_file, sqlite_database):
+        """Test that an empty database is populated from events.json"""
+        json_service = EventService(temp_data_file)
+        future_time = datetime.now() + timedelta(hours=2)
+        event = json_service.create_event(
+            title="Migrated Event",
+            description="Description",
+            start_time=future_time.isoformat(),
+            end_time=(future_time + timedelta(hours=1)).isoformat(),
+            recurrence="weekly"
+        )
+        
+        service = SQLiteEventService(sqlite_database, json_file=temp_data_file)
+        migrated = service.get_event_by_id(event.id)
+        assert migrated.title == "Migrated Event"
+        assert migrated.recurrence == "weekly"
+        service.close()
+    
+    def test_refresh_replays_other_writers(self, event_service, sqlite_database):
+        """Test refresh notifies listeners of writes made through another service"""
+        other = SQLiteEventService(sqlite_database)
+        changes = []
+        event_service.add_listener(lambda op, event: changes.append((op, event.title)))
+        assert event_service.refresh() is False
+        
+        start = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        kept = other.create_event("Kept", "", start.isoformat(), (start + timedelta(hours=1)).isoformat())
+        removed = other.create_event("Removed", "", start.isoformat(), (start + timedelta(hours=1)).isoformat())
+        other.update_event(kept.id, title="Kept and Updated")
+        other.delete_event(removed.id)
+        
+        assert event_service.refresh() is True
+        assert changes == [('create', "Kept"), ('create', "Removed"), ('update', "Kept and Updated"),
+                           ('delete', "Removed")]
+        assert [event.title for event in event_service.get_today_events()] == ["Kept and Updated"]
+        assert [change.op for change in event_service.changelog.since(0)] == ['create', 'create', 'update', 'delete']
+        assert event_service.refresh() is False
+        
+        # Its own writes are not replayed
+        event_service.create_event("Local", "", start.isoformat(), (start + timedelta(hours=1)).isoformat())
+        other.refresh()
+        assert event_service.refresh() is False
+        assert len(changes) == 5
+        other.close()
+    
+    def test_refresh_after_pruned_changes_rebuilds(self, event_service, sqlite_database):
+        """Test a service that missed pruned changes rebuilds its occurrences and asks for a resync"""
+        other = SQLiteEventService(sqlite_database, change_retention=2)
+        start = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        event_service.create_event("Local", "", start.isoformat(), (start + timedelta(hours=1)).isoformat())
+        event_service.refresh()
+        for i in range(4):
+            other.create_event(f"Event {i}", "", start.isoformat(), (start + timedelta(hours=1)).isoformat())
+        
+        version = event_service.version
+        assert event_service.refresh() is True
+        assert event_service.version > version
+        assert len(event_service.get_today_events()) == 5
+        with pytest.raises(ResyncRequired):
+            event_service.changelog.since(0)
+        other.close()
+
+class TestSQLiteAdvancedSearch(SQLiteBackendMixin, TestAdvancedSearch):
+    pass
+
+class TestTextSearch:
+    def _create(self, service, title, description, hours=1, recurrence=None):
+        start = datetime(2030, 1, 1, 9, 0) + timedelta(hours=hours)
+        return service.create_event(
+            title=title,
+            description=description,
+            start_time=start.isoformat(),
+            end_time=(start + timedelta(hours=1)).isoformat(),
+            recurrence=recurrence
+        )
+    
+    def test_prefix_and_multi_term(self, event_service):
+        """Test that terms match word prefixes and are ANDed"""
+        self._create(event_service, "Team Meeting", "Weekly sync", hours=1)
+        self._create(event_service, "Client Meeting", "Contract review", hours=2)
+        self._create(event_service, "Team Lunch", "Pizza", hours=3)
+        
+        assert [e.title for e in event_service.search_events("meet")] == ["Team Meeting", "Client Meeting"]
+        assert [e.title for e in event_service.search_events("team meet")] == ["Team Meeting"]
+        assert event_service.search_events("team dinner") == []
+    
+    def test_index_follows_updates_and_deletes(self, event_service):
+        """Test that the text index is maintained on update and delete"""
+        event = self._create(event_service, "Planning", "Quarterly roadmap")
+        event_service.update_event(event.id, title="Retrospective")
+        
+        assert event_service.search_events("planning") == []
+        assert [e.id for e in event_service.search_events("retro")] == [event.id]
+        
+        event_service.delete_event(event.id)
+        assert event_service.search_events("retro") == []
+    
+    def test_relevance_ordering(self, event_service):
+        """Test relevance ordering ranks title matches first"""
+        self._create(event_service, "Lunch", "Budget chat over lunch", hours=1)
+        self._create(event_service, "Budget Review", "Numbers", hours=2)
+        
+        by_time = event_service.search_events("budget")
+        by_relevance = event_service.search_events("budget", order_by='relevance')
+        assert [e.title for e in by_time] == ["Lunch", "Budget Review"]
+        assert [e.title for e in by_relevance] == ["Budget Review", "Lunch"]
+    
+    def test_same_semantics_on_every_backend(self, event_service):
+        """Test word-prefix matching and TF-IDF ranking, which every backend re-runs"""
+        self._create(event_service, "Party", "Review of the team_sync notes", hours=1)
+        self._create(event_service, "Été planning", "Pre-read attached", hours=2)
+        
+        cases = {
+            "art": [],
+            "view": [],
+            "sync": [],
+            "rev": ["Party"],
+            "team_sy": ["Party"],
+            "read": ["Été planning"],
+            "ÉTÉ": ["Été planning"],
+            "plan pre": ["Été planning"],
+        }
+        for query, titles in cases.items():
+            assert [e.title for e in event_service.search_events(query)] == titles, query
+            assert event_service.count_events(query=query) == len(titles), query
+            assert [e.title for e in event_service.get_events_page(10, query=query)] == titles, query
+        
+        # Both match both terms once in the title; term frequency and rarity decide
+        self._create(event_service, "Budget", "Plan", hours=3)
+        self._create(event_service, "Plan", "Budget budget budget", hours=4)
+        self._create(event_service, "Plan B", "", hours=5)
+        by_relevance = event_service.search_events("budget plan", order_by='relevance')
+        assert [e.title for e in by_relevance] == ["Plan", "Budget"]
+    
+    def test_combined_with_filters(self, event_service):
+        """Test that text matches intersect with date and recurrence filters"""
+        self._create(event_service, "Standup", "Daily sync", hours=1, recurrence="daily")
+        self._create(event_service, "Standup", "Ad hoc sync", hours=30)
+        
+        events = event_service.search_events(
+            "standup",
+            start_date=datetime(2030, 1, 1, 12, 0).isoformat(),
+            recurrence=None
+        )
+        assert [e.description for e in events] == ["Ad hoc sync"]
+        
+        events = event_service.search_events("sync", recurrence="daily")
+        assert [e.description for e in events] == ["Daily sync"]
+
+class TestSQLiteTextSearch(SQLiteBackendMixin, TestTextSearch):
+    pass
+
+class TestSQLiteOccurrences(SQLiteBackendMixin, TestOccurrences):
+    pass
+
+class TestSQLiteRecurrenceAwareQueries(SQLiteBackendMixin, TestRecurrenceAwareQueries):
+    pass
+
+class TestSQLiteDateBasedQueries(SQLiteBackendMixin, TestDateBasedQueries):
+    pass
+
+class TestPagination:
+    def _create_many(self, service, count):
+        base = datetime(2030, 1, 1, 9, 0)
+        events = []
+        for i in range(count):
+            # Pairs of events share a start time so ties are broken by id
+            start = base + timedelta(hours=i // 2)
+            events.append(service.create_event(
+                title=f"Event {i}",
+                description=f"Description {i}",
+                start_time=start.isoformat(),
+                end_time=(start + timedelta(minutes=30)).isoformat(),
+                recurrence="weekly" if i % 3 == 0 else None
+            ))
+        return sorted(events, key=lambda e: (e.start_time, e.id))
+    
+    def _pages(self, service, limit, **filters):
+        ids, after = [], None
+        while True:
+            page = service.get_events_page(limit, after=after, **filters)
+            ids.extend(event.id for event in page)
+            if len(page) < limit:
+                return ids
+            after = (page[-1].start_time, page[-1].id)
+    
+    def test_pages_cover_every_event_once(self, event_service):
+        """Test that walking the pages yields every event once, in (start_time, id) order"""
+        events = self._create_many(event_service, 11)
+        
+        assert self._pages(event_service, 3) == [event.id for event in events]
+        assert event_service.count_events() == 11
+    
+    def test_pages_with_filters(self, event_service):
+        """Test that pages respect the search filters"""
+        events = self._create_many(event_service, 12)
+        weekly = [event.id for event in events if event.recurrence == "weekly"]
+        later = [event.id for event in events if event.start_time >= datetime(2030, 1, 1, 11, 0)]
+        
+        assert self._pages(event_service, 2, recurrence="weekly") == weekly
+        assert self._pages(event_service, 2, start_date="2030-01-01T11:00:00") == later
+        assert event_service.count_events(start_date="2030-01-01T11:00:00") == len(later)
+    
+    def test_cursor_survives_deleting_the_last_event(self, event_service):
+        """Test that a page resumes correctly after the event it ended on is deleted"""
+        events = self._create_many(event_service, 6)
+        first = event_service.get_events_page(2)
+        event_service.delete_event(first[-1].id)
+        
+        rest = event_service.get_events_page(10, after=(first[-1].start_time, first[-1].id))
+        assert [event.id for event in rest] == [event.id for event in events[2:]]
+    
+    def test_cursor_pagination_api(self, client, sample_event_data):
+        """Test limit/cursor, field projection and include_total on GET /api/events"""
+        for i in range(5):
+            client.post('/api/events', json=dict(sample_event_data, title=f"Event {i}"))
+        
+        response = client.get('/api/events?limit=2&fields=id,title&include_total=true')
+        data = json.loads(response.data)
+        assert response.status_code == 200
+        assert data['total'] == 5
+        assert data['has_more'] is True
+        assert all(set(event) == {'id', 'title'} for event in data['data'])
+        
+        seen = [event['id'] for event in data['data']]
+        while data['next_cursor']:
+            response = client.get(f"/api/events?limit=2&fields=id&cursor={data['next_cursor']}")
+            data = json.loads(response.data)
+            assert 'total' not in data
+            seen.extend(event['id'] for event in data['data'])
+        assert len(seen) == len(set(seen)) == 5
+        
+        assert client.get('/api/events?cursor=not-a-cursor').status_code == 400
+        assert client.get('/api/events?fields=id,colour').status_code == 400
+        assert client.get('/api/events?limit=0').status_code == 400
+        
+        # A crafted cursor with an offset is read as local time, like the start/end filters
+        from app.utils import encode_cursor
+        crafted = encode_cursor(datetime(2000, 1, 1, tzinfo=timezone.utc), '')
+        response = client.get(f"/api/events?limit=10&fields=id&cursor={crafted}")
+        assert response.status_code == 200 and len(json.loads(response.data)['data']) == 5
+
+class TestStreaming:
+    def _create_many(self, client, count):
+        start = datetime.now() + timedelta(minutes=90)
+        for i in range(count):
+            client.post('/api/events', json={
+                'title': f"Event {i}",
+                'description': "x" * 50,
+                'start_time': (start + timedelta(minutes=i)).isoformat(),
+                'end_time': (start + timedelta(minutes=i + 30)).isoformat()
+            })
+    
+    def test_envelope_and_chunks(self):
+        """Test the streamed envelope is valid JSON and chunks stay near the chunk size"""
+        items = ({'n': i} for i in range(100))
+        pieces = list(json_envelope(items, {'success': True}))
+        assert json.loads(''.join(pieces)) == {'success': True, 'data': [{'n': i} for i in range(100)], 'total': 100}
+        
+        chunks = list(chunked(pieces, 64))
+        assert b''.join(chunks) == ''.join(pieces).encode()
+        assert all(len(chunk) < 64 + 16 for chunk in chunks)
+    
+    def test_streamed_events_match_buffered(self, client):
+        """Test ?stream=true returns the same body as the buffered endpoint"""
+        self._create_many(client, 5)
+        
+        buffered = json.loads(client.get('/api/events?fields=id,title').data)
+        response = client.get('/api/events?fields=id,title&stream=true')
+        streamed = json.loads(response.data)
+        assert streamed['data'] == buffered['data']
+        assert streamed['total'] == 5
+    
+    def test_gzip_threshold(self, client):
+        """Test streamed bodies are gzipped only above the minimum size"""
+        response = client.get('/api/events?stream=true', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+        assert json.loads(response.data)['total'] == 0
+        
+        self._create_many(client, 30)
+        response = client.get('/api/events?stream=true', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert json.loads(gzip.decompress(response.data))['total'] == 30
+    
+    def test_ndjson(self, client):
+        """Test Accept: application/x-ndjson streams one event per line"""
+        self._create_many(client, 3)
+        
+        for url in ('/api/events', '/api/reminders?minutes=120'):
+            response = client.get(url, headers={'Accept': 'application/x-ndjson'})
+            assert response.mimetype == 'application/x-ndjson'
+            lines = response.data.decode().splitlines()
+            assert len(lines) == 3
+            assert all(json.loads(line) for line in lines)
+    
+    def test_streamed_reminders(self, client):
+        """Test the reminders envelope keeps its extra fields when streamed"""
+        self._create_many(client, 2)
+        
+        data = json.loads(client.get('/api/reminders?minutes=120&stream=true').data)
+        assert data['check_interval_minutes'] == 120
+        assert data['total'] == 2
+        assert data['data'][0]['message'].startswith('REMINDER')
+
+class TestConditionalGet:
+    def test_version_bumps_on_writes(self, event_service, sample_event_data):
+        """Test the store version grows with every create, update and delete"""
+        assert event_service.version == 0
+        event = event_service.create_event(**sample_event_data)
+        event_service.update_event(event.id, title="Renamed")
+        event_service.delete_event(event.id)
+        assert event_service.version == 3
+    
+    def test_if_none_match(self, client, sample_event_data):
+        """Test a matching If-None-Match gets 304 until the data changes"""
+        response = client.get('/api/events')
+        etag = response.headers['ETag']
+        assert response.headers['Last-Modified']
+        
+        response = client.get('/api/events', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+        
+        # Other query parameters get their own tag
+        assert client.get('/api/events?search=test').headers['ETag'] != etag
+        
+        client.post('/api/events', json=sample_event_data)
+        response = client.get('/api/events', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+    
+    def test_time_dependent_endpoints(self, client, sample_event_data):
+        """Test today/week/reminders are tagged per time bucket and revalidate after writes"""
+        for url in ('/api/events/today', '/api/events/week', '/api/reminders'):
+            etag = client.get(url).headers['ETag']
+            assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+        
+        etags = {url: client.get(url).headers['ETag'] for url in ('/api/events/today', '/api/events/week')}
+        assert len(set(etags.values())) == 2
+        
+        client.post('/api/events', json=sample_event_data)
+        for url, etag in etags.items():
+            assert client.get(url, headers={'If-None-Match': etag}).status_code == 200
+    
+    def test_errors_are_not_tagged(self, client):
+        """Test error responses carry no ETag"""
+        response = client.get('/api/events/missing')
+        assert response.status_code == 404
+        assert 'ETag' not in response.headers
+
+class TestQueryCache:
+    def _create(self, service, title, day, recurrence=None):
+        start = datetime(2030, 1, day, 9, 0)
+        return service.create_event(
+            title=title,
+            description="Cached query",
+            start_time=start.isoformat(),
+            end_time=(start + timedelta(hours=1)).isoformat(),
+            recurrence=recurrence
+        )
+    
+    def test_hits_and_misses(self, event_service):
+        """Test repeated queries are served from the cache"""
+        self._create(event_service, "Planning", 1)
+        cache = event_service.query_cache
+        
+        first = event_service.search_events("plan")
+        second = event_service.search_events("PLAN")
+        assert [e.id for e in first] == [e.id for e in second]
+        assert (cache.hits, cache.misses) == (1, 1)
+    
+    def test_selective_invalidation(self, event_service):
+        """Test a write only drops entries its event could belong to"""
+        event = self._create(event_service, "January", 5)
+        window = dict(start_date="2030-01-01T00:00:00", end_date="2030-01-10T00:00:00")
+        assert len(event_service.search_events(**window)) == 1
+        assert event_service.search_events("standup") == []
+        
+        # Outside the window and not matching the text: both entries survive
+        self._create(event_service, "February", 20)
+        assert len(event_service.query_cache) == 2
+        
+        # A matching event drops the text query but not the window
+        self._create(event_service, "Standup", 25)
+        assert len(event_service.query_cache) == 1
+        assert [e.title for e in event_service.search_events("standup")] == ["Standup"]
+        
+        # Moving a cached event out of the window drops the window entry
+        event_service.update_event(event.id, start_time="2030-01-15T09:00:00", end_time="2030-01-15T10:00:00")
+        assert event_service.search_events(**window) == []
+    
+    def test_date_range_and_deletes(self, event_service):
+        """Test cached date-range results follow deletes"""
+        event = self._create(event_service, "Review", 3)
+        start, end = datetime(2030, 1, 1), datetime(2030, 1, 31)
+        assert len(event_service.get_events_by_date_range(start, end)) == 1
+        
+        event_service.delete_event(event.id)
+        assert event_service.get_events_by_date_range(start, end) == []
+    
+    def test_lru_eviction(self, temp_data_file):
+        """Test the least recently used entry is evicted first"""
+        service = EventService(temp_data_file, query_cache_size=2)
+        service.search_events("a")
+        service.search_events("b")
+        service.search_events("a")
+        service.search_events("c")
+        
+        service.search_events("a")
+        assert service.query_cache.hits == 2
+        service.search_events("b")
+        assert service.query_cache.misses == 4
+    
+    def test_cache_stats_api(self, client):
+        """Test the cache counters are exposed"""
+        client.get('/api/events?search=x')
+        client.get('/api/events?search=x')
+        data = json.loads(client.get('/api/cache/stats').data)['data']
+        assert data['enabled'] is True
+        assert data['hits'] >= 1
+
+class TestSQLiteQueryCache(SQLiteBackendMixin, TestQueryCache):
+    pass
+
+class TestBatchOperations:
+    def _items(self, count):
+        start = datetime(2030, 1, 1, 9, 0)
+        return [
+            {
+                'title': f"Imported {i}",
+                'description': "From the team calendar",
+                'start_time': (start + timedelta(hours=i)).isoformat(),
+                'end_time': (start + timedelta(hours=i, minutes=30)).isoformat()
+            }
+            for i in range(count)
+        ]
+    
+    def test_create_update_delete(self, event_service):
+        """Test the batch methods apply every item"""
+        events = event_service.create_events(self._items(3))
+        assert len(event_service.get_all_events()) == 3
+        
+        updated = event_service.update_events([
+            {'id': events[0].id, 'title': "Renamed"},
+            {'id': events[1].id, 'start_time': "2030-02-01T09:00:00", 'end_time': "2030-02-01T10:00:00"}
+        ])
+        assert [event.id for event in updated] == [events[0].id, events[1].id]
+        assert event_service.get_event_by_id(events[0].id).title == "Renamed"
+        assert event_service.get_event_by_id(events[1].id).start_time == datetime(2030, 2, 1, 9, 0)
+        
+        event_service.delete_events([events[0].id, events[2].id])
+        assert [event.id for event in event_service.get_all_events()] == [events[1].id]
+    
+    def test_invalid_batch_changes_nothing(self, event_service):
+        """Test a batch with any invalid item is rejected as a whole"""
+        items = self._items(3)
+        del items[1]['title']
+        items[2]['end_time'] = items[2]['start_time']
+        with pytest.raises(BatchValidationError) as excinfo:
+            event_service.create_events(items)
+        assert sorted(excinfo.value.errors) == [1, 2]
+        assert event_service.get_all_events() == []
+        
+        event = event_service.create_events(self._items(1))[0]
+        with pytest.raises(BatchValidationError) as excinfo:
+            event_service.update_events([{'id': event.id, 'title': "Changed"}, {'id': "missing"}])
+        assert list(excinfo.value.errors) == [1]
+        assert event_service.get_event_by_id(event.id).title == "Imported 0"
+        
+        # Field types are checked for every item before the first one is applied
+        other = event_service.create_events(self._items(1))[0]
+        notified = []
+        event_service.add_listener(lambda op, changed: notified.append(op))
+        for bad in ({'recurrence': 7}, {'title': 123}, {'description': None}, {'start_time': 9}):
+            with pytest.raises(BatchValidationError) as excinfo:
+                event_service.update_events([{'id': event.id, 'title': "Changed"}, dict(bad, id=other.id)])
+            assert list(excinfo.value.errors) == [1]
+        assert event_service.get_event_by_id(event.id).title == "Imported 0"
+        assert event_service.search_events(query="Changed") == [] and notified == []
+        
+        with pytest.raises(BatchValidationError):
+            event_service.delete_events([event.id, event.id])
+        assert event_service.get_event_by_id(event.id) is not None
+    
+    def test_batch_persists_once(self, temp_data_file):
+        """Test a batch is one journal line and survives a restart"""
+        service = EventService(temp_data_file)
+        events = service.create_events(self._items(50))
+        with open(temp_data_file + '.journal') as f:
+            assert len(f.readlines()) == 1
+        
+        reloaded = EventService(temp_data_file)
+        assert {event.id for event in reloaded.get_all_events()} == {event.id for event in events}
+    
+    def test_batch_api(self, client):
+        """Test POST/PATCH/DELETE /api/events/batch"""
+        response = client.post('/api/events/batch', json={'events': self._items(3)})
+        assert response.status_code == 201
+        results = json.loads(response.data)['results']
+        ids = [result['data']['id'] for result in results]
+        
+        response = client.patch('/api/events/batch', json=[{'id': ids[0], 'title': "Renamed"}])
+        assert response.status_code == 200
+        response = client.patch('/api/events/batch', json=[{'id': ids[1], 'title': "Lost"}, {'id': ids[2], 'recurrence': 7}])
+        assert response.status_code == 400
+        
+        response = client.delete('/api/events/batch', json={'ids': [ids[1], "missing"]})
+        data = json.loads(response.data)
+        assert response.status_code == 400
+        assert data['errors'] == [{'index': 1, 'error': "Event not found: missing"}]
+        
+        response = client.delete('/api/events/batch', json={'ids': ids[1:]})
+        assert response.status_code == 200
+        remaining = json.loads(client.get('/api/events').data)['data']
+        assert [(event['id'], event['title']) for event in remaining] == [(ids[0], "Renamed")]
+
+class TestSQLiteBatchOperations(SQLiteBackendMixin, TestBatchOperations):
+    pass
+
+class TestSQLitePagination(SQLiteBackendMixin, TestPagination):
+    pass
+
+class TestConcurrency:
+    def test_read_write_lock(self):
+        """Test the lock is reentrant and refuses read-to-write upgrades"""
+        lock = ReadWriteLock()
+        with lock.write_locked():
+            with lock.write_locked():
+                with lock.read_locked():
+                    pass
+        with lock.read_locked():
+            with lock.read_locked():
+                with pytest.raises(RuntimeError):
+                    lock.acquire_write()
+        # Fully released, so another thread can write
+        writer = threading.Thread(target=lambda: lock.write_locked().__enter__())
+        writer.start()
+        writer.join(timeout=5)
+        assert not writer.is_alive()
+    
+    def test_readers_do_not_wait_for_persistence(self, temp_data_file):
+        """Test queries run while a write is blocked in the storage backend"""
+        entered, release = threading.Event(), threading.Event()
+        
+        class SlowStorage(JournalStorage):
+            def record(self, op, event_id, data):
+                entered.set()
+                release.wait(timeout=10)
+                super().record(op, event_id, data)
+        
+        service = EventService(temp_data_file, storage=SlowStorage(temp_data_file))
+        writer = threading.Thread(target=lambda: service.create_event(
+            "Slow", "Write", "2030-01-01T09:00:00", "2030-01-01T10:00:00"
+        ))
+        writer.start()
+        try:
+            assert entered.wait(timeout=5)
+            # The event is already indexed; only its persistence is pending
+            assert [event.title for event in service.search_events("slow")] == ["Slow"]
+            assert service.count_events() == 1
+        finally:
+            release.set()
+            writer.join(timeout=5)
+        assert EventService(temp_data_file).count_events() == 1
+    
+    def test_stress(self, temp_data_file):
+        """Test many threads creating, updating, deleting and querying at once"""
+        service = EventService(temp_data_file, storage=JournalStorage(temp_data_file, compact_threshold=50, fsync=False))
+        errors = []
+        
+        def worker(seed):
+            rng = random.Random(seed)
+            own = []
+            try:
+                for i in range(150):
+                    action = rng.random()
+                    if action < 0.35 or not own:
+                        start = datetime(2030, 1, 1) + timedelta(hours=rng.randrange(24 * 30))
+                        event = service.create_event(
+                            f"Task {seed} {i}", rng.choice(["alpha", "beta", "gamma"]),
+                            start.isoformat(), (start + timedelta(hours=1)).isoformat()
+                        )
+                        own.append(event.id)
+                    elif action < 0.55:
+                        start = datetime(2030, 1, 1) + timedelta(hours=rng.randrange(24 * 30))
+                        service.update_event(
+                            rng.choice(own), title=f"Renamed {seed} {i}",
+                            start_time=start.isoformat(), end_time=(start + timedelta(hours=2)).isoformat()
+                        )
+                    elif action < 0.65:
+                        service.delete_event(own.pop(rng.randrange(len(own))))
+                    elif action < 0.75:
+                        for event in service.search_events(rng.choice(["alpha", "task", "renamed"])):
+                            assert event.start_time < event.end_time
+                    elif action < 0.85:
+                        page = service.get_events_page(limit=20)
+                        starts = [(event.start_time, event.id) for event in page]
+                        assert starts == sorted(starts)
+                    elif action < 0.95:
+                        service.get_events_by_date_range(datetime(2030, 1, 5), datetime(2030, 1, 10))
+                    else:
+                        service.find_conflicts(datetime(2030, 1, 3, 9), datetime(2030, 1, 3, 12))
+            except Exception as e:  # surfaced by the assertion below
+                errors.append(e)
+        
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+        assert not errors
+        
+        # Every index agrees with the id map
+        ids = set(service._events_by_id)
+        assert set(service._start_index) == ids
+        assert len(service._start_index) == len(ids)
+        assert {event.id for event in service.get_all_events()} == ids
+        assert {event.id for event in service.get_events_by_date_range(
+            datetime(2000, 1, 1), datetime(2100, 1, 1))} == ids
+        for event in service.get_all_events():
+            assert event.id in {match.id for match in service.search_events(event.title)}
+        
+        # The journal replays to exactly the in-memory state
+        service.close()
+        reloaded = EventService(temp_data_file)
+        assert {event.id: event.to_dict() for event in reloaded.events} == \
+            {event.id: event.to_dict() for event in service.events}
+
+@pytest.fixture
+def snapshot_file(temp_data_file):
+    """Path to a throwaway binary snapshot"""
+    path = temp_data_file + '.snap'
+    yield path
+    for suffix in ('', '.journal', '.tmp', '.lock', '.reminders'):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+class MappedBackendMixin:
+    """Re-runs the inherited service tests against MappedEventService"""
+    @pytest.fixture
+    def event_service(self, snapshot_file):
+        # A low threshold so the tests also cover compaction and remapping
+        return MappedEventService(snapshot_file, compact_threshold=4)
+
+class TestMappedEventService(MappedBackendMixin, TestEventService):
+    def test_persists_across_instances(self, event_service, snapshot_file):
+        """Test events and overlay changes survive reopening the snapshot"""
+        events = [
+            event_service.create_event(f"Event {i}", "Description", f"2030-01-0{i + 1}T09:00:00",
+                                       f"2030-01-0{i + 1}T10:00:00")
+            for i in range(5)
+        ]
+        event_service.update_event(events[0].id, title="Renamed")
+        event_service.delete_event(events[1].id)
+        assert event_service.storage.snapshots >= 1
+        assert event_service._view.overlay
+        
+        reopened = MappedEventService(snapshot_file)
+        assert [event.to_dict() for event in reopened.events] == \
+            [event.to_dict() for event in event_service.events]
+        assert reopened.get_event_by_id(events[0].id).title == "Renamed"
+        assert reopened.get_event_by_id(events[1].id) is None
+    
+    def test_migrates_from_json(self, temp_data_file, snapshot_file):
+        """Test a missing snapshot is written from events.json"""
+        json_service = EventService(temp_data_file)
+        event = json_service.create_event(
+            title="Migrated Event",
+            description="Description",
+            start_time="2030-01-01T09:00:00",
+            end_time="2030-01-01T10:00:00",
+            recurrence="weekly"
+        )
+        
+        service = MappedEventService(snapshot_file, json_file=temp_data_file)
+        migrated = service.get_event_by_id(event.id)
+        assert migrated.to_dict() == event.to_dict()
+        assert service.storage.journal_records == 0
+    
+    def test_shared_workers(self, snapshot_file):
+        """Test another worker's journal writes and compaction reach a shared service"""
+        first = MappedEventService(snapshot_file, compact_threshold=3, shared=True)
+        second = MappedEventService(snapshot_file, shared=True)
+        seen = []
+        second.add_listener(lambda op, event: seen.append((op, event.title)))
+        
+        moved = first.create_event("Moved", "Shared", "2030-01-01T09:00:00", "2030-01-01T10:00:00")
+        assert second.refresh() is True
+        assert seen == [('create', "Moved")]
+        
+        # Two more writes fold the journal into a new snapshot
+        first.create_event("Added", "Shared", "2030-01-02T09:00:00", "2030-01-02T10:00:00")
+        first.update_event(moved.id, start_time="2030-01-03T09:00:00", end_time="2030-01-03T10:00:00")
+        assert first.storage.snapshots == 1
+        assert second.refresh() is True
+        assert sorted(seen) == [('create', "Added"), ('create', "Moved"), ('update', "Moved")]
+        assert [event.title for event in second.events] == ["Added", "Moved"]
+
+class TestMappedAdvancedSearch(MappedBackendMixin, TestAdvancedSearch):
+    pass
+
+class TestMappedTextSearch(MappedBackendMixin, TestTextSearch):
+    pass
+
+class TestMappedOccurrences(MappedBackendMixin, TestOccurrences):
+    pass
+
+class TestMappedRecurrenceAwareQueries(MappedBackendMixin, TestRecurrenceAwareQueries):
+    pass
+
+class TestMappedDateBasedQueries(MappedBackendMixin, TestDateBasedQueries):
+    pass
+
+class TestMappedQueryCache(MappedBackendMixin, TestQueryCache):
+    pass
+
+class TestMappedBatchOperations(MappedBackendMixin, TestBatchOperations):
+    pass
+
+class TestMappedPagination(MappedBackendMixin, TestPagination):
+    pass
+
+class TestBinarySnapshot:
+    def _events(self, count):
+        return [
+            Event(f"Event {i}", "Ünïcode description", f"2030-01-{i % 28 + 1:02d}T09:00:00",
+                  f"2030-01-{i % 28 + 1:02d}T{10 + i % 5:02d}:00:00",
+                  recurrence=[None, 'weekly', 'custom'][i % 3])
+            for i in range(count)
+        ]
+    
+    def test_round_trip(self, snapshot_file):
+        """Test every event is read back unchanged, in (start_time, id) order"""
+        events = self._events(50)
+        events.append(Event("Aware", "Zoned", "2030-01-01T09:00:00+02:00", "2030-01-01T10:00:00+02:00"))
+        assert write_snapshot(snapshot_file, events) == 51
+        
+        reader = SnapshotReader(snapshot_file)
+        assert len(reader) == 51
+        stored = [reader.event(row) for row in range(len(reader))]
+        assert [(event.start_time.replace(tzinfo=None), event.id) for event in stored] == \
+            sorted((event.start_time.replace(tzinfo=None), event.id) for event in events)
+        for event in events:
+            assert reader.event(reader.row_for_id(event.id)).to_dict() == event.to_dict()
+        assert reader.row_for_id("missing") is None
+        assert reader.max_duration == 5 * 3600 * 1000000
+        assert [reader.recurrence_at(row) for row in reader.recurring] == \
+            [event.recurrence for event in stored if event.recurrence]
+        reader.close()
+    
+    def test_text_rows(self, snapshot_file):
+        """Test text scans find each row with a word starting with the term, once"""
+        events = self._events(10)
+        write_snapshot(snapshot_file, events)
+        reader = SnapshotReader(snapshot_file)
+        assert len(reader.text_rows("ÜNÏCODE")) == 10
+        assert {reader.id_at(row) for row in reader.text_rows("7")} == {events[7].id}
+        assert reader.text_rows("code") == set()
+        reader.close()
+    
+    def test_rejects_duplicate_ids(self, snapshot_file):
+        """Test a snapshot cannot hold the same id twice"""
+        event = self._events(1)[0]
+        with pytest.raises(ValueError):
+            write_snapshot(snapshot_file, [event, event])
+        assert not os.path.exists(snapshot_file)
+    
+    def test_convert_json(self, temp_data_file, snapshot_file):
+        """Test the converter reads the JSON snapshot and its journal"""
+        service = EventService(temp_data_file)
+        kept = service.create_event("Kept", "Description", "2030-01-01T09:00:00", "2030-01-01T10:00:00")
+        removed = service.create_event("Removed", "Description", "2030-01-02T09:00:00", "2030-01-02T10:00:00")
+        service.delete_event(removed.id)
+        
+        assert convert_json(temp_data_file, snapshot_file) == 1
+        reader = SnapshotReader(snapshot_file)
+        assert reader.event(0).to_dict() == kept.to_dict()
+        reader.close()
+    
+    def test_api_backend(self, snapshot_file, temp_data_file):
+        """Test the app serves events from the mapped backend"""
+        class MappedConfig(TestConfig):
+            DATA_FILE = temp_data_file
+            EVENT_BACKEND = 'mmap'
+            BINARY_SNAPSHOT = snapshot_file
+        
+        client = create_app(MappedConfig).test_client()
+        response = client.post('/api/events', json={
+            'title': 'Mapped', 'description': 'Served from the snapshot',
+            'start_time': '2030-01-01T09:00:00', 'end_time': '2030-01-01T10:00:00'
+        })
+        assert response.status_code == 201
+        data = client.get('/api/events?search=snapshot').get_json()['data']
+        assert [event['title'] for event in data] == ['Mapped']
+        assert client.get('/api/stats').status_code == 501
+
+class TestChangelog:
+    def _create(self, service, title, day=1):
+        return service.create_event(title, "Description", f"2030-01-{day:02d}T09:00:00", f"2030-01-{day:02d}T10:00:00")
+    
+    def test_since_returns_deltas_and_tombstones(self, event_service):
+        """Test changes come back in order, with deletes as tombstones"""
+        kept = self._create(event_service, "Kept")
+        removed = self._create(event_service, "Removed")
+        start = event_service.changelog.latest
+        event_service.update_event(kept.id, title="Renamed")
+        event_service.delete_event(removed.id)
+        
+        changes = event_service.changelog.since(start)
+        assert [(change.op, change.event_id) for change in changes] == [('update', kept.id), ('delete', removed.id)]
+        assert changes[0].event['title'] == "Renamed"
+        assert changes[1].event is None
+        assert event_service.changelog.since(changes[-1].seq) == []
+        assert [change.seq for change in event_service.changelog.since(0, limit=2)] == [1, 2]
+    
+    def test_resync_outside_window(self, event_service):
+        """Test a sequence number that fell out of the window (or was never issued) needs a resync"""
+        changelog = Changelog(event_service, max_entries=3)
+        for day in range(1, 6):
+            self._create(event_service, f"Event {day}", day)
+        with pytest.raises(ResyncRequired) as error:
+            changelog.since(1)
+        assert error.value.latest == 5
+        assert [change.seq for change in changelog.since(2)] == [3, 4, 5]
+        with pytest.raises(ResyncRequired):
+            changelog.since(6)
+    
+    def test_unnotified_changes_force_resync(self, event_service):
+        """Test a version bump without a notification (e.g. another process's SQLite write) drops the log"""
+        self._create(event_service, "Before")
+        event_service._bump_version()
+        with pytest.raises(ResyncRequired):
+            event_service.changelog.since(0)
+        latest = event_service.changelog.latest
+        assert event_service.changelog.since(latest) == []
+        after = self._create(event_service, "After")
+        assert [change.event_id for change in event_service.changelog.since(latest)] == [after.id]
+    
+    def test_changes_api(self, client, sample_event_data):
+        """Test delta sync over HTTP, including 304 when nothing changed and 410 for a resync"""
+        first = client.get('/api/events/changes?since=0').get_json()
+        assert first['data'] == [] and first['next'] == 0
+        
+        event_id = client.post('/api/events', json=sample_event_data).get_json()['data']['id']
+        client.delete(f'/api/events/{event_id}')
+        response = client.get(f"/api/events/changes?since=0&epoch={first['epoch']}")
+        data = response.get_json()
+        assert [(change['op'], change['id']) for change in data['data']] == [('create', event_id), ('delete', event_id)]
+        assert data['next'] == 2 and data['has_more'] is False
+        
+        page = client.get('/api/events/changes?since=0&limit=1').get_json()
+        assert page['next'] == 1 and page['has_more'] is True
+        
+        url = f"/api/events/changes?since=0&epoch={first['epoch']}"
+        unchanged = client.get(url, headers={'If-None-Match': response.headers['ETag']})
+        assert unchanged.status_code == 304
+        
+        stale = client.get('/api/events/changes?since=2&epoch=other')
+        assert stale.status_code == 410
+        assert stale.get_json()['resync'] is True
+        assert client.get('/api/events/changes?since=99').status_code == 410
+        assert client.get('/api/events/changes?since=abc').status_code == 400
+
+class TestSQLiteChangelog(SQLiteBackendMixin, TestChangelog):
+    pass
+
+class TestMappedChangelog(MappedBackendMixin, TestChangelog):
+    pass
+
+class TestStream:
+    def _create(self, service, title, day=1):
+        return service.create_event(title, "Description", f"2030-01-{day:02d}T09:00:00", f"2030-01-{day:02d}T10:00:00")
+    
+    def _frames(self, text):
+        """Parse SSE text into (id, event, data) tuples, skipping comments and retry lines"""
+        frames = []
+        for block in text.strip().split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in block.split('\n') if line and not line.startswith((':', 'retry')))
+            if 'event' in fields:
+                frames.append((fields.get('id'), fields['event'], json.loads(fields['data'])))
+        return frames
+    
+    def test_fan_out_and_resume(self, event_service):
+        """Test every subscriber gets each change, and a reconnect resumes after Last-Event-ID"""
+        from app.broker import Broker
+        
+        broker = Broker(event_service)
+        first, second = broker.subscribe(), broker.subscribe(types=['reminder'])
+        created = self._create(event_service, "Created")
+        frames = self._frames(''.join(first.get(1)))
+        assert [(event, data['op'], data['id']) for _, event, data in frames] == [('change', 'create', created.id)]
+        assert second.get(0.05) == []
+        
+        resume_from = frames[0][0]
+        first.close()
+        event_service.update_event(created.id, title="Renamed")
+        resumed = broker.subscribe(resume_from)
+        frames = self._frames(''.join(resumed.get(1)))
+        assert [(data['op'], data['event']['title']) for _, _, data in frames] == [('update', "Renamed")]
+        
+        # Ids from another process or before a restart cannot be resumed
+        stale = broker.subscribe('otherepoch-1')
+        assert [event for _, event, _ in self._frames(''.join(stale.get(1)))] == ['resync']
+        assert broker.subscriber_count == 3
+    
+    def test_slow_subscriber_coalesces_then_drops(self, event_service):
+        """Test a full queue keeps the latest state per event, then drops the oldest and asks for a resync"""
+        from app.broker import Broker
+        
+        broker = Broker(event_service, max_queued=2)
+        subscription = broker.subscribe()
+        event = self._create(event_service, "Version 0")
+        for version in range(1, 4):
+            event_service.update_event(event.id, title=f"Version {version}")
+        assert subscription.coalesced == 2 and subscription.dropped == 0
+        
+        other = self._create(event_service, "Other", 2)
+        assert subscription.dropped == 1
+        frames = self._frames(''.join(subscription.get(1)))
+        assert [event for _, event, _ in frames] == ['resync', 'change', 'change']
+        assert [(data['op'], data['id']) for _, _, data in frames[1:]] == [('update', event.id), ('create', other.id)]
+        assert frames[1][2]['event']['title'] == "Version 3"
+        assert broker.stats()['dropped'] == 1
+        
+        with pytest.raises(OverflowError):
+            Broker(event_service, max_subscribers=0).subscribe()
+    
+    def test_unnotified_changes_broadcast_resync(self, event_service):
+        """Test a version bump without a notification (another process's write) tells subscribers to resync"""
+        from app.broker import Broker
+        
+        broker = Broker(event_service)
+        subscription = broker.subscribe()
+        self._create(event_service, "Notified")
+        broker.check_gaps()
+        assert [event for _, event, _ in self._frames(''.join(subscription.get(1)))] == ['change']
+        event_service._bump_version()
+        broker.check_gaps()
+        assert [event for _, event, _ in self._frames(''.join(subscription.get(1)))] == ['resync']
+    
+    def test_scheduler_publishes_reminders(self, event_service):
+        """Test fired reminders reach the scheduler's listeners"""
+        from app.reminder_scheduler import ReminderScheduler
+        
+        fired = []
+        scheduler = ReminderScheduler(event_service, check_interval=3600)
+        scheduler.add_listener(lambda event, occurrence, message: fired.append((event.id, message)))
+        scheduler.start()
+        try:
+            start = datetime.now() + timedelta(minutes=30)
+            event = event_service.create_event("Soon", "Description", start.isoformat(), (start + timedelta(hours=1)).isoformat())
+            assert TestEventDrivenScheduler()._wait_for(lambda: fired)
+            assert fired[0][0] == event.id and fired[0][1].startswith("REMINDER: 'Soon'")
+        finally:
+            scheduler.stop()
+    
+    def test_stream_api(self, temp_data_file, sample_event_data):
+        """Test GET /api/stream replays changes after last_event_id, then closes at STREAM_MAX_DURATION"""
+        config = TestConfig()
+        config.DATA_FILE = temp_data_file
+        config.STREAM_MAX_DURATION = 0.3
+        config.STREAM_HEARTBEAT_INTERVAL = 0.1
+        app = create_app(config)
+        client = app.test_client()
+        event_id = client.post('/api/events', json=sample_event_data).get_json()['data']['id']
+        
+        epoch = app.extensions['broker'].epoch
+        response = client.get('/api/stream', headers={'Last-Event-ID': f'{epoch}-0'})
+        assert response.mimetype == 'text/event-stream'
+        body = response.get_data(as_text=True)
+        assert body.startswith('retry: ')
+        assert ': keepalive' in body
+        frames = self._frames(body)
+        assert [(frame_id, data['id']) for frame_id, _, data in frames] == [(f'{epoch}-1', event_id)]
+        assert app.extensions['broker'].subscriber_count == 0
+        
+        assert client.get('/api/stream?types=bogus').status_code == 400
+        assert client.get('/api/stream/stats').get_json()['data']['published'] == 1
+
+class LocalWebhook:
+    """Local HTTP stand-in for a reminder webhook: records posted batches, can fail or stall on demand"""
+    
+    def __init__(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        
+        webhook = self
+        self.batches = []
+        self.statuses = []  # status codes to answer with before succeeding
+        self.delay = 0.0
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                import time
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                time.sleep(webhook.delay)
+                status = webhook.statuses.pop(0) if webhook.statuses else 200
+                if status == 200:
+                    webhook.batches.append(body['reminders'])
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/reminders"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def webhook():
+    server = LocalWebhook()
+    yield server
+    server.close()
+
+class TestReminderDelivery:
+    def _reminder(self, index):
+        return {'event_id': f'event-{index}', 'message': f'Reminder {index}'}
+    
+    def _wait_for(self, condition, timeout=3.0):
+        return TestEventDrivenScheduler()._wait_for(condition, timeout)
+    
+    def test_webhook_batches_and_retries(self, webhook):
+        """Test reminders reach the webhook in batches, with failed batches retried"""
+        from app.delivery import DeliveryPipeline, WebhookSink
+        
+        webhook.statuses = [503, 503]
+        pipeline = DeliveryPipeline([WebhookSink(webhook.url, batch_size=10)], workers=1, backoff=0.01, batch_wait=0.1)
+        pipeline.start()
+        try:
+            for index in range(5):
+                assert pipeline.submit(self._reminder(index))
+            assert self._wait_for(lambda: pipeline.stats()['sinks']['webhook']['delivered'] == 5)
+        finally:
+            pipeline.stop()
+        stats = pipeline.stats()['sinks']['webhook']
+        assert stats['retries'] == 2 and stats['failed'] == 0
+        assert sorted(reminder['event_id'] for batch in webhook.batches for reminder in batch) == [f'event-{index}' for index in range(5)]
+        assert len(webhook.batches) < 5
+    
+    def test_rejected_batch_is_not_retried(self, webhook):
+        """Test a 4xx answer fails the batch at once"""
+        from app.delivery import DeliveryPipeline, WebhookSink
+        
+        webhook.statuses = [400]
+        pipeline = DeliveryPipeline([WebhookSink(webhook.url)], backoff=0.01)
+        pipeline.start()
+        try:
+            pipeline.submit(self._reminder(1))
+            assert self._wait_for(lambda: pipeline.stats()['sinks']['webhook']['failed'] == 1)
+        finally:
+            pipeline.stop()
+        stats = pipeline.stats()['sinks']['webhook']
+        assert stats['retries'] == 0 and 'HTTP 400' in stats['last_error']
+    
+    def test_completion_reports_whether_delivered(self, webhook):
+        """Test on_done is told False for a failed or dropped reminder and True for a delivered one"""
+        from app.delivery import DeliveryPipeline, WebhookSink
+        
+        results = []
+        webhook.statuses = [400]
+        pipeline = DeliveryPipeline([WebhookSink(webhook.url, batch_size=1)], workers=1, backoff=0.01)
+        pipeline.start()
+        try:
+            pipeline.submit(self._reminder(1), on_done=results.append)
+            assert self._wait_for(lambda: results == [False])
+            pipeline.submit(self._reminder(2), on_done=results.append)
+            assert self._wait_for(lambda: results == [False, True])
+        finally:
+            pipeline.stop()
+        
+        webhook.delay = 0.5
+        pipeline = DeliveryPipeline([WebhookSink(webhook.url, batch_size=1)], queue_size=1, workers=1)
+        pipeline.start()
+        try:
+            accepted = [pipeline.submit(self._reminder(index), on_done=results.append) for index in range(5)]
+            assert accepted.count(False) > 0
+            assert results.count(False) == 1 + accepted.count(False)
+        finally:
+            pipeline.stop(timeout=0)
+    
+    def test_slow_sink_does_not_delay_submit(self, webhook):
+        """Test submitting never waits for a slow sink, and overflow is dropped and counted"""
+        import time
+        from app.delivery import DeliveryPipeline, WebhookSink
+        
+        webhook.delay = 0.5
+        pipeline = DeliveryPipeline([WebhookSink(webhook.url, batch_size=1)], queue_size=3, workers=1, max_retries=0)
+        pipeline.start()
+        try:
+            started = time.monotonic()
+            accepted = [pipeline.submit(self._reminder(index)) for index in range(10)]
+            assert time.monotonic() - started < 0.1
+            stats = pipeline.stats()['sinks']['webhook']
+            assert accepted.count(False) == stats['dropped'] > 0
+            assert stats['queued'] <= stats['capacity'] == 3
+        finally:
+            pipeline.stop(timeout=0)
+    
+    def test_file_sink(self, temp_data_file):
+        """Test the file sink appends one JSON line per reminder and stop() drains the queue"""
+        from app.delivery import DeliveryPipeline, FileSink
+        
+        path = temp_data_file + '.reminders'
+        pipeline = DeliveryPipeline([FileSink(path, fsync=False)])
+        pipeline.start()
+        try:
+            for index in range(3):
+                pipeline.submit(self._reminder(index))
+        finally:
+            pipeline.stop()
+        try:
+            with open(path) as f:
+                assert [json.loads(line)['event_id'] for line in f] == ['event-0', 'event-1', 'event-2']
+        finally:
+            os.unlink(path)
+    
+    def test_scheduler_hands_reminders_to_pipeline(self, event_service):
+        """Test the scheduler queues fired reminders instead of delivering them itself"""
+        from app.delivery import DeliveryPipeline, ReminderSink
+        from app.reminder_scheduler import ReminderScheduler
+        
+        class CollectingSink(ReminderSink):
+            name = 'collect'
+            
+            def __init__(self):
+                self.delivered = []
+            
+            def deliver(self, reminders):
+                self.delivered.extend(reminders)
+        
+        sink = CollectingSink()
+        scheduler = ReminderScheduler(event_service, check_interval=3600, delivery=DeliveryPipeline([sink]))
+        scheduler.start()
+        try:
+            start = datetime.now() + timedelta(minutes=30)
+            event = event_service.create_event("Soon", "Description", start.isoformat(), (start + timedelta(hours=1)).isoformat())
+            assert self._wait_for(lambda: sink.delivered)
+            assert sink.delivered[0]['event_id'] == event.id
+            assert sink.delivered[0]['occurrence_start'] == event.start_time.isoformat()
+            assert scheduler.get_status()['delivery']['sinks']['collect']['delivered'] == 1
+        finally:
+            scheduler.stop()
+    
+    def test_create_sinks(self):
+        """Test sinks are built from the config, and misconfigured ones are rejected"""
+        from app.delivery import FileSink, StdoutSink, WebhookSink, create_sinks
+        
+        sinks = create_sinks({'REMINDER_SINKS': ['stdout', 'webhook', 'file'],
+                              'REMINDER_WEBHOOK_URL': 'http://localhost/hook', 'REMINDER_FILE': 'reminders.ndjson'})
+        assert [type(sink) for sink in sinks] == [StdoutSink, WebhookSink, FileSink]
+        with pytest.raises(ValueError):
+            create_sinks({'REMINDER_SINKS': ['webhook']})
+        with pytest.raises(ValueError):
+            create_sinks({'REMINDER_SINKS': ['pager']})
+
+class TestReminderLedger:
+    class CollectingSink:
+        name = 'collect'
+        batch_size = 10
+        max_workers = None
+        
+        def __init__(self):
+            self.delivered = []
+        
+        def deliver(self, reminders):
+            self.delivered.extend(reminders)
+        
+        def close(self):
+            pass
+    
+    def _scheduler(self, service, path):
+        from app.delivery import DeliveryPipeline
+        from app.ledger import ReminderLedger
+        from app.reminder_scheduler import ReminderScheduler
+        
+        sink = self.CollectingSink()
+        scheduler = ReminderScheduler(service, check_interval=3600, delivery=DeliveryPipeline([sink]),
+                                      ledger=ReminderLedger(path, fsync=False))
+        return scheduler, sink
+    
+    def _create_soon(self, service, minutes=30):
+        start = (datetime.now() + timedelta(minutes=minutes)).replace(microsecond=0)
+        return service.create_event("Soon", "Description", start.isoformat(), (start + timedelta(hours=1)).isoformat())
+    
+    def test_claims_survive_reopening(self, temp_data_file):
+        """Test claims and completions are persisted, and a second claim of a key fails"""
+        from app.ledger import ReminderLedger
+        
+        path = temp_data_file + '.reminders'
+        start = datetime(2030, 1, 1, 9, 0)
+        ledger = ReminderLedger(path, fsync=False)
+        assert ledger.claim(('a', start, 60))
+        assert not ledger.claim(('a', start, 60))
+        assert ledger.claim(('a', start, 15))
+        ledger.complete(('a', start, 60))
+        
+        reopened = ReminderLedger(path, fsync=False)
+        assert ('a', start, 60) in reopened and len(reopened) == 2
+        assert reopened.pending() == [('a', start, 15)]
+        assert not reopened.claim(('a', start, 15))
+        
+        # A claim by another process is seen before claiming (failover)
+        assert ledger.claim(('b', start, 60))
+        assert not reopened.claim(('b', start, 60))
+    
+    def test_prune_in_start_order_and_compact(self, temp_data_file):
+        """Test pruning drops only started occurrences and the file is rewritten once mostly stale"""
+        from app.ledger import ReminderLedger
+        
+        path = temp_data_file + '.reminders'
+        ledger = ReminderLedger(path, fsync=False, compact_threshold=4)
+        base = datetime(2030, 1, 1)
+        for hour in (5, 1, 3, 2, 4, 6):
+            key = (f'event-{hour}', base + timedelta(hours=hour), 60)
+            ledger.claim(key)
+            ledger.complete(key)
+        assert ledger.prune(base + timedelta(hours=3)) == 2
+        assert ('event-3', base + timedelta(hours=3), 60) in ledger
+        # 12 lines for 4 live entries: rewritten with one line each
+        with open(path) as f:
+            assert len(f.readlines()) == 4
+        assert ledger.prune(base + timedelta(hours=5, minutes=30)) == 3
+        assert len(ledger) == 1
+        # Below the threshold stale lines stay in the file until the next rewrite
+        reopened = ReminderLedger(path)
+        assert reopened.prune(base + timedelta(hours=5, minutes=30)) == 3 and len(reopened) == 1
+    
+    def test_torn_line_is_skipped(self, temp_data_file):
+        """Test a line cut short by a crash is ignored and later claims still persist"""
+        from app.ledger import ReminderLedger
+        
+        path = temp_data_file + '.reminders'
+        start = datetime(2030, 1, 1, 9, 0)
+        ReminderLedger(path, fsync=False).claim(('a', start, 60))
+        with open(path, 'a') as f:
+            f.write('["pending","b","2030-01-01T')
+        ledger = ReminderLedger(path, fsync=False)
+        assert len(ledger) == 1
+        assert ledger.claim(('c', start, 60))
+        assert len(ReminderLedger(path)) == 2
+    
+    def test_only_the_leader_prunes_the_shared_ledger(self, event_service, temp_data_file):
+        """Test a follower never rewrites the ledger file the leader appends to"""
+        from app.ledger import ReminderLedger
+        from app.reminder_scheduler import ReminderScheduler
+        
+        path = temp_data_file + '.reminders'
+        started = (datetime.now() - timedelta(hours=1), 60)
+        ledger = ReminderLedger(path, fsync=False, compact_threshold=0)
+        ledger.claim(('started',) + started)
+        ledger.complete(('started',) + started)
+        leader = FileLock(temp_data_file + '.leader')
+        assert leader.acquire(blocking=False)
+        try:
+            follower = ReminderScheduler(event_service, leader_lock=FileLock(temp_data_file + '.leader'),
+                                         ledger=ReminderLedger(path, fsync=False, compact_threshold=0))
+            follower._check_reminders()
+            assert len(follower.ledger) == 1
+            with open(path) as f:
+                assert len(f.readlines()) == 2
+            
+            assert ledger.prune(datetime.now()) == 1
+            with open(path) as f:
+                assert f.read() == ''
+            assert [name for name in os.listdir(os.path.dirname(path)) if name.startswith(os.path.basename(path) + '.')] == []
+        finally:
+            leader.release()
+    
+    def test_restart_does_not_refire(self, event_service, temp_data_file):
+        """Test a restarted scheduler on the same ledger does not deliver a reminder again"""
+        path = temp_data_file + '.reminders'
+        event = self._create_soon(event_service)
+        scheduler, sink = self._scheduler(event_service, path)
+        scheduler.start()
+        try:
+            assert TestEventDrivenScheduler()._wait_for(lambda: sink.delivered)
+        finally:
+            scheduler.stop()
+        assert sink.delivered[0]['reminder_id'] == f"{event.id}:{event.start_time.isoformat()}:60"
+        
+        restarted, sink = self._scheduler(event_service, path)
+        restarted.start()
+        try:
+            assert not TestEventDrivenScheduler()._wait_for(lambda: sink.delivered, timeout=0.3)
+            assert restarted.get_status()['tracked_events'] == 1
+        finally:
+            restarted.stop()
+    
+    def test_unfinished_claims_are_redelivered(self, event_service, temp_data_file):
+        """Test reminders claimed but never delivered (crash, failover) are delivered once on start"""
+        from app.ledger import ReminderLedger
+        
+        path = temp_data_file + '.reminders'
+        kept = self._create_soon(event_service)
+        deleted = self._create_soon(event_service, minutes=40)
+        crashed = ReminderLedger(path, fsync=False)
+        crashed.claim((kept.id, kept.start_time, 60))
+        crashed.claim((deleted.id, deleted.start_time, 60))
+        event_service.delete_event(deleted.id)
+        
+        scheduler, sink = self._scheduler(event_service, path)
+        scheduler.start()
+        try:
+            assert TestEventDrivenScheduler()._wait_for(lambda: scheduler.ledger.pending() == [])
+        finally:
+            scheduler.stop()
+        assert [reminder['event_id'] for reminder in sink.delivered] == [kept.id]
+    
+    def test_failed_delivery_stays_pending(self, event_service, temp_data_file):
+        """Test a reminder no sink delivered stays pending and is retried until it is delivered"""
+        from app.delivery import DeliveryPipeline
+        from app.ledger import ReminderLedger
+        from app.reminder_scheduler import ReminderScheduler
+        
+        class FailingSink(self.CollectingSink):
+            failures = 2
+            
+            def deliver(self, reminders):
+                if self.failures:
+                    self.failures -= 1
+                    raise ConnectionError("sink down")
+                super().deliver(reminders)
+        
+        path = temp_data_file + '.reminders'
+        event = self._create_soon(event_service)
+        sink = FailingSink()
+        scheduler = ReminderScheduler(event_service, check_interval=0.05, delivery=DeliveryPipeline([sink], max_retries=0),
+                                      ledger=ReminderLedger(path, fsync=False))
+        scheduler.start()
+        try:
+            assert TestEventDrivenScheduler()._wait_for(lambda: sink.delivered)
+            assert TestEventDrivenScheduler()._wait_for(lambda: scheduler.ledger.pending() == [])
+        finally:
+            scheduler.stop()
+        assert sink.failures == 0
+        assert [reminder['event_id'] for reminder in sink.delivered] == [event.id]
+        assert ReminderLedger(path).pending() == [] and len(ReminderLedger(path)) == 1
+
 if __name__ == '__main__':
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])